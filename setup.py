@@ -79,6 +79,7 @@ setup(
         'chromadb',
         'cython',
         'requests',
+        'aiohttp',
         'beautifulsoup4',
         'celery',
         'redis',
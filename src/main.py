@@ -26,18 +26,18 @@ try:
 
     # Import Redis client
     try:
-        from redis_client import RedisClient
+        from redis_client import get_redis_client
     except ImportError:
-        from src.redis_client import RedisClient
+        from src.redis_client import get_redis_client
 except ImportError:
     # Fall back to the original table parser
     try:
         from table_parser import TableTransformer
-        from redis_client import RedisClient
+        from redis_client import get_redis_client
     except ImportError:
         # Try with src prefix
         from src.table_parser import TableTransformer
-        from src.redis_client import RedisClient
+        from src.redis_client import get_redis_client
 
 # Make sure json is imported at the top level
 import json
@@ -97,7 +97,7 @@ logger.info("Logger initialized")
 table_transformer = TableTransformer()
 
 # Initialize Redis client
-redis_client = RedisClient()
+redis_client = get_redis_client()
 
 # Filter out sensitive model names from logs
 logging.getLogger().addFilter(lambda record: "phi-4-multimodal" not in record.msg.lower())
@@ -934,6 +934,10 @@ async def parse_document_endpoint(
     if not api_key or not validate_api_key(api_key):
         raise HTTPException(status_code=401, detail="Invalid API key")
 
+    # Reject empty uploads before a task is recorded or queued
+    if source_type == "file" and file and file.size == 0:
+        raise HTTPException(status_code=400, detail="File content is empty")
+
     # Generate task ID
     task_id = str(uuid.uuid4())
 
@@ -987,20 +991,27 @@ async def parse_document_endpoint(
 
                 # Read file content
                 file_content = await file.read()
-                if not file_content:
-                    logger.error(f"File content is empty for task {task_id}")
-                    raise HTTPException(status_code=400, detail="File content is empty")
 
                 # Save file to disk
-                file_path = f"data/uploads/{task_id}_{file.filename}"
-                with open(file_path, "wb") as f:
-                    f.write(file_content)
+                if file_content:
+                    file_path = f"data/uploads/{task_id}_{file.filename}"
+                    with open(file_path, "wb") as f:
+                        f.write(file_content)
 
-                logger.info(f"File saved to {file_path} for task {task_id}")
+                    logger.info(f"File saved to {file_path} for task {task_id}")
             except Exception as e:
                 logger.error(f"Error saving file for task {task_id}: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
 
+            # Reject an empty upload here so the worker never dequeues an unusable task
+            if not file_path:
+                logger.error(f"File content is empty for task {task_id}")
+                conn = sqlite3.connect(DB_PATH)
+                conn.execute("UPDATE tasks SET status = ? WHERE task_id = ?", ("failed", task_id))
+                conn.commit()
+                conn.close()
+                raise HTTPException(status_code=400, detail="File content is empty")
+
         # Add task to Redis queue
         task_data = {
             "task_id": task_id,
@@ -1873,6 +1884,7 @@ async def batch_process_documents(
                     file_content = await file.read()
                     if not file_content:
                         logger.error(f"File content is empty for task {task_id}")
+                        cursor.execute("UPDATE tasks SET status = ? WHERE task_id = ?", ("failed", task_id))
                         continue
 
                     # Save file to disk
@@ -20,20 +20,95 @@ This module provides connectors for various data sources from Unstructured.io:
 """
 
 import os
+import asyncio
 import tempfile
 import logging
+import io
 import json
+import re
+import tarfile
+import threading
+import weakref
+import importlib
 import requests
-from typing import Optional, Dict, Any, List, Union
+from functools import partial
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from contextlib import contextmanager, nullcontext
+from typing import Optional, Dict, Any, BinaryIO, Iterable, Iterator, List, TextIO, Tuple, Union
 from urllib.parse import urlparse
 
+try:
+    from performance import MemoryCache
+except ImportError:
+    from src.performance import MemoryCache
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session for connectors that call REST endpoints directly, so
+# keep-alive connections and TLS sessions are reused across requests
+_HTTP = requests.Session()
+_HTTP.headers["User-Agent"] = "ClaryAI-Connectors/0.1.0"
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+)
+_HTTP.mount("https://", _HTTP_ADAPTER)
+_HTTP.mount("http://", _HTTP_ADAPTER)
+
+# GET with (connect, read) timeouts so a stalled endpoint cannot hang a worker
+_http_get = partial(_HTTP.get, timeout=(3.05, 30))
+
+# Parallel range GETs per Azure blob. The first GET of a download returns the
+# blob size along with the first part; only the rest is split into ranges, and
+# no more workers are started than there are ranges, so small blobs still
+# download in a single request
+AZURE_MAX_CONCURRENCY = int(os.getenv("AZURE_MAX_CONCURRENCY", "8"))
+
+# Source ID formats, compiled once at import time
+_AZURE_ID_RE = re.compile(r'^([^/]+)/(.+)$', re.DOTALL)  # container/blob_name
+_CB_ID_RE = re.compile(r'^([^.:]+)\.([^.:]+)\.([^.:]+):(.+)$', re.DOTALL)  # bucket.scope.collection:doc_or_query
+_ES_ID_RE = re.compile(r'^([^:]+):(.+)$', re.DOTALL)  # index:doc_or_query
+
+# Couchbase scope listings are reused for this many seconds so that repeated
+# scope/collection listings of the same bucket share one get_all_scopes() RPC
+COUCHBASE_SCOPE_CACHE_TTL = 5.0
+COUCHBASE_SCOPE_CACHE_SIZE = 256
+_couchbase_scope_cache = MemoryCache(max_size=COUCHBASE_SCOPE_CACHE_SIZE, ttl=COUCHBASE_SCOPE_CACHE_TTL)
+
+# Box folder listings fetch only the fields we return, in the largest pages Box allows
+BOX_ITEM_FIELDS = ['id', 'name', 'type']
+BOX_ITEMS_PAGE_SIZE = 1000
+
+# Write buffer for the streaming tar files produced by download_bundle
+BUNDLE_BUFSIZE = 1 << 20
+
+# Maximum concurrent downloads per provider, so fan-out from download_many,
+# download_bundle and the async variants stays under upstream rate limits
+CONCURRENCY_LIMITS = {
+    "azure": 16,
+    "box": 8,
+    "couchbase": 16,
+    "elasticsearch": 32
+}
+_SEMAPHORES = {provider: threading.BoundedSemaphore(limit) for provider, limit in CONCURRENCY_LIMITS.items()}
+# asyncio semaphores are bound to one event loop, so they are created per loop on first use
+_ASYNC_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+# Maximum number of document IDs sent in a single Elasticsearch _mget request
+ES_MGET_BATCH_SIZE = 1000
+
+# Elasticsearch per-request timeout in seconds and retries on timeout
+ES_REQUEST_TIMEOUT = 30
+ES_MAX_RETRIES = 3
+
 # Optional imports - these will be imported only when needed
 # to avoid requiring all dependencies for all connectors
 OPTIONAL_IMPORTS = {
     "azure.storage.blob": None,
+    "azure.storage.blob.aio": None,
     "boxsdk": None,
     "couchbase": None,
     "elasticsearch": None,
@@ -47,6 +122,26 @@ OPTIONAL_IMPORTS = {
     "zenpy": None
 }
 
+def set_concurrency(provider: str, limit: int) -> None:
+    """
+    Set the maximum number of concurrent downloads for a provider.
+
+    Downloads already in progress keep the slot they acquired under the old limit.
+
+    Args:
+        provider: The data source provider (azure, box, couchbase, elasticsearch).
+        limit: The maximum number of concurrent downloads.
+    """
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+
+    provider = provider.lower()
+    CONCURRENCY_LIMITS[provider] = limit
+    _SEMAPHORES[provider] = threading.BoundedSemaphore(limit)
+    for semaphores in _ASYNC_SEMAPHORES.values():
+        semaphores.pop(provider, None)
+
+
 def import_optional(module_name):
     """Import an optional module."""
     if module_name not in OPTIONAL_IMPORTS:
@@ -55,7 +150,7 @@ def import_optional(module_name):
 
     if OPTIONAL_IMPORTS[module_name] is None:
         try:
-            OPTIONAL_IMPORTS[module_name] = __import__(module_name)
+            OPTIONAL_IMPORTS[module_name] = importlib.import_module(module_name)
         except ImportError:
             logger.warning(f"Optional module {module_name} not available")
             return None
@@ -65,6 +160,9 @@ def import_optional(module_name):
 class BaseConnector:
     """Base class for all data source connectors."""
 
+    # Key into CONCURRENCY_LIMITS; None means downloads are not limited
+    _provider: Optional[str] = None
+
     def __init__(self):
         """Initialize the connector."""
         pass
@@ -82,6 +180,55 @@ class BaseConnector:
         """
         raise NotImplementedError("Subclasses must implement download_data")
 
+    def download_to_stream(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """
+        Download data from the source directly into a writable binary stream.
+
+        Use this instead of download_data when the data is parsed straight
+        away, e.g. into an io.BytesIO, to skip the temporary file round trip.
+
+        Args:
+            source_id: The ID of the source to download.
+            credentials: The credentials to use for authentication.
+            out: The binary stream to write the data to.
+
+        Returns:
+            True if the download succeeded, False otherwise.
+        """
+        with self._download_slot():
+            return self._transfer(source_id, credentials, out)
+
+    def _download_slot(self):
+        """Context manager holding one of this provider's download slots."""
+        semaphore = _SEMAPHORES.get(self._provider)
+        return semaphore if semaphore is not None else nullcontext()
+
+    def _async_download_slot(self):
+        """Async context manager holding one of this provider's download slots on the running loop."""
+        limit = CONCURRENCY_LIMITS.get(self._provider)
+        if limit is None:
+            return nullcontext()
+
+        semaphores = _ASYNC_SEMAPHORES.setdefault(asyncio.get_running_loop(), {})
+        if self._provider not in semaphores:
+            semaphores[self._provider] = asyncio.Semaphore(limit)
+        return semaphores[self._provider]
+
+    def _transfer(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """Write the data for source_id to out; shared by download_data and download_to_stream."""
+        raise NotImplementedError("Subclasses must implement _transfer")
+
+    def _download_to_temp_file(self, source_id: str, credentials: Dict[str, Any], suffix: str = "") -> Optional[str]:
+        """Transfer source_id into a new temporary file and return its path, or None on failure."""
+        temp_path = self._create_temp_file(suffix)
+        with self._download_slot(), open(temp_path, 'wb') as f:
+            success = self._transfer(source_id, credentials, f)
+
+        if not success:
+            os.unlink(temp_path)
+            return None
+        return temp_path
+
     def list_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         List sources in a parent container.
@@ -95,14 +242,181 @@ class BaseConnector:
         """
         raise NotImplementedError("Subclasses must implement list_sources")
 
+    def download_many(self, source_ids: List[str], credentials: Dict[str, Any]) -> List[Optional[str]]:
+        """
+        Download several sources from the same provider.
+
+        Connectors that support batched fetches override this; the default
+        calls download_data once per source.
+
+        Args:
+            source_ids: The IDs of the sources to download.
+            credentials: The credentials to use for authentication.
+
+        Returns:
+            The downloaded file paths, in the same order as source_ids
+            (None for each download that failed).
+        """
+        return [self.download_data(source_id, credentials) for source_id in source_ids]
+
+    def download_bundle(self, source_ids: List[str],
+                        credentials: Dict[str, Any]) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Download several sources into a single uncompressed tar file.
+
+        The default downloads each source with download_data and moves it into
+        the archive, so at most one intermediate file exists at a time.
+
+        Args:
+            source_ids: The IDs of the sources to download.
+            credentials: The credentials to use for authentication.
+
+        Returns:
+            A tuple of the tar file path and a manifest with one entry per source
+            ("id", "member" and "size", or "error" if that download failed), or
+            None if the bundle could not be created.
+        """
+        temp_path = None
+        try:
+            temp_path = self._create_temp_file('.tar')
+            manifest = []
+            with tarfile.open(temp_path, 'w|', bufsize=BUNDLE_BUFSIZE) as tar:
+                for position, source_id in enumerate(source_ids):
+                    path = self.download_data(source_id, credentials)
+                    if path is None:
+                        manifest.append({"id": source_id, "error": "download failed"})
+                        continue
+
+                    try:
+                        member = self._bundle_member_name(position, source_id)
+                        size = os.path.getsize(path)
+                        tar.add(path, arcname=member)
+                    finally:
+                        os.unlink(path)
+                    manifest.append({"id": source_id, "member": member, "size": size})
+
+            return temp_path, manifest
+        except Exception as e:
+            logger.error(f"Bundle download failed: {str(e)}")
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return None
+
+    @staticmethod
+    def _bundle_member_name(position: int, source_id: str) -> str:
+        """Build a unique tar member name for the source at the given position."""
+        return f"{position:06d}_{os.path.basename(source_id.rstrip('/')) or 'source'}"
+
+    async def adownload_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
+        """
+        Download data from the source without blocking the event loop.
+
+        Connectors with an async SDK override this; the default runs the
+        blocking download_data in a worker thread.
+
+        Args:
+            source_id: The ID of the source to download.
+            credentials: The credentials to use for authentication.
+
+        Returns:
+            The path to the downloaded file, or None if the download failed.
+        """
+        return await asyncio.to_thread(self.download_data, source_id, credentials)
+
+    async def alist_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        List sources in a parent container without blocking the event loop.
+
+        Args:
+            parent_id: The ID of the parent container to list sources from.
+            credentials: The credentials to use for authentication.
+
+        Returns:
+            A list of source metadata.
+        """
+        return await asyncio.to_thread(self.list_sources, parent_id, credentials)
+
+    async def adownload_many(self, source_ids: List[str], credentials: Dict[str, Any]) -> List[Optional[str]]:
+        """
+        Download several sources concurrently on the running event loop.
+
+        Args:
+            source_ids: The IDs of the sources to download.
+            credentials: The credentials to use for authentication.
+
+        Returns:
+            The downloaded file paths, in the same order as source_ids
+            (None for each download that failed).
+        """
+        return list(await asyncio.gather(
+            *(self.adownload_data(source_id, credentials) for source_id in source_ids)
+        ))
+
+    @staticmethod
+    def _create_temp_file(suffix: str = "") -> str:
+        """Create an empty temporary file and return its path."""
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        return temp_path
+
+    @staticmethod
+    @contextmanager
+    def _text_writer(out: BinaryIO) -> Iterator[TextIO]:
+        """Wrap a binary stream for UTF-8 text writes, leaving the stream open afterwards."""
+        writer = io.TextIOWrapper(out, encoding='utf-8')
+        try:
+            yield writer
+        finally:
+            writer.flush()
+            writer.detach()
+
+    @staticmethod
+    def _write_json_array(rows: Iterable[Any], f: TextIO) -> None:
+        """Write rows to f as a JSON array one row at a time, without building the full list."""
+        f.write('[')
+        for position, row in enumerate(rows):
+            f.write(',\n' if position else '\n')
+            json.dump(row, f)
+        f.write('\n]')
+
 
 class AzureConnector(BaseConnector):
     """Connector for Azure Blob Storage."""
 
+    _provider = "azure"
+
     def __init__(self):
         """Initialize the Azure connector."""
         super().__init__()
 
+    @staticmethod
+    def _parse_source_id(source_id: str) -> Optional[Tuple[str, str]]:
+        """Split an Azure source ID of the form "container/blob_name"."""
+        match = _AZURE_ID_RE.match(source_id)
+        if not match:
+            logger.error(f"Invalid Azure source ID format: {source_id}")
+            return None
+        return match.group(1), match.group(2)
+
+    @staticmethod
+    def _blob_entry(container_name: str, blob: Any) -> Dict[str, Any]:
+        """Build the metadata entry for a blob."""
+        return {
+            "id": f"{container_name}/{blob.name}",
+            "name": blob.name,
+            "size": blob.size,
+            "last_modified": blob.last_modified
+        }
+
+    @staticmethod
+    def _container_entry(container: Any) -> Dict[str, Any]:
+        """Build the metadata entry for a container."""
+        return {
+            "id": container.name,
+            "name": container.name,
+            "type": "container"
+        }
+
     def download_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
         """
         Download data from Azure Blob Storage.
@@ -115,43 +429,150 @@ class AzureConnector(BaseConnector):
         Returns:
             The path to the downloaded file, or None if the download failed.
         """
+        return self._download_to_temp_file(source_id, credentials, f"_{os.path.basename(source_id)}")
+
+    def _transfer(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """Download the blob "container/blob_name" into out."""
         try:
             azure = import_optional("azure.storage.blob")
             if azure is None:
                 logger.error("azure-storage-blob module not available")
-                return None
+                return False
 
             if 'connection_string' not in credentials:
                 logger.error("Azure connection string is required")
-                return None
+                return False
 
             connection_string = credentials['connection_string']
 
             # Parse the source_id
-            parts = source_id.split('/', 1)
-            if len(parts) != 2:
-                logger.error(f"Invalid Azure source ID format: {source_id}")
-                return None
-
-            container_name, blob_name = parts
+            parsed = self._parse_source_id(source_id)
+            if parsed is None:
+                return False
 
-            # Create a temporary file
-            file_name = os.path.basename(blob_name)
-            fd, temp_path = tempfile.mkstemp(suffix=f"_{file_name}")
-            os.close(fd)
+            container_name, blob_name = parsed
 
             # Download the blob
             blob_service_client = azure.BlobServiceClient.from_connection_string(connection_string)
             container_client = blob_service_client.get_container_client(container_name)
             blob_client = container_client.get_blob_client(blob_name)
 
-            with open(temp_path, "wb") as f:
-                f.write(blob_client.download_blob().readall())
+            # Parallel range GETs write out of order, so the SDK needs a seekable target
+            concurrency = AZURE_MAX_CONCURRENCY if out.seekable() else 1
+            downloader = blob_client.download_blob(max_concurrency=concurrency)
+            downloader.readinto(out)
 
-            return temp_path
+            return True
         except Exception as e:
             logger.error(f"Azure download failed: {str(e)}")
-            return None
+            return False
+
+    def download_bundle(self, source_ids: List[str],
+                        credentials: Dict[str, Any]) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Stream several blobs straight into a single uncompressed tar file.
+
+        Args:
+            source_ids: The IDs of the blobs to download, each in format "container/blob_name".
+            credentials: The credentials to use for authentication.
+                Must contain 'connection_string' key.
+
+        Returns:
+            A tuple of the tar file path and a manifest with one entry per blob
+            ("id", "member" and "size", or "error" if that blob could not be
+            fetched), or None if the bundle could not be created.
+        """
+        temp_path = None
+        with self._download_slot():
+            try:
+                azure = import_optional("azure.storage.blob")
+                if azure is None:
+                    logger.error("azure-storage-blob module not available")
+                    return None
+
+                if 'connection_string' not in credentials:
+                    logger.error("Azure connection string is required")
+                    return None
+
+                blob_service_client = azure.BlobServiceClient.from_connection_string(credentials['connection_string'])
+
+                temp_path = self._create_temp_file('_azure.tar')
+                manifest = []
+                with tarfile.open(temp_path, 'w|', bufsize=BUNDLE_BUFSIZE) as tar:
+                    for position, source_id in enumerate(source_ids):
+                        parsed = self._parse_source_id(source_id)
+                        if parsed is None:
+                            manifest.append({"id": source_id, "error": "invalid source ID"})
+                            continue
+
+                        container_name, blob_name = parsed
+                        try:
+                            blob_client = blob_service_client.get_blob_client(container_name, blob_name)
+                            downloader = blob_client.download_blob()
+                        except Exception as e:
+                            logger.error(f"Azure download failed for {source_id}: {str(e)}")
+                            manifest.append({"id": source_id, "error": str(e)})
+                            continue
+
+                        # Once the header is written the member must be completed, so
+                        # errors while streaming the body abort the whole bundle
+                        info = tarfile.TarInfo(self._bundle_member_name(position, blob_name))
+                        info.size = downloader.size
+                        tar.addfile(info, downloader)
+                        manifest.append({"id": source_id, "member": info.name, "size": info.size})
+
+                return temp_path, manifest
+            except Exception as e:
+                logger.error(f"Azure bundle download failed: {str(e)}")
+                if temp_path and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                return None
+
+    async def adownload_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
+        """
+        Download data from Azure Blob Storage using the async SDK client.
+
+        Args:
+            source_id: The ID of the blob to download in format "container/blob_name".
+            credentials: The credentials to use for authentication.
+                Must contain 'connection_string' key.
+
+        Returns:
+            The path to the downloaded file, or None if the download failed.
+        """
+        async with self._async_download_slot():
+            temp_path = None
+            try:
+                azure_aio = import_optional("azure.storage.blob.aio")
+                if azure_aio is None:
+                    logger.error("azure-storage-blob async client not available")
+                    return None
+
+                if 'connection_string' not in credentials:
+                    logger.error("Azure connection string is required")
+                    return None
+
+                parsed = self._parse_source_id(source_id)
+                if parsed is None:
+                    return None
+
+                container_name, blob_name = parsed
+                temp_path = self._create_temp_file(f"_{os.path.basename(blob_name)}")
+
+                async with azure_aio.BlobServiceClient.from_connection_string(
+                    credentials['connection_string']
+                ) as blob_service_client:
+                    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
+                    stream = await blob_client.download_blob(max_concurrency=AZURE_MAX_CONCURRENCY)
+                    with open(temp_path, "wb") as f:
+                        await stream.readinto(f)
+
+                return temp_path
+            except Exception as e:
+                logger.error(f"Azure async download failed: {str(e)}")
+                if temp_path and os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                return None
 
     def list_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -183,43 +604,93 @@ class AzureConnector(BaseConnector):
             if parent_id:
                 # List blobs in the specified container
                 container_client = blob_service_client.get_container_client(parent_id)
-                blobs = container_client.list_blobs()
-
-                result = []
-                for blob in blobs:
-                    result.append({
-                        "id": f"{parent_id}/{blob.name}",
-                        "name": blob.name,
-                        "size": blob.size,
-                        "last_modified": blob.last_modified
-                    })
-
-                return result
+                return [self._blob_entry(parent_id, blob) for blob in container_client.list_blobs()]
             else:
                 # List all containers
-                containers = blob_service_client.list_containers()
+                return [self._container_entry(container) for container in blob_service_client.list_containers()]
+        except Exception as e:
+            logger.error(f"Azure list blobs failed: {str(e)}")
+            return []
 
-                result = []
-                for container in containers:
-                    result.append({
-                        "id": container.name,
-                        "name": container.name,
-                        "type": "container"
-                    })
+    async def alist_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        List blobs in an Azure container using the async SDK client.
 
-                return result
+        Args:
+            parent_id: The name of the container to list blobs from.
+            credentials: The credentials to use for authentication.
+                Must contain 'connection_string' key.
+
+        Returns:
+            A list of blob metadata.
+        """
+        try:
+            azure_aio = import_optional("azure.storage.blob.aio")
+            if azure_aio is None:
+                logger.error("azure-storage-blob async client not available")
+                return []
+
+            if 'connection_string' not in credentials:
+                logger.error("Azure connection string is required")
+                return []
+
+            async with azure_aio.BlobServiceClient.from_connection_string(
+                credentials['connection_string']
+            ) as blob_service_client:
+                if parent_id:
+                    container_client = blob_service_client.get_container_client(parent_id)
+                    return [self._blob_entry(parent_id, blob) async for blob in container_client.list_blobs()]
+                else:
+                    return [self._container_entry(container) async for container in blob_service_client.list_containers()]
         except Exception as e:
-            logger.error(f"Azure list blobs failed: {str(e)}")
+            logger.error(f"Azure async list blobs failed: {str(e)}")
             return []
 
 
 class CouchbaseConnector(BaseConnector):
     """Connector for Couchbase."""
 
+    _provider = "couchbase"
+
+    # SDK classes, resolved once by _ensure_cb()
+    _Cluster = None
+    _ClusterOptions = None
+    _PasswordAuthenticator = None
+
     def __init__(self):
         """Initialize the Couchbase connector."""
         super().__init__()
 
+    @classmethod
+    def _ensure_cb(cls) -> None:
+        """Resolve the Couchbase SDK classes on first use; raise RuntimeError if the SDK is missing."""
+        if cls._Cluster is not None:
+            return
+
+        if import_optional("couchbase") is None:
+            raise RuntimeError("couchbase module not available")
+
+        from couchbase.cluster import Cluster, ClusterOptions
+        from couchbase.auth import PasswordAuthenticator
+
+        cls._ClusterOptions = ClusterOptions
+        cls._PasswordAuthenticator = PasswordAuthenticator
+        cls._Cluster = Cluster
+
+    @staticmethod
+    def _get_scopes(cluster: Any, connection_string: str, username: str, bucket_name: str) -> Dict[str, Any]:
+        """
+        Get the scopes of a bucket keyed by name.
+
+        Results are cached for COUCHBASE_SCOPE_CACHE_TTL seconds per cluster, user and bucket.
+        """
+        cache_key = (connection_string, username, bucket_name)
+        scopes = _couchbase_scope_cache.get(cache_key)
+        if scopes is None:
+            scopes = {scope.name: scope for scope in cluster.bucket(bucket_name).collections().get_all_scopes()}
+            _couchbase_scope_cache.set(cache_key, scopes)
+        return scopes
+
     def download_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
         """
         Download data from Couchbase.
@@ -232,44 +703,32 @@ class CouchbaseConnector(BaseConnector):
         Returns:
             The path to the downloaded file, or None if the download failed.
         """
+        return self._download_to_temp_file(source_id, credentials, '_couchbase.json')
+
+    def _transfer(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """Write the document or query result for source_id to out as a JSON array."""
         try:
-            couchbase = import_optional("couchbase")
-            if couchbase is None:
-                logger.error("couchbase module not available")
-                return None
+            self._ensure_cb()
 
             if not all(k in credentials for k in ['connection_string', 'username', 'password']):
                 logger.error("Couchbase credentials must contain connection_string, username, and password")
-                return None
+                return False
 
             connection_string = credentials['connection_string']
             username = credentials['username']
             password = credentials['password']
 
             # Parse the source_id
-            parts = source_id.split(':', 1)
-            if len(parts) != 2:
+            match = _CB_ID_RE.match(source_id)
+            if not match:
                 logger.error(f"Invalid Couchbase source ID format: {source_id}")
-                return None
+                return False
 
-            collection_path, document_id_or_query = parts
-            collection_parts = collection_path.split('.')
-            if len(collection_parts) != 3:
-                logger.error(f"Invalid Couchbase collection path format: {collection_path}")
-                return None
-
-            bucket_name, scope_name, collection_name = collection_parts
-
-            # Create a temporary file
-            fd, temp_path = tempfile.mkstemp(suffix='_couchbase.json')
-            os.close(fd)
+            bucket_name, scope_name, collection_name, document_id_or_query = match.groups()
 
             # Connect to Couchbase
-            from couchbase.cluster import Cluster, ClusterOptions
-            from couchbase.auth import PasswordAuthenticator
-
-            auth = PasswordAuthenticator(username, password)
-            cluster = Cluster(connection_string, ClusterOptions(auth))
+            auth = self._PasswordAuthenticator(username, password)
+            cluster = self._Cluster(connection_string, self._ClusterOptions(auth))
 
             # Get the bucket, scope, and collection
             bucket = cluster.bucket(bucket_name)
@@ -278,22 +737,20 @@ class CouchbaseConnector(BaseConnector):
 
             # Check if it's a document ID or a query
             if document_id_or_query.startswith("SELECT "):
-                # It's a query
-                query_result = cluster.query(document_id_or_query)
-                result = list(query_result)
+                # It's a query; rows are fetched lazily as they are written
+                rows = cluster.query(document_id_or_query)
             else:
                 # It's a document ID
-                result = collection.get(document_id_or_query).content_as
-                result = [result]  # Make it a list for consistent handling
+                rows = [collection.get(document_id_or_query).content_as]
 
-            # Write to file
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2)
+            # Write to the stream
+            with self._text_writer(out) as f:
+                self._write_json_array(rows, f)
 
-            return temp_path
+            return True
         except Exception as e:
             logger.error(f"Couchbase download failed: {str(e)}")
-            return None
+            return False
 
     def list_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -308,10 +765,7 @@ class CouchbaseConnector(BaseConnector):
             A list of source metadata.
         """
         try:
-            couchbase = import_optional("couchbase")
-            if couchbase is None:
-                logger.error("couchbase module not available")
-                return []
+            self._ensure_cb()
 
             if not all(k in credentials for k in ['connection_string', 'username', 'password']):
                 logger.error("Couchbase credentials must contain connection_string, username, and password")
@@ -322,11 +776,8 @@ class CouchbaseConnector(BaseConnector):
             password = credentials['password']
 
             # Connect to Couchbase
-            from couchbase.cluster import Cluster, ClusterOptions
-            from couchbase.auth import PasswordAuthenticator
-
-            auth = PasswordAuthenticator(username, password)
-            cluster = Cluster(connection_string, ClusterOptions(auth))
+            auth = self._PasswordAuthenticator(username, password)
+            cluster = self._Cluster(connection_string, self._ClusterOptions(auth))
 
             if not parent_id:
                 # List buckets
@@ -343,11 +794,10 @@ class CouchbaseConnector(BaseConnector):
                 return result
             elif '.' not in parent_id:
                 # List scopes in a bucket
-                bucket = cluster.bucket(parent_id)
-                scopes = bucket.collections().get_all_scopes()
+                scopes = self._get_scopes(cluster, connection_string, username, parent_id)
 
                 result = []
-                for scope in scopes:
+                for scope in scopes.values():
                     result.append({
                         "id": f"{parent_id}.{scope.name}",
                         "name": scope.name,
@@ -358,18 +808,17 @@ class CouchbaseConnector(BaseConnector):
             elif parent_id.count('.') == 1:
                 # List collections in a scope
                 bucket_name, scope_name = parent_id.split('.')
-                bucket = cluster.bucket(bucket_name)
-                scopes = bucket.collections().get_all_scopes()
+                scope = self._get_scopes(cluster, connection_string, username, bucket_name).get(scope_name)
+                if scope is None:
+                    return []
 
                 result = []
-                for scope in scopes:
-                    if scope.name == scope_name:
-                        for collection in scope.collections:
-                            result.append({
-                                "id": f"{parent_id}.{collection.name}",
-                                "name": collection.name,
-                                "type": "collection"
-                            })
+                for collection in scope.collections:
+                    result.append({
+                        "id": f"{parent_id}.{collection.name}",
+                        "name": collection.name,
+                        "type": "collection"
+                    })
 
                 return result
             else:
@@ -397,10 +846,75 @@ class CouchbaseConnector(BaseConnector):
 class ElasticsearchConnector(BaseConnector):
     """Connector for Elasticsearch."""
 
+    _provider = "elasticsearch"
+
     def __init__(self):
         """Initialize the Elasticsearch connector."""
         super().__init__()
 
+    @staticmethod
+    def _client_args(credentials: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Elasticsearch client keyword arguments from credentials."""
+        es_args = {
+            "hosts": credentials['hosts'],
+            # Compressed transport and bounded, retried requests
+            "http_compress": True,
+            "request_timeout": ES_REQUEST_TIMEOUT,
+            "retry_on_timeout": True,
+            "max_retries": ES_MAX_RETRIES
+        }
+        username = credentials.get('username')
+        password = credentials.get('password')
+        if username and password:
+            es_args["basic_auth"] = (username, password)
+        return es_args
+
+    @staticmethod
+    def _parse_source_id(source_id: str) -> Optional[Tuple[str, str]]:
+        """Split an Elasticsearch source ID of the form "index:document_id" or "index:query"."""
+        match = _ES_ID_RE.match(source_id)
+        if not match:
+            logger.error(f"Invalid Elasticsearch source ID format: {source_id}")
+            return None
+        return match.group(1), match.group(2)
+
+    @staticmethod
+    def _write_documents(documents: List[Dict[str, Any]]) -> str:
+        """Write fetched documents to a temporary JSON file and return its path."""
+        temp_path = BaseConnector._create_temp_file('_elasticsearch.json')
+        with open(temp_path, 'wb') as f:
+            ElasticsearchConnector._dump_documents(documents, f)
+        return temp_path
+
+    @staticmethod
+    def _dump_documents(documents: List[Dict[str, Any]], out: BinaryIO) -> None:
+        """Write fetched documents to a binary stream as a JSON array."""
+        with BaseConnector._text_writer(out) as f:
+            json.dump(documents, f, indent=2)
+
+    @staticmethod
+    def _index_entry(index_name: str) -> Dict[str, Any]:
+        """Build the metadata entry for an index."""
+        return {
+            "id": index_name,
+            "name": index_name,
+            "type": "index"
+        }
+
+    @staticmethod
+    def _hit_entries(parent_id: str, search_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Build the metadata entries for the hits of a search."""
+        result = []
+        for hit in search_result.get('hits', {}).get('hits', []):
+            doc_id = hit.get('_id')
+            result.append({
+                "id": f"{parent_id}:{doc_id}",
+                "name": doc_id,
+                "type": "document",
+                "score": hit.get('_score')
+            })
+        return result
+
     def download_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
         """
         Download data from Elasticsearch.
@@ -413,38 +927,29 @@ class ElasticsearchConnector(BaseConnector):
         Returns:
             The path to the downloaded file, or None if the download failed.
         """
+        return self._download_to_temp_file(source_id, credentials, '_elasticsearch.json')
+
+    def _transfer(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """Write the document or search hits for source_id to out as a JSON array."""
         try:
             elasticsearch = import_optional("elasticsearch")
             if elasticsearch is None:
                 logger.error("elasticsearch module not available")
-                return None
+                return False
 
             if 'hosts' not in credentials:
                 logger.error("Elasticsearch hosts is required")
-                return None
-
-            hosts = credentials['hosts']
-            username = credentials.get('username')
-            password = credentials.get('password')
+                return False
 
             # Parse the source_id
-            parts = source_id.split(':', 1)
-            if len(parts) != 2:
-                logger.error(f"Invalid Elasticsearch source ID format: {source_id}")
-                return None
-
-            index_name, document_id_or_query = parts
+            parsed = self._parse_source_id(source_id)
+            if parsed is None:
+                return False
 
-            # Create a temporary file
-            fd, temp_path = tempfile.mkstemp(suffix='_elasticsearch.json')
-            os.close(fd)
+            index_name, document_id_or_query = parsed
 
             # Connect to Elasticsearch
-            es_args = {"hosts": hosts}
-            if username and password:
-                es_args["basic_auth"] = (username, password)
-
-            es = elasticsearch.Elasticsearch(**es_args)
+            es = elasticsearch.Elasticsearch(**self._client_args(credentials))
 
             # Check if it's a document ID or a query
             if document_id_or_query.startswith("{"):
@@ -457,14 +962,129 @@ class ElasticsearchConnector(BaseConnector):
                 result = es.get(index=index_name, id=document_id_or_query)
                 documents = [result]
 
-            # Write to file
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(documents, f, indent=2)
-
-            return temp_path
+            # Write to the stream
+            self._dump_documents(documents, out)
+            return True
         except Exception as e:
             logger.error(f"Elasticsearch download failed: {str(e)}")
-            return None
+            return False
+
+    def download_many(self, source_ids: List[str], credentials: Dict[str, Any]) -> List[Optional[str]]:
+        """
+        Download several documents from Elasticsearch with batched _mget requests.
+
+        Document IDs are grouped by index and fetched ES_MGET_BATCH_SIZE at a
+        time; query source IDs are run as individual searches.
+
+        Args:
+            source_ids: The IDs to download, each in format "index:document_id" or "index:query".
+            credentials: The credentials to use for authentication.
+                Must contain 'hosts' key and optionally 'username' and 'password' keys.
+
+        Returns:
+            The downloaded file paths, in the same order as source_ids (None for
+            each download that failed).
+        """
+        documents: List[Optional[List[Dict[str, Any]]]] = [None] * len(source_ids)
+        with self._download_slot():
+            try:
+                elasticsearch = import_optional("elasticsearch")
+                if elasticsearch is None:
+                    logger.error("elasticsearch module not available")
+                    return documents
+
+                if 'hosts' not in credentials:
+                    logger.error("Elasticsearch hosts is required")
+                    return documents
+
+                es = elasticsearch.Elasticsearch(**self._client_args(credentials))
+
+                # Group document IDs by index, keeping their position in source_ids
+                groups: Dict[str, List[Tuple[int, str]]] = {}
+                for position, source_id in enumerate(source_ids):
+                    parsed = self._parse_source_id(source_id)
+                    if parsed is None:
+                        continue
+
+                    index_name, document_id_or_query = parsed
+                    if document_id_or_query.startswith("{"):
+                        # A bad query only fails its own source ID
+                        try:
+                            query = json.loads(document_id_or_query)
+                            result = es.search(index=index_name, body=query)
+                            documents[position] = result.get('hits', {}).get('hits', [])
+                        except Exception as e:
+                            logger.error(f"Elasticsearch search failed for {source_id}: {str(e)}")
+                    else:
+                        groups.setdefault(index_name, []).append((position, document_id_or_query))
+
+                for index_name, entries in groups.items():
+                    for start in range(0, len(entries), ES_MGET_BATCH_SIZE):
+                        batch = entries[start:start + ES_MGET_BATCH_SIZE]
+                        try:
+                            result = es.mget(index=index_name, body={"ids": [doc_id for _, doc_id in batch]})
+                        except Exception as e:
+                            logger.error(f"Elasticsearch mget failed for index {index_name}: {str(e)}")
+                            continue
+                        for (position, doc_id), document in zip(batch, result.get('docs', [])):
+                            if document.get('found'):
+                                documents[position] = [document]
+                            else:
+                                logger.error(f"Elasticsearch document not found: {index_name}:{doc_id}")
+            except Exception as e:
+                logger.error(f"Elasticsearch batch download failed: {str(e)}")
+
+            try:
+                return [self._write_documents(batch) if batch is not None else None for batch in documents]
+            except Exception as e:
+                logger.error(f"Elasticsearch batch download failed: {str(e)}")
+                return [None] * len(source_ids)
+
+    async def adownload_data(self, source_id: str, credentials: Dict[str, Any]) -> Optional[str]:
+        """
+        Download data from Elasticsearch using the async client.
+
+        Args:
+            source_id: The ID of the index and document to download in format "index:document_id" or "index:query".
+            credentials: The credentials to use for authentication.
+                Must contain 'hosts' key and optionally 'username' and 'password' keys.
+
+        Returns:
+            The path to the downloaded file, or None if the download failed.
+        """
+        async with self._async_download_slot():
+            try:
+                elasticsearch = import_optional("elasticsearch")
+                if elasticsearch is None:
+                    logger.error("elasticsearch module not available")
+                    return None
+
+                if 'hosts' not in credentials:
+                    logger.error("Elasticsearch hosts is required")
+                    return None
+
+                parsed = self._parse_source_id(source_id)
+                if parsed is None:
+                    return None
+
+                index_name, document_id_or_query = parsed
+
+                es = elasticsearch.AsyncElasticsearch(**self._client_args(credentials))
+                try:
+                    if document_id_or_query.startswith("{"):
+                        query = json.loads(document_id_or_query)
+                        result = await es.search(index=index_name, body=query)
+                        documents = result.get('hits', {}).get('hits', [])
+                    else:
+                        result = await es.get(index=index_name, id=document_id_or_query)
+                        documents = [result]
+                finally:
+                    await es.close()
+
+                return self._write_documents(documents)
+            except Exception as e:
+                logger.error(f"Elasticsearch async download failed: {str(e)}")
+                return None
 
     def list_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -488,48 +1108,57 @@ class ElasticsearchConnector(BaseConnector):
                 logger.error("Elasticsearch hosts is required")
                 return []
 
-            hosts = credentials['hosts']
-            username = credentials.get('username')
-            password = credentials.get('password')
-
             # Connect to Elasticsearch
-            es_args = {"hosts": hosts}
-            if username and password:
-                es_args["basic_auth"] = (username, password)
-
-            es = elasticsearch.Elasticsearch(**es_args)
+            es = elasticsearch.Elasticsearch(**self._client_args(credentials))
 
             if not parent_id:
                 # List indices
                 indices = es.indices.get_alias(index="*")
-
-                result = []
-                for index_name in indices:
-                    result.append({
-                        "id": index_name,
-                        "name": index_name,
-                        "type": "index"
-                    })
-
-                return result
+                return [self._index_entry(index_name) for index_name in indices]
             else:
                 # List documents in the index (limited to first 100)
                 query = {"query": {"match_all": {}}, "size": 100}
                 search_result = es.search(index=parent_id, body=query)
+                return self._hit_entries(parent_id, search_result)
+        except Exception as e:
+            logger.error(f"Elasticsearch list sources failed: {str(e)}")
+            return []
 
-                result = []
-                for hit in search_result.get('hits', {}).get('hits', []):
-                    doc_id = hit.get('_id')
-                    result.append({
-                        "id": f"{parent_id}:{doc_id}",
-                        "name": doc_id,
-                        "type": "document",
-                        "score": hit.get('_score')
-                    })
+    async def alist_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        List indices or documents in Elasticsearch using the async client.
 
-                return result
+        Args:
+            parent_id: The name of the index to list documents from.
+            credentials: The credentials to use for authentication.
+                Must contain 'hosts' key and optionally 'username' and 'password' keys.
+
+        Returns:
+            A list of index or document metadata.
+        """
+        try:
+            elasticsearch = import_optional("elasticsearch")
+            if elasticsearch is None:
+                logger.error("elasticsearch module not available")
+                return []
+
+            if 'hosts' not in credentials:
+                logger.error("Elasticsearch hosts is required")
+                return []
+
+            es = elasticsearch.AsyncElasticsearch(**self._client_args(credentials))
+            try:
+                if not parent_id:
+                    indices = await es.indices.get_alias(index="*")
+                    return [self._index_entry(index_name) for index_name in indices]
+                else:
+                    query = {"query": {"match_all": {}}, "size": 100}
+                    search_result = await es.search(index=parent_id, body=query)
+                    return self._hit_entries(parent_id, search_result)
+            finally:
+                await es.close()
         except Exception as e:
-            logger.error(f"Elasticsearch list sources failed: {str(e)}")
+            logger.error(f"Elasticsearch async list sources failed: {str(e)}")
             return []
 
 
@@ -562,6 +1191,8 @@ def get_connector(provider: str) -> Optional[BaseConnector]:
 class BoxConnector(BaseConnector):
     """Connector for Box."""
 
+    _provider = "box"
+
     def __init__(self):
         """Initialize the Box connector."""
         super().__init__()
@@ -578,24 +1209,24 @@ class BoxConnector(BaseConnector):
         Returns:
             The path to the downloaded file, or None if the download failed.
         """
+        return self._download_to_temp_file(source_id, credentials)
+
+    def _transfer(self, source_id: str, credentials: Dict[str, Any], out: BinaryIO) -> bool:
+        """Download the Box file source_id into out."""
         try:
             boxsdk = import_optional("boxsdk")
             if boxsdk is None:
                 logger.error("boxsdk module not available")
-                return None
+                return False
 
             if not all(k in credentials for k in ['client_id', 'client_secret', 'access_token']):
                 logger.error("Box credentials must contain client_id, client_secret, and access_token")
-                return None
+                return False
 
             client_id = credentials['client_id']
             client_secret = credentials['client_secret']
             access_token = credentials['access_token']
 
-            # Create a temporary file
-            fd, temp_path = tempfile.mkstemp()
-            os.close(fd)
-
             # Connect to Box
             oauth = boxsdk.OAuth2(
                 client_id=client_id,
@@ -606,13 +1237,12 @@ class BoxConnector(BaseConnector):
 
             # Download the file
             file_obj = client.file(source_id).get()
-            with open(temp_path, 'wb') as f:
-                file_obj.download_to(f)
+            file_obj.download_to(out)
 
-            return temp_path
+            return True
         except Exception as e:
             logger.error(f"Box download failed: {str(e)}")
-            return None
+            return False
 
     def list_sources(self, parent_id: Optional[str], credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -651,8 +1281,8 @@ class BoxConnector(BaseConnector):
             # Use root folder if not specified
             folder_id = parent_id or '0'
 
-            # List items
-            items = client.folder(folder_id).get_items()
+            # List items, requesting only the fields used below and the largest page size
+            items = client.folder(folder_id).get_items(limit=BOX_ITEMS_PAGE_SIZE, fields=BOX_ITEM_FIELDS)
 
             result = []
             for item in items:
@@ -5,14 +5,45 @@ This module provides integration with OpenAI models.
 """
 
 import os
+import atexit
+import asyncio
 import logging
 import json
-import base64
-from typing import Optional, Dict, Any, List, Union
+import random
+import ssl
+import string
+import time
+import threading
+import weakref
+from typing import Optional, Dict, Any, List, Tuple, Union
 from io import BytesIO
 from pathlib import Path
 import tempfile
-import requests
+import aiohttp
+
+try:
+    from performance import MemoryCache, cache_key
+except ImportError:
+    from src.performance import MemoryCache, cache_key
+
+# SIMD base64 when available; the stdlib encoder produces identical output
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+# orjson serializes and parses several times faster than the json module,
+# which matters for multi-megabyte image payloads
+try:
+    import orjson
+    
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+    
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
 
 # Set up logging
 logger = logging.getLogger("claryai.openai_integration")
@@ -21,55 +52,237 @@ logger = logging.getLogger("claryai.openai_integration")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 DEFAULT_MODEL = "gpt-4o"
 MAX_TOKENS = 1024
+CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+EMBEDDING_MODEL = "text-embedding-3-small"
+FILES_URL = "https://api.openai.com/v1/files"
+BATCHES_URL = "https://api.openai.com/v1/batches"
 
-# Prompt templates
-PROMPT_TEMPLATES = {
-    "document_analysis": """
-You are an AI assistant that analyzes documents. Please analyze the following document content:
+# Concurrent requests per analyze_documents call
+MAX_INFLIGHT_REQUESTS = 64
+# Batch API runs (use_batch=True) cost half as much but finish asynchronously.
+# Status is polled with exponential backoff between these bounds, giving up
+# (and cancelling the batch) after BATCH_MAX_WAIT seconds
+BATCH_POLL_INITIAL = 1.0
+BATCH_POLL_MAX = 60.0
+BATCH_MAX_WAIT = float(os.getenv("OPENAI_BATCH_MAX_WAIT", "600"))
 
-{document_content}
+# Rate limits, server errors and connection failures are retried with jittered exponential backoff
+MAX_RETRIES = 5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_MAX_DELAY = 30.0
+
+# Analyses of documents already seen are reused, keyed on a fingerprint of the content
+ANALYSIS_CACHE_SIZE = 1024
+ANALYSIS_CACHE_TTL = 3600
+_analysis_cache = MemoryCache(max_size=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+
+# Resolved addresses of api.openai.com are reused for this many seconds
+DNS_CACHE_TTL = 600
+
+JPEG_DATA_URL_PREFIX = b"data:image/jpeg;base64,"
+# Images that are not JPEG, or JPEGs above this size, are re-encoded before upload
+JPEG_RECOMPRESS_THRESHOLD = 512 * 1024
+JPEG_QUALITY = 85
+
+# aiohttp sessions are bound to the event loop that created them, so one
+# keep-alive session is kept per loop and shared by every request on it
+_SESSIONS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+# Event loop thread that runs the coroutines behind the synchronous API
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+# One TLS context for every session, so its session cache lets new connections resume TLS sessions
+_SSL_CONTEXT = ssl.create_default_context()
+
+
+def _compress_image(image_data: bytes) -> bytes:
+    """
+    Re-encode an image as JPEG so the upload is small and matches the data URL type.
+    
+    Small JPEGs are returned untouched; if Pillow is unavailable or the image
+    cannot be decoded, the original bytes are sent as before.
+    """
+    is_jpeg = image_data[:3] == b"\xff\xd8\xff"
+    if is_jpeg and len(image_data) <= JPEG_RECOMPRESS_THRESHOLD:
+        return image_data
+    
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_data
+    
+    try:
+        with Image.open(BytesIO(image_data)) as img:
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            out = BytesIO()
+            img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    except Exception as e:
+        logger.warning(f"Could not re-encode image as JPEG: {str(e)}")
+        return image_data
+    
+    compressed = out.getvalue()
+    if is_jpeg and len(compressed) >= len(image_data):
+        return image_data
+    return compressed
+
+
+def _image_data_url(image_data: bytes) -> str:
+    """Build a JPEG data URL, encoding straight into one buffer behind the prefix."""
+    buf = bytearray(JPEG_DATA_URL_PREFIX)
+    buf += b64encode(image_data)
+    return buf.decode("ascii")
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    session = _SESSIONS.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=256, use_dns_cache=True, ttl_dns_cache=DNS_CACHE_TTL,
+                                           keepalive_timeout=75, ssl=_SSL_CONTEXT),
+            json_serialize=_json_dumps
+        )
+        _SESSIONS[loop] = session
+    return session
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before the next attempt, honoring a Retry-After header in seconds."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.random(), RETRY_MAX_DELAY)
+
+
+async def _post_with_retry(url: str, **kwargs) -> aiohttp.ClientResponse:
+    """
+    POST over the shared session, retrying rate limits and transient failures.
+    
+    The body must be re-sendable (json= or bytes data=); single-use bodies such
+    as aiohttp.FormData are passed as a callable data= that builds a fresh one
+    for each attempt. The final response is returned whatever its status, for
+    use as an async context manager.
+    """
+    data = kwargs.pop("data", None)
+    for attempt in range(MAX_RETRIES + 1):
+        if data is not None:
+            kwargs["data"] = data() if callable(data) else data
+        try:
+            response = await _get_session().post(url, **kwargs)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"OpenAI request failed ({str(e)}), retrying in {delay:.1f}s")
+        else:
+            if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+            response.release()
+            logger.warning(f"OpenAI API returned status code {response.status}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session of the running event loop, if there is one."""
+    session = _SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _close_sync_session() -> None:
+    """Close the session owned by the background event loop at interpreter exit."""
+    if _sync_loop is not None and _sync_loop.is_running():
+        asyncio.run_coroutine_threadsafe(close_session(), _sync_loop).result(timeout=5)
+
+
+def _run_sync(coro):
+    """
+    Run a coroutine on the shared background event loop and wait for its result.
+
+    Unlike asyncio.run this works when the caller is itself inside a running
+    loop, and it keeps one session (and its open connections) across calls.
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="openai-integration", daemon=True).start()
+            atexit.register(_close_sync_session)
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
+
+# Prompt templates, split into static instructions and the dynamic request.
+# The instructions are sent first as the system message, so every call with the
+# same template starts with a byte-identical prefix that OpenAI's server-side
+# prompt cache can reuse; only the user message varies between calls.
+STATIC_INSTRUCTIONS = {
+    "document_analysis": """You are an AI assistant that analyzes documents. Please analyze the document content provided by the user.
 
 Provide a detailed analysis including:
 1. Key information extracted from the document
 2. Document type identification
 3. Important entities mentioned
 4. Any tables or structured data found
-5. Summary of the main points
-
-Your analysis:
-""",
-    "table_extraction": """
-You are an AI assistant that extracts and analyzes tables from documents. Please analyze the following table:
-
-{table_content}
+5. Summary of the main points""",
+    "table_extraction": """You are an AI assistant that extracts and analyzes tables from documents. Please analyze the table provided by the user.
 
 Provide a detailed analysis including:
 1. What kind of data this table contains
 2. Key insights from the table
 3. Any patterns or trends you notice
-4. Summary of the most important information
+4. Summary of the most important information""",
+    "document_qa": """You are an AI assistant that answers questions about documents. Use the document content provided by the user to answer the question that follows it.""",
+    "image_analysis": """You are an AI assistant that analyzes images. Please analyze the image provided by the user and provide a detailed description."""
+}
+
+USER_TEMPLATES = {
+    "document_analysis": """{document_content}
 
-Your analysis:
-""",
-    "document_qa": """
-You are an AI assistant that answers questions about documents. Use the following document content to answer the question.
+Your analysis:""",
+    "table_extraction": """{table_content}
 
-Document content:
+Your analysis:""",
+    "document_qa": """Document content:
 {document_content}
 
 Question: {question}
 
-Your answer:
-""",
-    "image_analysis": """
-You are an AI assistant that analyzes images. Please analyze the following image and provide a detailed description.
+Your answer:""",
+    "image_analysis": """Your analysis:"""
+}
 
-[IMAGE]
+# Single-prompt form of each template, for callers that send one user message
+PROMPT_TEMPLATES = {
+    name: f"\n{STATIC_INSTRUCTIONS[name]}\n\n{USER_TEMPLATES[name]}\n"
+    for name in STATIC_INSTRUCTIONS
+}
 
-Your analysis:
-"""
+# USER_TEMPLATES parsed once into (literal, field name) pieces so filling a
+# template is a join rather than a str.format re-parse on every call
+_COMPILED_TEMPLATES = {
+    name: tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+    for name, template in USER_TEMPLATES.items()
 }
 
+
+def _render_template(name: str, **fields: str) -> str:
+    """Fill a compiled user template with the given field values."""
+    parts = []
+    for literal, field_name in _COMPILED_TEMPLATES[name]:
+        parts.append(literal)
+        if field_name is not None:
+            parts.append(fields[field_name])
+    return "".join(parts)
+
 class OpenAIIntegration:
     """
     OpenAI integration class for ClaryAI.
@@ -96,13 +309,61 @@ class OpenAIIntegration:
         
         self.is_multimodal = "gpt-4" in model_name.lower() and ("vision" in model_name.lower() or "o" in model_name.lower())
     
-    def generate_text(self, prompt: str, max_tokens: int = MAX_TOKENS) -> str:
+    def _chat_request(self, messages: List[Dict[str, Any]], max_tokens: int) -> Dict[str, Any]:
+        """Build the body of a chat completion request."""
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.7
+        }
+    
+    async def _chat_completion(self, messages: List[Dict[str, Any]], max_tokens: int) -> str:
         """
-        Generate text based on a prompt.
+        Send a chat completion request over the shared session.
+        
+        Args:
+            messages: Chat messages to send
+            max_tokens: Maximum number of tokens to generate
+            
+        Returns:
+            Generated text, or an error message if the API call failed
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        body = _json_dumps(self._chat_request(messages, max_tokens)).encode("utf-8")
+        
+        async with await _post_with_retry(CHAT_COMPLETIONS_URL, headers=headers, data=body) as response:
+            if response.status != 200:
+                logger.error(f"OpenAI API error: {await response.text()}")
+                return f"Error: OpenAI API returned status code {response.status}"
+            
+            result = await response.json(loads=_json_loads)
+        
+        return result["choices"][0]["message"]["content"].strip()
+    
+    @staticmethod
+    def _build_messages(content: Union[str, List[Dict[str, Any]]],
+                        system_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Build the chat messages for a user message and optional system prompt."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": content})
+        return messages
+    
+    async def agenerate_text(self, prompt: str, max_tokens: int = MAX_TOKENS,
+                             system_prompt: Optional[str] = None) -> str:
+        """
+        Generate text based on a prompt without blocking the event loop.
         
         Args:
             prompt: Input prompt
             max_tokens: Maximum number of tokens to generate
+            system_prompt: Static instructions sent ahead of the prompt
             
         Returns:
             Generated text
@@ -113,45 +374,39 @@ class OpenAIIntegration:
             if not self.api_key:
                 return "Error: OpenAI API key not provided"
             
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            
-            data = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": max_tokens,
-                "temperature": 0.7
-            }
-            
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=data
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"OpenAI API error: {response.text}")
-                return f"Error: OpenAI API returned status code {response.status_code}"
-            
-            result = response.json()
-            generated_text = result["choices"][0]["message"]["content"]
+            generated_text = await self._chat_completion(self._build_messages(prompt, system_prompt), max_tokens)
             
             logger.info("Text generation completed")
-            return generated_text.strip()
+            return generated_text
         except Exception as e:
             logger.error(f"Error generating text: {str(e)}")
             return f"Error generating text: {str(e)}"
     
-    def process_image_and_text(self, image_data: bytes, prompt: str, max_tokens: int = MAX_TOKENS) -> str:
+    def generate_text(self, prompt: str, max_tokens: int = MAX_TOKENS,
+                      system_prompt: Optional[str] = None) -> str:
         """
-        Process an image and text prompt.
+        Generate text based on a prompt.
+        
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum number of tokens to generate
+            system_prompt: Static instructions sent ahead of the prompt
+            
+        Returns:
+            Generated text
+        """
+        return _run_sync(self.agenerate_text(prompt, max_tokens, system_prompt))
+    
+    async def aprocess_image_and_text(self, image_data: bytes, prompt: str, max_tokens: int = MAX_TOKENS,
+                                      system_prompt: Optional[str] = None) -> str:
+        """
+        Process an image and text prompt without blocking the event loop.
         
         Args:
             image_data: Image data as bytes
             prompt: Text prompt
             max_tokens: Maximum number of tokens to generate
+            system_prompt: Static instructions sent ahead of the prompt
             
         Returns:
             Generated text
@@ -166,53 +421,81 @@ class OpenAIIntegration:
             if not self.api_key:
                 return "Error: OpenAI API key not provided"
             
-            # Convert image to base64
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
+            image_data = await asyncio.to_thread(_compress_image, image_data)
             
-            data = {
-                "model": self.model_name,
-                "messages": [
+            messages = self._build_messages(
+                [
+                    {"type": "text", "text": prompt},
                     {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}"
-                                }
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": _image_data_url(image_data)
+                        }
                     }
                 ],
-                "max_tokens": max_tokens,
-                "temperature": 0.7
-            }
-            
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=data
+                system_prompt
             )
             
-            if response.status_code != 200:
-                logger.error(f"OpenAI API error: {response.text}")
-                return f"Error: OpenAI API returned status code {response.status_code}"
-            
-            result = response.json()
-            generated_text = result["choices"][0]["message"]["content"]
+            generated_text = await self._chat_completion(messages, max_tokens)
             
             logger.info("Multimodal processing completed")
-            return generated_text.strip()
+            return generated_text
         except Exception as e:
             logger.error(f"Error processing image and text: {str(e)}")
             return f"Error processing image and text: {str(e)}"
     
+    def process_image_and_text(self, image_data: bytes, prompt: str, max_tokens: int = MAX_TOKENS,
+                               system_prompt: Optional[str] = None) -> str:
+        """
+        Process an image and text prompt.
+        
+        Args:
+            image_data: Image data as bytes
+            prompt: Text prompt
+            max_tokens: Maximum number of tokens to generate
+            system_prompt: Static instructions sent ahead of the prompt
+            
+        Returns:
+            Generated text
+        """
+        return _run_sync(self.aprocess_image_and_text(image_data, prompt, max_tokens, system_prompt))
+    
+    async def aembed_text(self, text: str) -> List[float]:
+        """
+        Get the embedding vector of a text without blocking the event loop.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        data = {"model": EMBEDDING_MODEL, "input": text}
+        
+        async with await _post_with_retry(EMBEDDINGS_URL, headers=headers, json=data) as response:
+            response.raise_for_status()
+            result = await response.json(loads=_json_loads)
+        
+        return result["data"][0]["embedding"]
+    
+    def embed_text(self, text: str) -> List[float]:
+        """
+        Get the embedding vector of a text, e.g. as the embed function of a
+        performance.SemanticCache.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        return _run_sync(self.aembed_text(text))
+    
     def analyze_document(self, document_content: str, template: str = "document_analysis") -> str:
         """
         Analyze a document using the model.
@@ -227,14 +510,20 @@ class OpenAIIntegration:
         try:
             logger.info(f"Analyzing document using template: {template}")
             
-            # Get the prompt template
-            prompt_template = PROMPT_TEMPLATES.get(template, PROMPT_TEMPLATES["document_analysis"])
+            # Re-submitted documents are answered before building the prompt
+            fingerprint = f"doc:{self.model_name}:{template}:{cache_key(document_content)}"
+            analysis = _analysis_cache.get(fingerprint)
+            if analysis is not None:
+                logger.info("Document analysis served from cache")
+                return analysis
             
             # Format the prompt
-            prompt = prompt_template.format(document_content=document_content)
+            system_prompt, prompt = self._format_prompt(document_content, template)
             
             # Generate text
-            analysis = self.generate_text(prompt)
+            analysis = self.generate_text(prompt, system_prompt=system_prompt)
+            if not analysis.startswith("Error"):
+                _analysis_cache.set(fingerprint, analysis)
             
             logger.info("Document analysis completed")
             return analysis
@@ -242,6 +531,175 @@ class OpenAIIntegration:
             logger.error(f"Error analyzing document: {str(e)}")
             return f"Error analyzing document: {str(e)}"
     
+    @staticmethod
+    def _format_prompt(document_content: str, template: str) -> Tuple[str, str]:
+        """Fill a prompt template with the document content; returns the system and user messages."""
+        if template not in STATIC_INSTRUCTIONS:
+            template = "document_analysis"
+        user_prompt = _render_template(template, document_content=document_content,
+                                       table_content=document_content)
+        return STATIC_INSTRUCTIONS[template], user_prompt
+    
+    async def aanalyze_documents(self, documents: List[str], template: str = "document_analysis",
+                                 use_batch: bool = False,
+                                 batch_max_wait: Optional[float] = None) -> List[str]:
+        """
+        Analyze several documents concurrently.
+        
+        Up to MAX_INFLIGHT_REQUESTS analyses run at once. With use_batch the
+        documents are submitted through the OpenAI Batch API instead, falling
+        back to concurrent requests if the batch fails or does not finish
+        within batch_max_wait seconds.
+        
+        Args:
+            documents: Document contents to analyze
+            template: Prompt template to use
+            use_batch: Run the analyses as one OpenAI batch
+            batch_max_wait: Seconds to wait for the batch (default: BATCH_MAX_WAIT)
+            
+        Returns:
+            Analysis results, in the same order as documents
+        """
+        logger.info(f"Analyzing {len(documents)} documents using template: {template}")
+        
+        prompts = []
+        for document_content in documents:
+            try:
+                prompts.append(self._format_prompt(document_content, template))
+            except Exception as e:
+                logger.error(f"Error analyzing document: {str(e)}")
+                prompts.append(e)
+        
+        if use_batch and self.api_key:
+            try:
+                return await self._run_batch(prompts, max_wait=batch_max_wait)
+            except Exception as e:
+                logger.warning(f"OpenAI batch failed, falling back to concurrent requests: {str(e)}")
+        
+        semaphore = asyncio.Semaphore(MAX_INFLIGHT_REQUESTS)
+        
+        async def analyze(prompt: Union[Tuple[str, str], Exception]) -> str:
+            if isinstance(prompt, Exception):
+                return f"Error analyzing document: {str(prompt)}"
+            system_prompt, user_prompt = prompt
+            async with semaphore:
+                return await self.agenerate_text(user_prompt, system_prompt=system_prompt)
+        
+        analyses = await asyncio.gather(*(analyze(prompt) for prompt in prompts))
+        
+        logger.info("Document analysis completed")
+        return list(analyses)
+    
+    def analyze_documents(self, documents: List[str], template: str = "document_analysis",
+                          use_batch: bool = False, batch_max_wait: Optional[float] = None) -> List[str]:
+        """
+        Analyze several documents concurrently.
+        
+        Args:
+            documents: Document contents to analyze
+            template: Prompt template to use
+            use_batch: Run the analyses as one OpenAI batch
+            batch_max_wait: Seconds to wait for the batch (default: BATCH_MAX_WAIT)
+            
+        Returns:
+            Analysis results, in the same order as documents
+        """
+        return _run_sync(self.aanalyze_documents(documents, template, use_batch, batch_max_wait))
+    
+    async def _run_batch(self, prompts: List[Union[Tuple[str, str], Exception]],
+                         max_tokens: int = MAX_TOKENS, max_wait: Optional[float] = None) -> List[str]:
+        """
+        Run prompts through the OpenAI Batch API and wait for the results.
+        
+        Args:
+            prompts: (system, user) prompt pairs to run; exceptions mark prompts that could not be built
+            max_tokens: Maximum number of tokens to generate per prompt
+            max_wait: Seconds to wait before cancelling the batch (default: BATCH_MAX_WAIT)
+            
+        Returns:
+            Generated texts, in the same order as prompts
+        """
+        session = _get_session()
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        
+        # Upload the requests as a JSONL file
+        lines = []
+        for i, prompt in enumerate(prompts):
+            if isinstance(prompt, Exception):
+                continue
+            lines.append(_json_dumps({
+                "custom_id": f"request-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._chat_request(self._build_messages(prompt[1], prompt[0]), max_tokens)
+            }))
+        
+        batch_file = "\n".join(lines).encode("utf-8")
+        
+        def build_form() -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field("purpose", "batch")
+            form.add_field("file", batch_file, filename="batch.jsonl", content_type="application/jsonl")
+            return form
+        
+        async with await _post_with_retry(FILES_URL, headers=headers, data=build_form) as response:
+            response.raise_for_status()
+            input_file_id = (await response.json(loads=_json_loads))["id"]
+        
+        # Create the batch
+        batch_request = {
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        }
+        async with await _post_with_retry(BATCHES_URL, headers=headers, json=batch_request) as response:
+            response.raise_for_status()
+            batch = await response.json(loads=_json_loads)
+        logger.info(f"Submitted OpenAI batch {batch['id']} with {len(lines)} requests")
+        
+        # Poll until the batch finishes
+        delay = BATCH_POLL_INITIAL
+        deadline = time.monotonic() + (BATCH_MAX_WAIT if max_wait is None else max_wait)
+        while batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+            if time.monotonic() > deadline:
+                # Stop the batch so it is not billed for results nobody reads
+                try:
+                    async with session.post(f"{BATCHES_URL}/{batch['id']}/cancel", headers=headers):
+                        pass
+                except aiohttp.ClientError as e:
+                    logger.warning(f"Could not cancel OpenAI batch {batch['id']}: {str(e)}")
+                raise TimeoutError(f"OpenAI batch {batch['id']} did not finish in time")
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0.0)))
+            delay = min(delay * 2, BATCH_POLL_MAX)
+            async with session.get(f"{BATCHES_URL}/{batch['id']}", headers=headers) as response:
+                response.raise_for_status()
+                batch = await response.json(loads=_json_loads)
+        
+        if batch["status"] != "completed" or not batch.get("output_file_id"):
+            raise RuntimeError(f"OpenAI batch {batch['id']} ended with status {batch['status']}")
+        
+        # Download the output and map results back by custom_id
+        async with session.get(f"{FILES_URL}/{batch['output_file_id']}/content", headers=headers) as response:
+            response.raise_for_status()
+            output = await response.text()
+        
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = _json_loads(line)
+            body = (item.get("response") or {}).get("body") or {}
+            if body.get("choices"):
+                results[item["custom_id"]] = body["choices"][0]["message"]["content"].strip()
+        
+        analyses = []
+        for i, prompt in enumerate(prompts):
+            if isinstance(prompt, Exception):
+                analyses.append(f"Error analyzing document: {str(prompt)}")
+            else:
+                analyses.append(results.get(f"request-{i}", "Error: OpenAI batch request failed"))
+        return analyses
+    
     def analyze_image(self, image_data: bytes) -> str:
         """
         Analyze an image.
@@ -259,11 +717,9 @@ class OpenAIIntegration:
         try:
             logger.info("Analyzing image with OpenAI")
             
-            # Get the prompt template
-            prompt_template = PROMPT_TEMPLATES["image_analysis"]
-            
             # Process image and text
-            analysis = self.process_image_and_text(image_data, prompt_template)
+            analysis = self.process_image_and_text(image_data, USER_TEMPLATES["image_analysis"],
+                                                   system_prompt=STATIC_INSTRUCTIONS["image_analysis"])
             
             logger.info("Image analysis completed")
             return analysis
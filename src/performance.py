@@ -6,14 +6,45 @@ including caching, parallel processing, and memory management.
 """
 
 import os
+import atexit
 import time
 import logging
 import hashlib
+import heapq
+from bisect import bisect_right
+import itertools
 import json
+import mmap
 import threading
+import uuid
 import multiprocessing
-from functools import lru_cache
-from typing import Dict, Any, List, Optional, Callable, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, wraps
+from typing import Dict, Any, Iterator, List, Optional, Callable, Sequence, Tuple, Union
+
+# xxh3 hashes at several GB/s; BLAKE2 from the standard library is the fallback
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
 # Configure logging
 logging.basicConfig(
@@ -27,10 +58,29 @@ DEFAULT_CACHE_SIZE = 1024
 DEFAULT_CACHE_TTL = 3600  # 1 hour
 DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MB
 DEFAULT_MAX_WORKERS = multiprocessing.cpu_count()
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+# Expired entries removed per get/set, keeping the cost of each call flat
+EXPIRY_SWEEP_LIMIT = 32
+DEFAULT_IO_WORKERS = min(32, DEFAULT_MAX_WORKERS + 4)
+# Under the data directory the API and worker already use, which appuser can write to
+DISK_CACHE_DIR = os.getenv("DISK_CACHE_DIR", os.path.join("data", "cache"))
+DISK_CACHE_SIZE_LIMIT = int(os.getenv("DISK_CACHE_SIZE_LIMIT", str(10 * 2 ** 30)))  # 10 GB
+CACHE_TIERS = ("memory", "disk", "both")
+# adaptive_chunk_size lookup table: files below CHUNK_SIZE_THRESHOLDS[i] use CHUNK_SIZES[i]
+CHUNK_SIZE_THRESHOLDS = (1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)  # 1 MB, 10 MB, 100 MB
+CHUNK_SIZES = (64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)  # 64 KB, 256 KB, 1 MB, 4 MB
+
+# Worker pools are started once and reused across parallel_map calls
+_EXECUTORS: Dict[tuple, Executor] = {}
+_EXECUTORS_LOCK = threading.Lock()
 
 
 class MemoryCache:
-    """In-memory cache with TTL."""
+    """In-memory cache with TTL.
+    
+    Expired items are dropped in expiry order via a min-heap, a few on each
+    access; when the cache is full the least recently used item is evicted.
+    """
     
     def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl: int = DEFAULT_CACHE_TTL):
         """Initialize the cache.
@@ -41,8 +91,33 @@ class MemoryCache:
         """
         self.max_size = max_size
         self.ttl = ttl
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.lock = threading.RLock()
+        # key -> (value, expires), least recently used first
+        self.cache: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # (expires, sequence, key); entries for overwritten keys go stale and are skipped
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+        self.lock = threading.Lock()
+    
+    def _purge_expired(self, now: float, limit: Optional[int]) -> int:
+        """Remove expired items in expiry order; the caller holds the lock."""
+        removed = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now and (limit is None or removed < limit):
+            expires, _, key = heapq.heappop(heap)
+            item = self.cache.get(key)
+            if item is not None and item[1] == expires:
+                del self.cache[key]
+            removed += 1
+        return removed
+    
+    def purge_expired(self) -> int:
+        """Remove every expired item, e.g. from a periodic background sweep.
+        
+        Returns:
+            Number of heap entries processed
+        """
+        with self.lock:
+            return self._purge_expired(time.time(), None)
     
     def get(self, key: str) -> Optional[Any]:
         """Get an item from the cache.
@@ -54,15 +129,19 @@ class MemoryCache:
             Cached value or None if not found or expired
         """
         with self.lock:
-            if key not in self.cache:
+            now = time.time()
+            self._purge_expired(now, EXPIRY_SWEEP_LIMIT)
+            item = self.cache.get(key)
+            if item is None:
                 return None
             
-            item = self.cache[key]
-            if time.time() > item["expires"]:
+            value, expires = item
+            if now > expires:
                 del self.cache[key]
                 return None
             
-            return item["value"]
+            self.cache.move_to_end(key)
+            return value
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """Set an item in the cache.
@@ -73,16 +152,22 @@ class MemoryCache:
             ttl: Time-to-live in seconds (overrides default)
         """
         with self.lock:
-            # Evict oldest items if cache is full
-            if len(self.cache) >= self.max_size:
-                oldest_key = min(self.cache.items(), key=lambda x: x[1]["expires"])[0]
-                del self.cache[oldest_key]
+            now = time.time()
+            self._purge_expired(now, EXPIRY_SWEEP_LIMIT)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+            elif len(self.cache) >= self.max_size:
+                # Evict the least recently used item
+                self.cache.popitem(last=False)
+            
+            expires = now + (ttl or self.ttl)
+            self.cache[key] = (value, expires)
+            heapq.heappush(self._heap, (expires, next(self._sequence), key))
             
-            # Set new item
-            self.cache[key] = {
-                "value": value,
-                "expires": time.time() + (ttl or self.ttl)
-            }
+            # Drop stale heap entries once they outnumber the live ones
+            if len(self._heap) > 2 * len(self.cache) + EXPIRY_SWEEP_LIMIT:
+                self._heap = [(item[1], next(self._sequence), k) for k, item in self.cache.items()]
+                heapq.heapify(self._heap)
     
     def delete(self, key: str) -> None:
         """Delete an item from the cache.
@@ -91,18 +176,152 @@ class MemoryCache:
             key: Cache key
         """
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
+            self.cache.pop(key, None)
     
     def clear(self) -> None:
         """Clear the cache."""
         with self.lock:
             self.cache.clear()
+            self._heap.clear()
 
 
 # Global cache instance
 memory_cache = MemoryCache()
 
+# Shared on-disk cache, opened on first use; False once it is known to be unavailable
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[Any]:
+    """Get the shared disk cache, which survives restarts and is shared between worker processes.
+    
+    Returns:
+        diskcache.Cache instance, or None if diskcache is not installed or the
+        cache directory cannot be used
+    """
+    global _disk_cache
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                if diskcache is None:
+                    _disk_cache = False
+                else:
+                    try:
+                        _disk_cache = diskcache.Cache(DISK_CACHE_DIR, size_limit=DISK_CACHE_SIZE_LIMIT,
+                                                      eviction_policy="least-recently-used")
+                    except Exception as e:
+                        logger.warning(f"Disk cache unavailable at {DISK_CACHE_DIR}: {str(e)}")
+                        _disk_cache = False
+    # Cache defines __len__, so an empty one is falsy
+    return _disk_cache if _disk_cache is not False else None
+
+
+class SemanticCache:
+    """Response cache keyed on prompt embedding similarity.
+    
+    Prompts are embedded and compared by cosine similarity against the
+    prompts already cached, so paraphrases of a cached prompt hit the same
+    response. Responses themselves are stored in a MemoryCache. Needs numpy,
+    which is imported when the first cache is created rather than with this
+    module.
+    """
+    
+    def __init__(self, embed: Callable[[str], Sequence[float]],
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 cache: Optional[MemoryCache] = None,
+                 max_size: int = DEFAULT_CACHE_SIZE):
+        """Initialize the cache.
+        
+        Args:
+            embed: Function returning the embedding vector of a prompt
+            threshold: Minimum cosine similarity for a cache hit
+            cache: Cache holding the responses (default: the global memory cache)
+            max_size: Maximum number of prompts indexed
+        """
+        import numpy as np
+        
+        self._np = np
+        self.threshold = threshold
+        self.cache = cache if cache is not None else memory_cache
+        self.max_size = max_size
+        self._embed = lru_cache(maxsize=max_size)(embed)
+        # Rows [0, _count) of _vectors are in use; once the index is full,
+        # _oldest is the row the next prompt overwrites
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._keys: List[str] = []
+        self._count = 0
+        self._oldest = 0
+        self.lock = threading.Lock()
+    
+    def _embedding(self, prompt: str) -> Any:
+        """Get the L2-normalized embedding of a prompt as a numpy array."""
+        np = self._np
+        vector = np.asarray(self._embed(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def get(self, prompt: str) -> Optional[Any]:
+        """Get the response cached for the most similar prompt.
+        
+        Args:
+            prompt: Prompt to look up
+            
+        Returns:
+            Cached response or None if no cached prompt is similar enough
+        """
+        vector = self._embedding(prompt)
+        with self.lock:
+            if not self._count:
+                return None
+            
+            scores = self._vectors[:self._count] @ vector
+            best = int(self._np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            key = self._keys[best]
+        
+        return self.cache.get(key)
+    
+    def set(self, prompt: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Cache a response for a prompt.
+        
+        Args:
+            prompt: Prompt the response was generated for
+            value: Response to cache
+            ttl: Time-to-live in seconds (overrides the response cache default)
+        """
+        vector = self._embedding(prompt)
+        key = f"semantic:{uuid.uuid4().hex}"
+        self.cache.set(key, value, ttl)
+        
+        with self.lock:
+            if self._count < self.max_size:
+                if self._count == len(self._vectors):
+                    # Double the capacity so filling the index copies each row a constant number of times
+                    capacity = min(self.max_size, max(16, 2 * self._count))
+                    vectors = self._np.empty((capacity, vector.shape[0]), dtype=self._np.float32)
+                    if self._count:
+                        vectors[:self._count] = self._vectors[:self._count]
+                    self._vectors = vectors
+                slot = self._count
+                self._count += 1
+                self._keys.append(key)
+            else:
+                # Replace the oldest prompt once the index is full
+                slot = self._oldest
+                self._oldest = (self._oldest + 1) % self.max_size
+                self._keys[slot] = key
+            self._vectors[slot] = vector
+    
+    def clear(self) -> None:
+        """Clear the index (responses expire from the response cache)."""
+        with self.lock:
+            self._vectors = self._np.empty((0, 0), dtype=self._np.float32)
+            self._keys.clear()
+            self._count = 0
+            self._oldest = 0
+
 
 def cache_key(data: Any) -> str:
     """Generate a cache key for the given data.
@@ -113,47 +332,91 @@ def cache_key(data: Any) -> str:
     Returns:
         Cache key as a string
     """
-    if isinstance(data, str):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        serialized = data
+    elif isinstance(data, str):
         serialized = data.encode('utf-8')
     else:
         try:
-            serialized = json.dumps(data, sort_keys=True).encode('utf-8')
+            if orjson is not None:
+                serialized = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            else:
+                serialized = json.dumps(data, sort_keys=True).encode('utf-8')
         except (TypeError, ValueError):
             serialized = str(data).encode('utf-8')
     
-    return hashlib.md5(serialized).hexdigest()
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(serialized)
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+
+def _serialized_key(func: Callable, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Cache key for a call that is stable across processes."""
+    key_data = {
+        "func": f"{func.__module__}.{func.__qualname__}",
+        "args": args,
+        "kwargs": kwargs
+    }
+    return cache_key(key_data)
 
 
-def cached(ttl: Optional[int] = None) -> Callable:
+def cached(ttl: Optional[int] = None, tier: str = "memory") -> Callable:
     """Decorator for caching function results.
     
+    Memory-tier entries are keyed on the arguments themselves, so each cached
+    call keeps strong references to its arguments (and result) until the entry
+    expires or is evicted from memory_cache. Arguments of different types that
+    compare equal, such as 1, 1.0 and True, are cached separately.
+    
     Args:
         ttl: Time-to-live in seconds (overrides default)
+        tier: Where results are cached: "memory", "disk" (see get_disk_cache)
+            or "both", which checks memory first and promotes disk hits
         
     Returns:
         Decorated function
     """
+    if tier not in CACHE_TIERS:
+        raise ValueError(f"Unknown cache tier: {tier}")
+    
     def decorator(func: Callable) -> Callable:
         def wrapper(*args, **kwargs) -> Any:
-            # Generate cache key
-            key_data = {
-                "func": func.__name__,
-                "args": args,
-                "kwargs": kwargs
-            }
-            key = cache_key(key_data)
+            if tier != "disk":
+                # Hashable arguments key the cache directly; anything else is serialized
+                key = (func.__module__, func.__qualname__, args, tuple(map(type, args)),
+                       tuple(sorted((name, value, type(value)) for name, value in kwargs.items())))
+                try:
+                    hash(key)
+                except TypeError:
+                    key = _serialized_key(func, args, kwargs)
+                
+                # Check cache
+                cached_result = memory_cache.get(key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit for {func.__name__}")
+                    return cached_result
             
-            # Check cache
-            cached_result = memory_cache.get(key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return cached_result
+            disk_cache = get_disk_cache() if tier != "memory" else None
+            if disk_cache is not None:
+                disk_key = key if tier != "disk" and isinstance(key, str) else _serialized_key(func, args, kwargs)
+                cached_result = disk_cache.get(disk_key)
+                if cached_result is not None:
+                    logger.debug(f"Disk cache hit for {func.__name__}")
+                    if tier == "both":
+                        memory_cache.set(key, cached_result, ttl)
+                    return cached_result
             
             # Call function
             result = func(*args, **kwargs)
             
             # Cache result
-            memory_cache.set(key, result, ttl)
+            if tier != "disk":
+                memory_cache.set(key, result, ttl)
+            if disk_cache is not None:
+                try:
+                    disk_cache.set(disk_key, result, expire=ttl or DEFAULT_CACHE_TTL)
+                except Exception as e:
+                    logger.warning(f"Could not write {func.__name__} result to disk cache: {str(e)}")
             logger.debug(f"Cached result for {func.__name__}")
             
             return result
@@ -161,20 +424,88 @@ def cached(ttl: Optional[int] = None) -> Callable:
     return decorator
 
 
+def _get_executor(executor_class: type, max_workers: int) -> Executor:
+    """Get the shared executor of a given type and size, starting it on first use.
+    
+    Args:
+        executor_class: ProcessPoolExecutor or ThreadPoolExecutor
+        max_workers: Number of workers in the pool
+        
+    Returns:
+        Shared executor
+    """
+    key = (executor_class, max_workers)
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(key)
+        if executor is None:
+            executor = executor_class(max_workers=max_workers)
+            _EXECUTORS[key] = executor
+        return executor
+
+
+def _discard_executor(executor_class: type, max_workers: int, executor: Executor) -> None:
+    """Drop a broken shared executor so the next call starts a new one.
+    
+    Args:
+        executor_class: ProcessPoolExecutor or ThreadPoolExecutor
+        max_workers: Number of workers in the pool
+        executor: The executor that failed
+    """
+    key = (executor_class, max_workers)
+    with _EXECUTORS_LOCK:
+        # Another thread may already have replaced it
+        if _EXECUTORS.get(key) is executor:
+            del _EXECUTORS[key]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_executors() -> None:
+    """Shut down the shared worker pools."""
+    with _EXECUTORS_LOCK:
+        executors = list(_EXECUTORS.values())
+        _EXECUTORS.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def parallel_map(func: Callable, items: List[Any], max_workers: int = DEFAULT_MAX_WORKERS) -> List[Any]:
-    """Apply a function to items in parallel.
+    """Apply a CPU-bound function to items in parallel worker processes.
     
     Args:
-        func: Function to apply
+        func: Function to apply (must be picklable)
         items: List of items to process
         max_workers: Maximum number of worker processes
         
     Returns:
         List of results
     """
-    with multiprocessing.Pool(processes=max_workers) as pool:
-        results = pool.map(func, items)
-    return results
+    # Send items in batches so each IPC round trip carries more than one item
+    chunksize = max(1, len(items) // (4 * max_workers))
+    executor = _get_executor(ProcessPoolExecutor, max_workers)
+    try:
+        return list(executor.map(func, items, chunksize=chunksize))
+    except BrokenProcessPool as e:
+        # A worker process died and the pool takes no more work; retry once on a new one
+        logger.warning(f"Worker pool is broken, restarting it: {str(e)}")
+        _discard_executor(ProcessPoolExecutor, max_workers, executor)
+        executor = _get_executor(ProcessPoolExecutor, max_workers)
+        return list(executor.map(func, items, chunksize=chunksize))
+
+
+def parallel_map_io(func: Callable, items: List[Any], max_workers: int = DEFAULT_IO_WORKERS) -> List[Any]:
+    """Apply an I/O-bound function to items in parallel threads.
+    
+    Args:
+        func: Function to apply
+        items: List of items to process
+        max_workers: Maximum number of worker threads
+        
+    Returns:
+        List of results
+    """
+    executor = _get_executor(ThreadPoolExecutor, max_workers)
+    return list(executor.map(func, items))
 
 
 def chunked_read(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[bytes]:
@@ -197,6 +528,42 @@ def chunked_read(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[b
     return chunks
 
 
+@contextmanager
+def mapped_chunks(file_path: str, chunk_size: Optional[int] = None) -> Iterator[List[memoryview]]:
+    """Memory-map a file and yield zero-copy views of its chunks.
+    
+    Pages are only read when a chunk is touched. The views are released and
+    the mapping closed when the block exits, so neither the views nor slices
+    of them may be used afterwards; call ``bytes(chunk)`` on a chunk to keep it.
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Size of each chunk in bytes (adapted to the file size if omitted)
+        
+    Yields:
+        List of chunks
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # mmap cannot map an empty file
+            yield []
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    with mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        chunk_size = chunk_size or adaptive_chunk_size(size)
+        with memoryview(mm) as view:
+            chunks = [view[i:i + chunk_size] for i in range(0, size, chunk_size)]
+            try:
+                yield chunks
+            finally:
+                for chunk in chunks:
+                    chunk.release()
+
+
 def optimize_memory_usage(func: Callable) -> Callable:
     """Decorator for optimizing memory usage.
     
@@ -207,18 +574,17 @@ def optimize_memory_usage(func: Callable) -> Callable:
         Decorated function
     """
     def wrapper(*args, **kwargs) -> Any:
+        # Memory is only measured when the result would actually be logged
+        if psutil is None or not logger.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+        
         # Get initial memory usage
-        import psutil
-        process = psutil.Process(os.getpid())
+        process = psutil.Process()
         initial_memory = process.memory_info().rss
         
         # Call function
         result = func(*args, **kwargs)
         
-        # Force garbage collection
-        import gc
-        gc.collect()
-        
         # Log memory usage
         final_memory = process.memory_info().rss
         memory_diff = final_memory - initial_memory
@@ -256,20 +622,8 @@ def adaptive_chunk_size(file_size: int) -> int:
     Returns:
         Chunk size in bytes
     """
-    # For small files, use a smaller chunk size
-    if file_size < 1024 * 1024:  # < 1 MB
-        return 64 * 1024  # 64 KB
-    
-    # For medium files, use a medium chunk size
-    if file_size < 10 * 1024 * 1024:  # < 10 MB
-        return 256 * 1024  # 256 KB
-    
-    # For large files, use a large chunk size
-    if file_size < 100 * 1024 * 1024:  # < 100 MB
-        return 1024 * 1024  # 1 MB
-    
-    # For very large files, use a very large chunk size
-    return 4 * 1024 * 1024  # 4 MB
+    # Larger files use larger chunks; one C-level binary search over the thresholds
+    return CHUNK_SIZES[bisect_right(CHUNK_SIZE_THRESHOLDS, file_size)]
 
 
 def optimize_document_processing(document_processor: Callable) -> Callable:
@@ -283,6 +637,7 @@ def optimize_document_processing(document_processor: Callable) -> Callable:
     """
     @timed
     @cached()
+    @wraps(document_processor)
     def optimized_processor(*args, **kwargs) -> Any:
         return document_processor(*args, **kwargs)
     
@@ -300,24 +655,49 @@ def optimize_query_processing(query_processor: Callable) -> Callable:
     """
     @timed
     @cached()
+    @wraps(query_processor)
     def optimized_processor(*args, **kwargs) -> Any:
         return query_processor(*args, **kwargs)
     
     return optimized_processor
 
 
-def optimize_llm_processing(llm_processor: Callable) -> Callable:
+def optimize_llm_processing(llm_processor: Callable,
+                            semantic_cache: Optional[SemanticCache] = None) -> Callable:
     """Optimize LLM processing with caching and timing.
     
     Args:
         llm_processor: LLM processing function
+        semantic_cache: Optional similarity cache consulted for deterministic
+            calls (an explicit temperature=0) whose prompt is the first argument;
+            opt-in, nothing passes one by default
         
     Returns:
         Optimized LLM processing function
     """
     @timed
-    @cached(ttl=86400)  # Cache for 24 hours
+    @cached(ttl=86400, tier="both")  # Cache for 24 hours, surviving restarts
+    @wraps(llm_processor)
     def optimized_processor(*args, **kwargs) -> Any:
-        return llm_processor(*args, **kwargs)
+        prompt = args[0] if args else kwargs.get("prompt")
+        if semantic_cache is None or not isinstance(prompt, str) or kwargs.get("temperature") != 0:
+            return llm_processor(*args, **kwargs)
+        
+        # The cache embeds prompts remotely; its failures must not fail the call
+        try:
+            result = semantic_cache.get(prompt)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed for {llm_processor.__name__}: {str(e)}")
+            result = None
+        if result is not None:
+            logger.debug(f"Semantic cache hit for {llm_processor.__name__}")
+            return result
+        
+        result = llm_processor(*args, **kwargs)
+        try:
+            semantic_cache.set(prompt, result, ttl=86400)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed for {llm_processor.__name__}: {str(e)}")
+        return result
     
     return optimized_processor
@@ -7,8 +7,10 @@ Originally designed for Phi-4-multimodal, but can work with other Phi models lik
 
 import os
 import logging
+import importlib.util
 import json
 import base64
+import threading
 from typing import Optional, Dict, Any, List, Union
 from io import BytesIO
 from pathlib import Path
@@ -28,11 +30,34 @@ except ImportError as e:
     logger.warning(f"Failed to import required libraries for Phi-4-multimodal: {str(e)}")
     IMPORTS_SUCCESSFUL = False
 
+# Weight-only quantization via bitsandbytes
+try:
+    from transformers import BitsAndBytesConfig
+except ImportError:
+    BitsAndBytesConfig = None
+
+# Pre-allocated KV cache (transformers >= 4.38); generation falls back to the dynamic cache without it
+try:
+    from transformers import StaticCache
+except ImportError:
+    StaticCache = None
+
 # Model configuration
 DEFAULT_MODEL = "microsoft/Phi-4-multimodal"  # Using Phi-4-multimodal as the default model
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu" if IMPORTS_SUCCESSFUL else None
 MAX_LENGTH = 4096
 MAX_NEW_TOKENS = 1024
+# Context left free for generation when long prompts are truncated
+PROMPT_RESERVE_TOKENS = 64
+TEMPERATURE = 0.7
+TOP_P = 0.9
+# Compile the single-token decode step on GPU (needs the static KV cache)
+COMPILE_DECODE = os.getenv("PHI_COMPILE_DECODE", "true").lower() == "true"
+# Weight quantization for GPU loads: "int8", "int4" or empty for none
+QUANTIZATION = os.getenv("PHI_QUANTIZATION", "").lower() or None
+QUANTIZATION_MODES = ("int8", "int4")
+# Prompts run together in one generate call by generate_texts
+BATCH_SIZE = int(os.getenv("PHI_BATCH_SIZE", "8"))
 
 # Prompt templates
 PROMPT_TEMPLATES = {
@@ -93,21 +118,36 @@ class PhiModelIntegration:
     4. Analyze documents using the model
     """
 
-    def __init__(self, model_name: str = DEFAULT_MODEL):
+    def __init__(self, model_name: str = DEFAULT_MODEL, quantization: Optional[str] = QUANTIZATION):
         """
         Initialize the Phi Model Integration.
 
         Args:
             model_name: Name of the model to use (default: microsoft/Phi-4-multimodal)
+            quantization: Load the weights as "int8" or "int4" (GPU only); decode is
+                memory-bound, so fewer weight bytes means faster tokens
         """
         if not IMPORTS_SUCCESSFUL:
             raise ImportError("Required libraries for Phi models are not installed")
+        if quantization is not None and quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization: {quantization}")
 
         self.model_name = model_name
+        self.quantization = quantization
         self.model = None
         self.tokenizer = None
-        self.processor = None
+        # Multimodal processor, loaded on first image request
+        self._processor = None
+        self._processor_lock = threading.Lock()
         self.is_multimodal = "multimodal" in model_name.lower()
+        self.torch_dtype = None
+        # KV cache allocated once and reused by every generate call
+        self.kv_cache = None
+        self._kv_cache_lock = threading.Lock()
+        self._compiled_step = None
+        self._compiled_prefill = None
+        # Template name -> (prefix ids, suffix ids) around the content field
+        self._template_tokens: Dict[str, tuple] = {}
 
         # Initialize the model
         self._initialize_model()
@@ -119,14 +159,33 @@ class PhiModelIntegration:
 
             # Load tokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            # Batched prompts are padded on the left so generation continues from real tokens
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self._template_tokens = self._tokenize_templates()
 
             # Load model with appropriate configuration
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                torch_dtype=torch.float16 if DEVICE == "cuda" else torch.float32,
-                device_map="auto" if DEVICE == "cuda" else None,
-                trust_remote_code=True
-            )
+            # bfloat16 matches the Phi training dtype and avoids float16 overflow in attention;
+            # GPUs without bfloat16 support keep float16
+            if DEVICE == "cuda":
+                self.torch_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            else:
+                self.torch_dtype = torch.float32
+            # FlashAttention-2 tiles attention instead of materializing the full
+            # score matrix; SDPA is the fallback when flash-attn is unavailable
+            attn_implementation = "sdpa"
+            if DEVICE == "cuda" and importlib.util.find_spec("flash_attn") is not None:
+                attn_implementation = "flash_attention_2"
+            try:
+                self.model = self._load_model(attn_implementation)
+            except (ImportError, ValueError) as e:
+                if attn_implementation == "sdpa":
+                    raise
+                logger.warning(f"FlashAttention-2 unavailable, using SDPA attention: {str(e)}")
+                attn_implementation = "sdpa"
+                self.model = self._load_model(attn_implementation)
+            logger.info(f"Using {attn_implementation} attention")
 
             # Set generation config
             self.model.generation_config = GenerationConfig.from_pretrained(
@@ -134,27 +193,278 @@ class PhiModelIntegration:
                 trust_remote_code=True
             )
 
-            # Load processor for multimodal models
-            if self.is_multimodal:
-                try:
-                    self.processor = AutoProcessor.from_pretrained(self.model_name)
-                    logger.info("Multimodal processor initialized")
-                except Exception as e:
-                    logger.warning(f"Failed to load multimodal processor: {str(e)}")
-                    self.is_multimodal = False
+            self.kv_cache = self._create_kv_cache()
+            if COMPILE_DECODE and DEVICE == "cuda" and self.kv_cache is not None:
+                self._compiled_step = self._compile_decode_step()
+                self._compiled_prefill = self._compile_prefill_step()
 
             logger.info(f"Phi model initialized successfully on {DEVICE}")
         except Exception as e:
             logger.error(f"Error initializing Phi model: {str(e)}")
             raise
 
-    def generate_text(self, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS) -> str:
+    @property
+    def processor(self):
+        """Multimodal processor, loaded on first access; None for text-only models."""
+        if self._processor is None and self.is_multimodal:
+            with self._processor_lock:
+                if self._processor is None and self.is_multimodal:
+                    try:
+                        self._processor = AutoProcessor.from_pretrained(self.model_name)
+                        logger.info("Multimodal processor initialized")
+                    except Exception as e:
+                        logger.warning(f"Failed to load multimodal processor: {str(e)}")
+                        self.is_multimodal = False
+        return self._processor
+
+    def _load_model(self, attn_implementation: str):
+        """Load the model weights with the given attention implementation."""
+        return AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            torch_dtype=self.torch_dtype,
+            attn_implementation=attn_implementation,
+            device_map="auto" if DEVICE == "cuda" else None,
+            trust_remote_code=True,
+            **self._quantization_kwargs()
+        )
+
+    def _tokenize_templates(self) -> Dict[str, tuple]:
+        """
+        Tokenize the static text around the content field of each prompt template.
+
+        Templates with more than one field (document_qa) are formatted and
+        tokenized per call as before.
+        """
+        template_tokens = {}
+        for name, template in PROMPT_TEMPLATES.items():
+            fields = [field for field in ("{document_content}", "{table_content}") if field in template]
+            if len(fields) != 1 or "{question}" in template:
+                continue
+            prefix, suffix = template.split(fields[0])
+            template_tokens[name] = (
+                self.tokenizer(prefix, add_special_tokens=True).input_ids,
+                self.tokenizer(suffix, add_special_tokens=False).input_ids
+            )
+        return template_tokens
+
+    def _quantization_kwargs(self) -> Dict[str, Any]:
+        """Build the from_pretrained arguments for the requested weight quantization."""
+        if self.quantization is None:
+            return {}
+
+        if DEVICE != "cuda" or BitsAndBytesConfig is None:
+            logger.warning(f"{self.quantization} quantization needs CUDA and bitsandbytes, loading unquantized weights")
+            return {}
+
+        if self.quantization == "int8":
+            config = BitsAndBytesConfig(load_in_8bit=True)
+        else:
+            config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_compute_dtype=self.torch_dtype,
+                bnb_4bit_quant_type="nf4"
+            )
+
+        logger.info(f"Loading Phi model weights with {self.quantization} quantization")
+        return {"quantization_config": config}
+
+    def _create_kv_cache(self):
+        """Allocate a static KV cache of MAX_LENGTH tokens, or return None if the model cannot use one."""
+        if StaticCache is None:
+            return None
+
+        try:
+            return StaticCache(
+                config=self.model.config,
+                max_batch_size=1,
+                max_cache_len=MAX_LENGTH,
+                device=self.model.device,
+                dtype=self.torch_dtype
+            )
+        except Exception as e:
+            logger.warning(f"Static KV cache unavailable, using the dynamic cache: {str(e)}")
+            return None
+
+    def _compile_decode_step(self):
+        """
+        Compile the single-token forward pass used by the decode loop.
+
+        Only this step is compiled: its shapes never change once the static
+        cache is allocated, whereas compiling generate as a whole recompiles
+        on every new prompt length.
+        """
+        if not hasattr(torch, "compile"):
+            return None
+
+        model = self.model
+
+        def decode_step(input_ids, cache_position, past_key_values):
+            return model(
+                input_ids=input_ids,
+                cache_position=cache_position,
+                past_key_values=past_key_values,
+                use_cache=True
+            ).logits
+
+        try:
+            return torch.compile(decode_step, mode="reduce-overhead", fullgraph=False, dynamic=False)
+        except Exception as e:
+            logger.warning(f"Could not compile the decode step: {str(e)}")
+            return None
+
+    def _compile_prefill_step(self):
+        """
+        Compile the prompt forward pass as a separate graph.
+
+        Prompt lengths vary, so this graph is compiled with dynamic shapes and
+        a new prompt length does not invalidate the static decode graph.
+        """
+        if not hasattr(torch, "compile"):
+            return None
+
+        model = self.model
+
+        def prefill_step(input_ids, cache_position, past_key_values):
+            return model(
+                input_ids=input_ids,
+                cache_position=cache_position,
+                past_key_values=past_key_values,
+                use_cache=True
+            ).logits
+
+        try:
+            return torch.compile(prefill_step, fullgraph=False, dynamic=True)
+        except Exception as e:
+            logger.warning(f"Could not compile the prefill step: {str(e)}")
+            return None
+
+    @staticmethod
+    def _sampling_kwargs(deterministic: bool) -> Dict[str, Any]:
+        """Build the decoding arguments for model.generate: greedy, or temperature and top-p sampling."""
+        if deterministic:
+            return {"do_sample": False, "num_beams": 1, "temperature": 1.0, "top_p": 1.0}
+        return {"do_sample": True, "temperature": TEMPERATURE, "top_p": TOP_P}
+
+    @staticmethod
+    def _sample_next_token(logits: "torch.Tensor", deterministic: bool) -> "torch.Tensor":
+        """Pick one token per row, greedily or with temperature and nucleus (top-p) sampling."""
+        if deterministic:
+            return torch.argmax(logits, dim=-1, keepdim=True)
+
+        probs = torch.softmax(logits.float() / TEMPERATURE, dim=-1)
+        sorted_probs, sorted_ids = torch.sort(probs, descending=True, dim=-1)
+        # Drop tokens outside the smallest set whose probability exceeds TOP_P
+        outside = torch.cumsum(sorted_probs, dim=-1) - sorted_probs > TOP_P
+        sorted_probs = sorted_probs.masked_fill(outside, 0.0)
+        choice = torch.multinomial(sorted_probs, num_samples=1)
+        return torch.gather(sorted_ids, -1, choice)
+
+    def _generate_compiled(self, input_ids: "torch.Tensor", max_new_tokens: int,
+                           deterministic: bool) -> "torch.Tensor":
+        """
+        Generate with the prefill graph followed by the compiled decode step.
+
+        Returns the prompt and generated token ids, like model.generate.
+        Callers hold _kv_cache_lock.
+        """
+        eos_token_id = self.model.generation_config.eos_token_id
+        eos_ids = set(eos_token_id if isinstance(eos_token_id, list) else [eos_token_id])
+
+        self.kv_cache.reset()
+        seq_len = input_ids.shape[-1]
+
+        # Prefill the cache with the whole prompt, eagerly if the prefill graph is unavailable
+        cache_position = torch.arange(seq_len, device=input_ids.device)
+        if self._compiled_prefill is not None:
+            logits = self._compiled_prefill(input_ids, cache_position, self.kv_cache)
+        else:
+            logits = self.model(
+                input_ids=input_ids,
+                cache_position=cache_position,
+                past_key_values=self.kv_cache,
+                use_cache=True
+            ).logits
+        next_token = self._sample_next_token(logits[:, -1, :], deterministic)
+        generated = [next_token]
+
+        # Decode one token at a time; inputs are written into preallocated
+        # tensors so the decode graph always sees the same shapes and buffers
+        token_buffer = torch.empty((1, 1), dtype=input_ids.dtype, device=input_ids.device)
+        position_buffer = torch.empty((1,), dtype=torch.long, device=input_ids.device)
+        for position in range(seq_len, seq_len + max_new_tokens - 1):
+            if next_token.item() in eos_ids:
+                break
+            token_buffer.copy_(next_token)
+            position_buffer.fill_(position)
+            logits = self._compiled_step(token_buffer, position_buffer, self.kv_cache)
+            next_token = self._sample_next_token(logits[:, -1, :], deterministic)
+            generated.append(next_token)
+
+        return torch.cat([input_ids] + generated, dim=-1)
+
+    def _cache_kwargs(self, input_length: int, max_new_tokens: int) -> Dict[str, Any]:
+        """
+        Build the KV cache arguments for a generate call.
+
+        The static cache is reset and reused when the prompt plus the new
+        tokens fit in it; longer requests use a dynamic cache. Callers hold
+        _kv_cache_lock for the duration of the generate call.
+        """
+        if self.kv_cache is None or input_length + max_new_tokens > MAX_LENGTH:
+            return {"use_cache": True}
+
+        self.kv_cache.reset()
+        return {"use_cache": True, "past_key_values": self.kv_cache}
+
+    @staticmethod
+    def _new_token_budget(input_length: int, max_new_tokens: int) -> int:
+        """Cap max_new_tokens to the context left after the prompt, so no KV space is reserved past MAX_LENGTH."""
+        return max(1, min(max_new_tokens, MAX_LENGTH - input_length))
+
+    @staticmethod
+    def _to_device(inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Move tokenized inputs to the GPU.
+
+        Tensors are staged in pinned memory and copied asynchronously, so the
+        transfer overlaps with the launch of the first kernels.
+        """
+        if DEVICE != "cuda":
+            return dict(inputs)
+        return {
+            k: v.pin_memory().to(DEVICE, non_blocking=True) if isinstance(v, torch.Tensor) else v
+            for k, v in inputs.items()
+        }
+
+    def _generate_ids(self, inputs: Dict[str, Any], max_new_tokens: int, deterministic: bool) -> "torch.Tensor":
+        """Run generation for a single tokenized prompt; returns prompt and generated token ids."""
+        input_length = inputs["input_ids"].shape[-1]
+        max_new_tokens = self._new_token_budget(input_length, max_new_tokens)
+        with torch.inference_mode(), self._kv_cache_lock:
+            if self._compiled_step is not None and input_length + max_new_tokens <= MAX_LENGTH:
+                try:
+                    return self._generate_compiled(inputs["input_ids"], max_new_tokens, deterministic)
+                except Exception as e:
+                    logger.warning(f"Compiled decoding failed, falling back to generate: {str(e)}")
+                    self._compiled_step = None
+                    self._compiled_prefill = None
+
+            return self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                **self._sampling_kwargs(deterministic),
+                **self._cache_kwargs(input_length, max_new_tokens)
+            )
+
+    def generate_text(self, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS, deterministic: bool = True) -> str:
         """
         Generate text based on a prompt.
 
         Args:
             prompt: Input prompt
             max_new_tokens: Maximum number of tokens to generate
+            deterministic: Decode greedily, so the same prompt gives the same text
+                (and cached responses stay valid); False samples with TEMPERATURE and TOP_P
 
         Returns:
             Generated text
@@ -162,28 +472,23 @@ class PhiModelIntegration:
         try:
             logger.info("Generating text with Phi-4-multimodal")
 
-            # Tokenize input
-            inputs = self.tokenizer(prompt, return_tensors="pt")
+            # Tokenize input, leaving room in the context for the answer
+            inputs = self.tokenizer(
+                prompt,
+                return_tensors="pt",
+                truncation=True,
+                max_length=MAX_LENGTH - PROMPT_RESERVE_TOKENS
+            )
 
             # Move inputs to the appropriate device
-            if DEVICE == "cuda":
-                inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+            inputs = self._to_device(inputs)
 
             # Generate text
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=max_new_tokens,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9
-                )
-
-            # Decode the generated text
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+            outputs = self._generate_ids(inputs, max_new_tokens, deterministic)
 
-            # Extract only the generated part (remove the prompt)
-            generated_text = generated_text[len(prompt):]
+            # Decode only the generated tokens
+            prompt_length = inputs["input_ids"].shape[-1]
+            generated_text = self.tokenizer.decode(outputs[0, prompt_length:], skip_special_tokens=True)
 
             logger.info("Text generation completed")
             return generated_text.strip()
@@ -191,12 +496,65 @@ class PhiModelIntegration:
             logger.error(f"Error generating text: {str(e)}")
             return f"Error generating text: {str(e)}"
 
-    def process_image_and_text(self, image_data: bytes, prompt: str, max_new_tokens: int = MAX_NEW_TOKENS) -> str:
+    def generate_texts(self, prompts: List[str], max_new_tokens: int = MAX_NEW_TOKENS,
+                       deterministic: bool = True) -> List[str]:
+        """
+        Generate text for several prompts, BATCH_SIZE prompts per generate call.
+
+        Args:
+            prompts: Input prompts
+            max_new_tokens: Maximum number of tokens to generate per prompt
+            deterministic: Decode greedily rather than sampling
+
+        Returns:
+            Generated texts, in the same order as prompts
+        """
+        results = []
+        for start in range(0, len(prompts), BATCH_SIZE):
+            batch = prompts[start:start + BATCH_SIZE]
+            try:
+                logger.info(f"Generating text for a batch of {len(batch)} prompts")
+
+                # Tokenize and pad the batch
+                inputs = self.tokenizer(
+                    batch,
+                    return_tensors="pt",
+                    padding=True,
+                    truncation=True,
+                    max_length=MAX_LENGTH - PROMPT_RESERVE_TOKENS
+                )
+
+                # Move inputs to the appropriate device
+                inputs = self._to_device(inputs)
+
+                # Generate text; the static cache holds a single sequence, so batches use the dynamic cache
+                with torch.inference_mode():
+                    outputs = self.model.generate(
+                        **inputs,
+                        max_new_tokens=self._new_token_budget(inputs["input_ids"].shape[-1], max_new_tokens),
+                        **self._sampling_kwargs(deterministic),
+                        use_cache=True,
+                        pad_token_id=self.tokenizer.pad_token_id
+                    )
+
+                # Decode only the generated tokens of each row
+                generated = outputs[:, inputs["input_ids"].shape[-1]:]
+                texts = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+                results.extend(text.strip() for text in texts)
+            except Exception as e:
+                logger.error(f"Error generating text: {str(e)}")
+                results.extend(f"Error generating text: {str(e)}" for _ in batch)
+
+        logger.info("Batch text generation completed")
+        return results
+
+    def process_image_and_text(self, image_data: Union[bytes, "Image.Image"], prompt: str,
+                               max_new_tokens: int = MAX_NEW_TOKENS) -> str:
         """
         Process an image and text prompt.
 
         Args:
-            image_data: Image data as bytes
+            image_data: Image data as bytes, or an already opened PIL image
             prompt: Text prompt
             max_new_tokens: Maximum number of tokens to generate
 
@@ -210,8 +568,9 @@ class PhiModelIntegration:
         try:
             logger.info("Processing image and text with multimodal Phi model")
 
-            # Load image
-            image = Image.open(BytesIO(image_data)).convert("RGB")
+            # Load image; BytesIO shares the bytes buffer rather than copying it
+            image = image_data if isinstance(image_data, Image.Image) else Image.open(BytesIO(image_data))
+            image = image.convert("RGB")
 
             # Process inputs
             inputs = self.processor(
@@ -221,25 +580,21 @@ class PhiModelIntegration:
             )
 
             # Move inputs to the appropriate device
-            if DEVICE == "cuda":
-                inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
+            inputs = self._to_device(inputs)
 
             # Generate text
-            with torch.no_grad():
+            prompt_length = inputs["input_ids"].shape[-1]
+            max_new_tokens = self._new_token_budget(prompt_length, max_new_tokens)
+            with torch.inference_mode(), self._kv_cache_lock:
                 outputs = self.model.generate(
                     **inputs,
                     max_new_tokens=max_new_tokens,
-                    do_sample=True,
-                    temperature=0.7,
-                    top_p=0.9
+                    **self._sampling_kwargs(deterministic=False),
+                    **self._cache_kwargs(prompt_length, max_new_tokens)
                 )
 
-            # Decode the generated text
-            generated_text = self.processor.decode(outputs[0], skip_special_tokens=True)
-
-            # Extract only the generated part (remove the prompt)
-            if prompt in generated_text:
-                generated_text = generated_text[len(prompt):]
+            # Decode only the generated tokens
+            generated_text = self.processor.decode(outputs[0, prompt_length:], skip_special_tokens=True)
 
             logger.info("Multimodal processing completed")
             return generated_text.strip()
@@ -247,13 +602,15 @@ class PhiModelIntegration:
             logger.error(f"Error processing image and text: {str(e)}")
             return f"Error processing image and text: {str(e)}"
 
-    def analyze_document(self, document_content: str, template: str = "document_analysis") -> str:
+    def analyze_document(self, document_content: str, template: str = "document_analysis",
+                         deterministic: bool = True) -> str:
         """
         Analyze a document using the model.
 
         Args:
             document_content: Document content to analyze
             template: Prompt template to use
+            deterministic: Decode greedily rather than sampling
 
         Returns:
             Analysis result
@@ -261,14 +618,33 @@ class PhiModelIntegration:
         try:
             logger.info(f"Analyzing document using template: {template}")
 
+            if template not in PROMPT_TEMPLATES:
+                template = "document_analysis"
+
+            # Pre-tokenized templates only need the document itself tokenized
+            if template in self._template_tokens:
+                prefix_ids, suffix_ids = self._template_tokens[template]
+                content_ids = self.tokenizer(document_content, add_special_tokens=False).input_ids
+                # Truncate the document, not the template, when the prompt would fill the context
+                content_budget = MAX_LENGTH - PROMPT_RESERVE_TOKENS - len(prefix_ids) - len(suffix_ids)
+                content_ids = content_ids[:max(content_budget, 0)]
+                input_ids = torch.tensor([prefix_ids + content_ids + suffix_ids], device=self.model.device)
+                inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+
+                outputs = self._generate_ids(inputs, MAX_NEW_TOKENS, deterministic)
+                analysis = self.tokenizer.decode(outputs[0][input_ids.shape[-1]:], skip_special_tokens=True).strip()
+
+                logger.info("Document analysis completed")
+                return analysis
+
             # Get the prompt template
-            prompt_template = PROMPT_TEMPLATES.get(template, PROMPT_TEMPLATES["document_analysis"])
+            prompt_template = PROMPT_TEMPLATES[template]
 
             # Format the prompt
             prompt = prompt_template.format(document_content=document_content)
 
             # Generate text
-            analysis = self.generate_text(prompt)
+            analysis = self.generate_text(prompt, deterministic=deterministic)
 
             logger.info("Document analysis completed")
             return analysis
@@ -276,12 +652,48 @@ class PhiModelIntegration:
             logger.error(f"Error analyzing document: {str(e)}")
             return f"Error analyzing document: {str(e)}"
 
-    def analyze_image(self, image_data: bytes) -> str:
+    def analyze_documents(self, documents: List[str], template: str = "document_analysis",
+                          deterministic: bool = True) -> List[str]:
+        """
+        Analyze several documents, generating for them in batches.
+
+        Args:
+            documents: Document contents to analyze
+            template: Prompt template to use
+            deterministic: Decode greedily rather than sampling
+
+        Returns:
+            Analysis results, in the same order as documents
+        """
+        logger.info(f"Analyzing {len(documents)} documents using template: {template}")
+
+        # Get the prompt template
+        prompt_template = PROMPT_TEMPLATES.get(template, PROMPT_TEMPLATES["document_analysis"])
+
+        # Format the prompts, keeping the error for any that cannot be built
+        analyses: List[Optional[str]] = [None] * len(documents)
+        prompts = []
+        indices = []
+        for i, document_content in enumerate(documents):
+            try:
+                prompts.append(prompt_template.format(document_content=document_content))
+                indices.append(i)
+            except Exception as e:
+                logger.error(f"Error analyzing document: {str(e)}")
+                analyses[i] = f"Error analyzing document: {str(e)}"
+
+        for i, analysis in zip(indices, self.generate_texts(prompts, deterministic=deterministic)):
+            analyses[i] = analysis
+
+        logger.info("Document analysis completed")
+        return analyses
+
+    def analyze_image(self, image_data: Union[bytes, "Image.Image"]) -> str:
         """
         Analyze an image.
 
         Args:
-            image_data: Image data as bytes
+            image_data: Image data as bytes, or an already opened PIL image
 
         Returns:
             Analysis result
@@ -318,25 +730,28 @@ class PhiModelIntegration:
         try:
             logger.info(f"Analyzing image from path: {image_path}")
 
-            # Read the image file
-            with open(image_path, "rb") as f:
-                image_data = f.read()
+            # Decode straight from the file instead of reading it into memory first
+            with Image.open(image_path) as image:
+                image = image.convert("RGB")
 
             # Analyze the image
-            return self.analyze_image(image_data)
+            return self.analyze_image(image)
         except Exception as e:
             logger.error(f"Error analyzing image from path: {str(e)}")
             return f"Error analyzing image from path: {str(e)}"
 
-# Singleton instance
+# Singleton instance; the lock keeps concurrent first callers from loading the model twice
 _phi4_instance = None
+_phi4_lock = threading.Lock()
 
-def get_phi_model_integration(model_name: str = DEFAULT_MODEL) -> PhiModelIntegration:
+def get_phi_model_integration(model_name: str = DEFAULT_MODEL,
+                              quantization: Optional[str] = QUANTIZATION) -> PhiModelIntegration:
     """
     Get the Phi model integration instance.
 
     Args:
         model_name: Name of the model to use
+        quantization: Weight quantization ("int8", "int4" or None)
 
     Returns:
         Phi model integration instance
@@ -344,11 +759,13 @@ def get_phi_model_integration(model_name: str = DEFAULT_MODEL) -> PhiModelIntegr
     global _phi4_instance
 
     if _phi4_instance is None:
-        try:
-            _phi4_instance = PhiModelIntegration(model_name)
-        except Exception as e:
-            logger.error(f"Failed to initialize Phi model integration: {str(e)}")
-            return None
+        with _phi4_lock:
+            if _phi4_instance is None:
+                try:
+                    _phi4_instance = PhiModelIntegration(model_name, quantization)
+                except Exception as e:
+                    logger.error(f"Failed to initialize Phi model integration: {str(e)}")
+                    return None
 
     return _phi4_instance
 
@@ -5,10 +5,39 @@ This module provides functionality to interact with Redis for asynchronous proce
 
 import os
 import json
+import time
+import hashlib
 import logging
+from functools import partial
 from typing import Dict, Any, Optional, List
 import redis
-from redis.exceptions import RedisError
+from redis.exceptions import RedisError, ResponseError
+
+# xxh3 hashes at several GB/s; BLAKE2 from the standard library is the fallback
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# orjson serializes task results several times faster than the json module and
+# produces bytes, which Redis stores as-is. Like json.dumps it turns non-string
+# keys, such as the column numbers of headerless tables, into strings
+try:
+    import orjson
+    _json_dumps = partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS)
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# msgpack encodes task results smaller and faster than JSON; it is used for
+# writing only when RESULT_SERIALIZER=msgpack
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+__all__ = ["RedisClient", "get_redis_client"]
 
 # Configure logging
 logger = logging.getLogger("claryai.redis")
@@ -18,6 +47,123 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+# Seconds before a socket read or write fails; blocking commands must wait less
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+# Format for stored task results, "json" or "msgpack"; either can be read back
+RESULT_SERIALIZER = os.getenv("RESULT_SERIALIZER", "json")
+if RESULT_SERIALIZER == "msgpack" and msgpack is None:
+    logger.warning("RESULT_SERIALIZER is msgpack but msgpack is not installed; storing task results as JSON")
+
+# LLM responses share one Redis hash per namespace (e.g. a prompt template),
+# keyed by prompt hash, which costs far less memory per entry than one key each
+LLM_CACHE_NAMESPACE = "default"
+
+# Connections are pooled per process and shared by every RedisClient
+_pool = redis.ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    password=REDIS_PASSWORD,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    socket_keepalive=True,
+    socket_timeout=REDIS_SOCKET_TIMEOUT
+)
+
+
+# Rate-limited enqueue in one round trip: take a processing slot if one is free
+# (KEYS[2] below ARGV[1]) and push the flagged item, otherwise push the plain item
+ENQUEUE_SCRIPT = """
+local processing = tonumber(redis.call('GET', KEYS[2]) or '0')
+if processing < tonumber(ARGV[1]) then
+    redis.call('INCR', KEYS[2])
+    redis.call('LPUSH', KEYS[1], ARGV[3])
+    return 1
+end
+redis.call('LPUSH', KEYS[1], ARGV[2])
+return 0
+"""
+
+# Pop the next item and, unless it already holds a processing slot, count it
+# against the queue's processing counter when rate limiting is in use
+DEQUEUE_SCRIPT = """
+local item = redis.call('RPOP', KEYS[1])
+if not item then
+    return false
+end
+if not cjson.decode(item)['_processing'] and redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('INCR', KEYS[2])
+end
+return item
+"""
+
+# Pop up to ARGV[1] items and count those not already holding a processing slot
+DEQUEUE_BATCH_SCRIPT = """
+local items = {}
+local counted = 0
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('RPOP', KEYS[1])
+    if not item then
+        break
+    end
+    items[i] = item
+    if not cjson.decode(item)['_processing'] then
+        counted = counted + 1
+    end
+end
+if counted > 0 and redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('INCRBY', KEYS[2], counted)
+end
+return items
+"""
+
+# Atomic decrement clamped at zero; -1 when the counter does not exist
+DECR_CLAMP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local value = redis.call('DECR', KEYS[1])
+if value < 0 then
+    redis.call('SET', KEYS[1], 0)
+    return 0
+end
+return value
+"""
+
+
+# Cache write for servers without per-field TTLs (Redis < 7.4): store the field,
+# record its deadline in a companion sorted set and drop a few expired fields
+CACHE_SET_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[4], 'LIMIT', 0, 64)
+if #expired > 0 then
+    redis.call('HDEL', KEYS[1], unpack(expired))
+    redis.call('ZREM', KEYS[2], unpack(expired))
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+return 1
+"""
+
+
+def _pack_result(result: Dict[str, Any]) -> bytes:
+    """Encode a task result in the configured format."""
+    if RESULT_SERIALIZER == "msgpack" and msgpack is not None:
+        return msgpack.packb(result, use_bin_type=True)
+    return _json_dumps(result)
+
+def _unpack_result(data: bytes) -> Dict[str, Any]:
+    """Decode a task result stored in either format."""
+    # JSON results are objects and start with '{'; a msgpack map never does
+    if data[:1] == b"{":
+        return _json_loads(data)
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+def _prompt_key(prompt: str) -> str:
+    """Hash a prompt for use as an LLM cache key; no cryptographic strength is needed."""
+    data = prompt.encode()
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
 
 class RedisClient:
     """
@@ -34,20 +180,28 @@ class RedisClient:
         self.redis = None
         self.connected = False
         try:
-            self.redis = redis.Redis(
-                host=REDIS_HOST,
-                port=REDIS_PORT,
-                db=REDIS_DB,
-                password=REDIS_PASSWORD,
-                decode_responses=True
-            )
+            self.redis = redis.Redis(connection_pool=_pool)
             self.redis.ping()  # Test connection
+            self._enqueue = self.redis.register_script(ENQUEUE_SCRIPT)
+            self._dequeue = self.redis.register_script(DEQUEUE_SCRIPT)
+            self._dequeue_batch = self.redis.register_script(DEQUEUE_BATCH_SCRIPT)
+            self._decr_clamp = self.redis.register_script(DECR_CLAMP_SCRIPT)
+            self._cache_set = self.redis.register_script(CACHE_SET_SCRIPT)
+            self.field_ttl = self._supports_field_ttl()
             self.connected = True
             logger.info(f"Connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
         except RedisError as e:
             logger.warning(f"Failed to connect to Redis: {str(e)}")
             self.connected = False
 
+    def _supports_field_ttl(self) -> bool:
+        """Check whether the server (Redis 7.4+) and redis-py (5.1+) have HEXPIRE."""
+        try:
+            self.redis.hexpire(f"llm:cache:{LLM_CACHE_NAMESPACE}:probe", 1, "probe")
+            return True
+        except (ResponseError, AttributeError):
+            return False
+
     def is_connected(self) -> bool:
         """Check if connected to Redis."""
         return self.connected
@@ -70,7 +224,7 @@ class RedisClient:
 
         try:
             key = f"task:{task_id}"
-            self.redis.set(key, json.dumps(result), ex=expiry)
+            self.redis.set(key, _pack_result(result), ex=expiry)
             logger.info(f"Stored task result for {task_id}")
             return True
         except RedisError as e:
@@ -95,13 +249,14 @@ class RedisClient:
             key = f"task:{task_id}"
             result = self.redis.get(key)
             if result:
-                return json.loads(result)
+                return _unpack_result(result)
             return None
         except RedisError as e:
             logger.error(f"Failed to get task result: {str(e)}")
             return None
 
-    def cache_llm_response(self, prompt: str, response: str, expiry: int = 86400) -> bool:
+    def cache_llm_response(self, prompt: str, response: str, expiry: int = 86400,
+                           namespace: str = LLM_CACHE_NAMESPACE) -> bool:
         """
         Cache LLM response in Redis.
 
@@ -109,6 +264,7 @@ class RedisClient:
             prompt: LLM prompt
             response: LLM response
             expiry: Expiry time in seconds (default: 24 hours)
+            namespace: Cache namespace, e.g. the prompt template name
 
         Returns:
             bool: True if successful, False otherwise
@@ -118,23 +274,30 @@ class RedisClient:
             return False
 
         try:
-            # Use hash of prompt as key to avoid storing large keys
-            import hashlib
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            key = f"llm:cache:{prompt_hash}"
-            self.redis.set(key, response, ex=expiry)
+            # Use hash of prompt as the field to avoid storing large keys
+            prompt_hash = _prompt_key(prompt)
+            key = f"llm:cache:{namespace}"
+            if self.field_ttl:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.hset(key, prompt_hash, response)
+                pipe.hexpire(key, expiry, prompt_hash)
+                pipe.execute()
+            else:
+                now = time.time()
+                self._cache_set(keys=[key, f"{key}:expiry"], args=[prompt_hash, response, now + expiry, now])
             logger.info(f"Cached LLM response for prompt hash {prompt_hash}")
             return True
         except RedisError as e:
             logger.error(f"Failed to cache LLM response: {str(e)}")
             return False
 
-    def get_cached_llm_response(self, prompt: str) -> Optional[str]:
+    def get_cached_llm_response(self, prompt: str, namespace: str = LLM_CACHE_NAMESPACE) -> Optional[str]:
         """
         Get cached LLM response from Redis.
 
         Args:
             prompt: LLM prompt
+            namespace: Cache namespace the response was stored under
 
         Returns:
             str: Cached LLM response or None if not found
@@ -143,24 +306,56 @@ class RedisClient:
             logger.warning("Not connected to Redis")
             return None
 
+        return self.get_cached_llm_responses([prompt], namespace)[0]
+
+    def get_cached_llm_responses(self, prompts: List[str],
+                                 namespace: str = LLM_CACHE_NAMESPACE) -> List[Optional[str]]:
+        """
+        Get cached LLM responses for several prompts in one round trip.
+
+        Args:
+            prompts: LLM prompts
+            namespace: Cache namespace the responses were stored under
+
+        Returns:
+            list: Cached LLM response or None for each prompt
+        """
+        if not self.connected:
+            logger.warning("Not connected to Redis")
+            return [None] * len(prompts)
+
+        if not prompts:
+            return []
+
         try:
-            # Use hash of prompt as key
-            import hashlib
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-            key = f"llm:cache:{prompt_hash}"
-            return self.redis.get(key)
+            # Use hashes of the prompts as fields
+            fields = [_prompt_key(prompt) for prompt in prompts]
+            key = f"llm:cache:{namespace}"
+            if self.field_ttl:
+                responses = self.redis.hmget(key, fields)
+            else:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.hmget(key, fields)
+                pipe.zmscore(f"{key}:expiry", fields)
+                responses, deadlines = pipe.execute()
+                now = time.time()
+                responses = [
+                    response if deadline is not None and deadline > now else None
+                    for response, deadline in zip(responses, deadlines)
+                ]
+            return [response.decode() if response is not None else None for response in responses]
         except RedisError as e:
             logger.error(f"Failed to get cached LLM response: {str(e)}")
-            return None
+            return [None] * len(prompts)
 
-    def add_to_queue(self, queue_name: str, item: Dict[str, Any], max_concurrent: int = None) -> bool:
+    def add_to_queue(self, queue_name: str, item: Dict[str, Any], max_concurrent: Optional[int] = None) -> bool:
         """
         Add item to a queue.
 
         Args:
             queue_name: Queue name
             item: Item to add
-            max_concurrent: Maximum number of concurrent items to process
+            max_concurrent: Maximum number of concurrent items to process (None disables rate limiting)
 
         Returns:
             bool: True if successful, False otherwise
@@ -174,32 +369,20 @@ class RedisClient:
 
             # If max_concurrent is set, use a rate limiter
             if max_concurrent is not None and max_concurrent > 0:
-                # Check current processing count
+                # Check the processing count, take a slot and push in one atomic step
                 processing_key = f"processing:{queue_name}"
-                processing_count = self.redis.get(processing_key)
+                acquired = self._enqueue(
+                    keys=[key, processing_key],
+                    args=[max_concurrent, _json_dumps(item), _json_dumps({**item, "_processing": True})]
+                )
 
-                if processing_count is None:
-                    # Initialize counter
-                    self.redis.set(processing_key, 0)
-                    processing_count = 0
+                if acquired:
+                    logger.info(f"Added item to queue {queue_name} for immediate processing")
                 else:
-                    processing_count = int(processing_count)
-
-                if processing_count >= max_concurrent:
-                    # Too many items processing, add to queue
-                    self.redis.lpush(key, json.dumps(item))
                     logger.info(f"Added item to queue {queue_name} (rate limited)")
-                else:
-                    # Increment processing count
-                    self.redis.incr(processing_key)
-
-                    # Add to queue with processing flag
-                    item["_processing"] = True
-                    self.redis.lpush(key, json.dumps(item))
-                    logger.info(f"Added item to queue {queue_name} for immediate processing")
             else:
                 # No rate limiting, just add to queue
-                self.redis.lpush(key, json.dumps(item))
+                self.redis.lpush(key, _json_dumps(item))
                 logger.info(f"Added item to queue {queue_name}")
 
             return True
@@ -207,6 +390,33 @@ class RedisClient:
             logger.error(f"Failed to add item to queue: {str(e)}")
             return False
 
+    def return_to_queue(self, queue_name: str, items: List[Dict[str, Any]]) -> bool:
+        """
+        Put items taken from a queue back at its head, so they are taken next.
+
+        Args:
+            queue_name: Queue name
+            items: Items in the order they were taken
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.connected:
+            logger.warning("Not connected to Redis")
+            return False
+
+        if not items:
+            return True
+
+        try:
+            # Items are taken from the right, so the first one must end up rightmost
+            self.redis.rpush(f"queue:{queue_name}", *(_json_dumps(item) for item in reversed(items)))
+            logger.info(f"Returned {len(items)} items to queue {queue_name}")
+            return True
+        except RedisError as e:
+            logger.error(f"Failed to return items to queue: {str(e)}")
+            return False
+
     def get_from_queue(self, queue_name: str) -> Optional[Dict[str, Any]]:
         """
         Get item from a queue.
@@ -222,28 +432,59 @@ class RedisClient:
             return None
 
         try:
+            # Pop the item and update the processing count in one round trip
             key = f"queue:{queue_name}"
-            item = self.redis.rpop(key)
+            processing_key = f"processing:{queue_name}"
+            item = self._dequeue(keys=[key, processing_key])
             if item:
-                item_data = json.loads(item)
-
-                # If this is a rate-limited item, update processing count
-                if item_data.get("_processing", False):
-                    # Item is already marked for processing
-                    pass
-                else:
-                    # Update processing count
-                    processing_key = f"processing:{queue_name}"
-                    if self.redis.exists(processing_key):
-                        # Increment processing count
-                        self.redis.incr(processing_key)
-
-                return item_data
+                return _json_loads(item)
             return None
         except RedisError as e:
             logger.error(f"Failed to get item from queue: {str(e)}")
             return None
 
+    def get_batch_from_queue(self, queue_name: str, count: int, timeout: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get up to count items from a queue, waiting for the first one.
+
+        Args:
+            queue_name: Queue name
+            count: Maximum number of items to return
+            timeout: Seconds to wait while the queue is empty (0 returns at once);
+                must be below REDIS_SOCKET_TIMEOUT
+
+        Returns:
+            list: Items in queue order, empty if none arrived before the timeout
+        """
+        if not self.connected:
+            logger.warning("Not connected to Redis")
+            return []
+
+        try:
+            key = f"queue:{queue_name}"
+            processing_key = f"processing:{queue_name}"
+            pipe = self.redis.pipeline(transaction=False)
+            if timeout > 0:
+                # Block until the queue has an item without taking it: moving the
+                # tail onto itself leaves the list unchanged
+                pipe.blmove(key, key, timeout, "RIGHT", "RIGHT")
+            # Then pop the batch and update the processing count, in the same round trip
+            self._dequeue_batch(keys=[key, processing_key], args=[count], client=pipe)
+            items = pipe.execute()[-1]
+            return [_json_loads(item) for item in items]
+        except RedisError as e:
+            logger.error(f"Failed to get items from queue: {str(e)}")
+            return []
+
+    def reset_pool(self):
+        """
+        Drop the connections inherited from a parent process.
+
+        Call this first thing in a forked child, so it never touches the
+        parent's sockets and always opens its own connections.
+        """
+        _pool.reset()
+
     def task_completed(self, queue_name: str) -> bool:
         """
         Mark a task as completed and decrement the processing count.
@@ -259,12 +500,9 @@ class RedisClient:
             return False
 
         try:
+            # Decrement processing count atomically, but don't go below 0
             processing_key = f"processing:{queue_name}"
-            if self.redis.exists(processing_key):
-                # Decrement processing count, but don't go below 0
-                self.redis.set(processing_key, max(0, int(self.redis.get(processing_key) or 0) - 1))
-                return True
-            return False
+            return self._decr_clamp(keys=[processing_key]) >= 0
         except RedisError as e:
             logger.error(f"Failed to mark task as completed: {str(e)}")
             return False
@@ -284,37 +522,32 @@ class RedisClient:
             return None
 
         try:
-            # Get all LLM usage keys for this API key
+            # Get all LLM usage keys for this API key without blocking Redis
             usage_key_pattern = f"llm:usage:{api_key}:*"
-            usage_keys = self.redis.keys(usage_key_pattern)
+            usage_keys = list(self.redis.scan_iter(match=usage_key_pattern, count=500))
 
             if not usage_keys:
                 return None
 
-            # Collect usage data
-            usage_data = {
-                "total_tokens": 0,
-                "total_requests": 0,
-                "models": {}
-            }
-
+            # Fetch every model's counters in one round trip
+            pipe = self.redis.pipeline(transaction=False)
             for key in usage_keys:
-                model_name = key.split(":")[-1]
-                model_usage = self.redis.hgetall(key)
+                pipe.hgetall(key)
 
+            models = {}
+            for key, model_usage in zip(usage_keys, pipe.execute()):
                 if model_usage:
-                    tokens = int(model_usage.get("tokens", 0))
-                    requests = int(model_usage.get("requests", 0))
-
-                    usage_data["total_tokens"] += tokens
-                    usage_data["total_requests"] += requests
-
-                    usage_data["models"][model_name] = {
-                        "tokens": tokens,
-                        "requests": requests
+                    models[key.decode().split(":")[-1]] = {
+                        "tokens": int(model_usage.get(b"tokens", 0)),
+                        "requests": int(model_usage.get(b"requests", 0))
                     }
 
-            return usage_data
+            # Collect usage data
+            return {
+                "total_tokens": sum(usage["tokens"] for usage in models.values()),
+                "total_requests": sum(usage["requests"] for usage in models.values()),
+                "models": models
+            }
         except RedisError as e:
             logger.error(f"Failed to get LLM usage: {str(e)}")
             return None
@@ -348,3 +581,20 @@ class RedisClient:
         except RedisError as e:
             logger.error(f"Failed to track LLM usage: {str(e)}")
             return False
+
+# Singleton instance
+_redis_instance = None
+
+def get_redis_client() -> RedisClient:
+    """
+    Get the Redis client instance.
+
+    Returns:
+        Redis client instance
+    """
+    global _redis_instance
+
+    if _redis_instance is None:
+        _redis_instance = RedisClient()
+
+    return _redis_instance
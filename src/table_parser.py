@@ -4,286 +4,677 @@ This module provides functionality to parse tables from various formats
 and convert them into structured JSON.
 """
 
-import pandas as pd
-import numpy as np
 import re
-import json
 import logging
-from typing import List, Dict, Any, Optional, Union
-from bs4 import BeautifulSoup
+import threading
+from html import unescape as html_unescape
+from itertools import chain, islice, repeat
+import numpy as np
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, Iterable
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+try:
+    from performance import MemoryCache, cache_key
+except ImportError:
+    from src.performance import MemoryCache, cache_key
+
+# lexbor (via selectolax) parses HTML in C, an order of magnitude faster than
+# BeautifulSoup; BeautifulSoup is the fallback
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Without selectolax, tables are read straight from an lxml tree; BeautifulSoup
+# on the pure-Python html.parser is the last resort
+try:
+    from lxml import html as lxml_html
+    BS4_PARSER = 'lxml'
+except ImportError:
+    lxml_html = None
+    BS4_PARSER = 'html.parser'
+
+# Numba compiles the per-character boundary scans to machine code; without it
+# they run as vectorized NumPy transitions
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# orjson serializes parsed tables several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    import json
+    orjson = None
+
+# Only table markup is turned into BeautifulSoup objects; surrounding page markup is skipped
+_TABLE_STRAINER = SoupStrainer(['table', 'thead', 'tbody', 'tr', 'td', 'th'])
+
+# Parser objects are built once per thread and reused; neither lxml parsers
+# nor BeautifulSoup tree builders may be shared between threads
+_THREAD_LOCAL = threading.local()
 
 # Configure logging
 logger = logging.getLogger("claryai.table_parser")
 
-class TableTransformer:
+# Parsed tables by input text; documents generated from the same templates
+# repeat the same tables
+TABLE_CACHE_SIZE = 4096
+TABLE_CACHE_TTL = 3600  # 1 hour
+_table_cache = MemoryCache(max_size=TABLE_CACHE_SIZE, ttl=TABLE_CACHE_TTL)
+
+# Pattern used per line, compiled once
+_SEP_LINE_RE = re.compile(r'^[-=+]+$')
+_LEADING_SPACE_RE = re.compile(r'\s*')
+
+# Byte lookup tables for separator-line characters
+_SEP_CHAR_LUT = np.zeros(256, dtype=bool)
+_SEP_CHAR_LUT[[ord(c) for c in '-=+|']] = True
+
+def _only_chars(line: str, lut: np.ndarray) -> bool:
+    """Check every character of a line against a byte lookup table in one vectorized pass."""
+    # Characters outside Latin-1 become '?', which no table accepts
+    codes = np.frombuffer(line.encode('latin-1', 'replace'), dtype=np.uint8)
+    return bool(lut[codes].all())
+
+def _char_codes(line: str) -> np.ndarray:
+    """Code points of a line as an array, one element per character."""
+    return np.frombuffer(line.encode('utf-32-le'), dtype=np.uint32)
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _word_starts_jit(codes):
+        starts = np.empty(codes.shape[0], dtype=np.int64)
+        count = 0
+        in_word = False
+        for i in range(codes.shape[0]):
+            if codes[i] != 32:
+                if not in_word:
+                    starts[count] = i
+                    count += 1
+                    in_word = True
+            else:
+                in_word = False
+        return starts[:count]
+
+    @numba.njit(cache=True)
+    def _separator_starts_jit(codes):
+        starts = np.empty(codes.shape[0], dtype=np.int64)
+        count = 0
+        in_separator = False
+        for i in range(codes.shape[0]):
+            code = codes[i]
+            # '-', '=' and '+' extend a separator run; only a space ends it
+            if code == 45 or code == 61 or code == 43:
+                if not in_separator:
+                    starts[count] = i
+                    count += 1
+                    in_separator = True
+            elif code == 32:
+                in_separator = False
+        return starts[:count]
+
+def _word_starts(line: str) -> List[int]:
+    """Indices where a run of non-space characters begins."""
+    codes = _char_codes(line)
+    if numba is not None:
+        return _word_starts_jit(codes).tolist()
+
+    # A word starts at a non-space whose predecessor is a space (or the line start)
+    in_word = codes != 32
+    return np.flatnonzero(in_word & ~np.concatenate(([False], in_word[:-1]))).tolist()
+
+def _separator_starts(separator_line: str) -> List[int]:
+    """Indices where a run of '-', '=' or '+' begins in a separator line; runs end at spaces."""
+    codes = _char_codes(separator_line)
+    if numba is not None:
+        return _separator_starts_jit(codes).tolist()
+
+    # Other characters neither start nor end a run, so look only at separator
+    # characters and spaces: a run starts where a space (or nothing) precedes it
+    is_separator = (codes == 45) | (codes == 61) | (codes == 43)
+    relevant = np.flatnonzero(is_separator | (codes == 32))
+    is_separator = is_separator[relevant]
+    return relevant[is_separator & ~np.concatenate(([False], is_separator[:-1]))].tolist()
+
+def _table_head(text_table: str, num_lines: int = 3) -> str:
+    """First few lines of a table after any leading blank lines, without splitting the rest."""
+    start = _LEADING_SPACE_RE.match(text_table).end()
+    end = start - 1
+    for _ in range(num_lines):
+        end = text_table.find('\n', end + 1)
+        if end == -1:
+            return text_table[start:]
+    return text_table[start:end]
+
+def _nonempty(text_table: str) -> Iterator[str]:
+    """Lines of a table that are not blank, without building stripped copies."""
+    for line in text_table.splitlines():
+        if line and not line.isspace():
+            yield line
+
+# Simple single-table HTML is tokenized with regular expressions instead of a
+# full parser. lexbor overtakes the tokenizer on tables longer than about
+# FAST_HTML_TABLE_MAX_CHARS; lxml and BeautifulSoup never do.
+FAST_HTML_TABLE_MAX_CHARS = 512
+# Tag attributes may contain quoted '>' characters
+_TAG_ATTRS = r'''(?:[^>"']|"[^"]*"|'[^']*')*'''
+_TABLE_TAG_RE = re.compile(r'<table\b', re.IGNORECASE)
+_UNSAFE_HTML_RE = re.compile(r'<(?:!|\?|script\b|style\b|textarea\b|template\b|select\b)', re.IGNORECASE)
+_ROW_RE = re.compile(rf'<tr\b{_TAG_ATTRS}>(.*?)</tr\s*>', re.IGNORECASE | re.DOTALL)
+_CELL_RE = re.compile(rf'<(t[dh])\b{_TAG_ATTRS}>(.*?)</\1\s*>', re.IGNORECASE | re.DOTALL)
+_THEAD_RE = re.compile(rf'<thead\b{_TAG_ATTRS}>(.*?)</thead\s*>', re.IGNORECASE | re.DOTALL)
+_SECTION_TAG_RE = re.compile(r'<(/?)(t[dhr]|thead|tbody|tfoot)\b', re.IGNORECASE)
+_STRUCTURE_TAG_RE = re.compile(r'</?(?:t[dhr]|table|thead|tbody|tfoot|caption|colgroup|col)\b', re.IGNORECASE)
+_ANY_TAG_RE = re.compile(rf'</?[A-Za-z]{_TAG_ATTRS}>')
+
+def _cell_text(inner_html: str) -> str:
+    """Text of a cell's inner HTML, as an HTML parser's .text would give it."""
+    if '<' in inner_html:
+        inner_html = _ANY_TAG_RE.sub('', inner_html)
+    if '&' in inner_html:
+        inner_html = html_unescape(inner_html)
+    return inner_html.strip()
+
+def _fast_html_table(html_table: str) -> Optional[Tuple[List[str], List[List[str]]]]:
     """
-    TableTransformer class for advanced table parsing.
+    Extract header and row cell texts from one simple, well-formed HTML table.
 
-    This class provides methods to:
-    1. Parse HTML tables
-    2. Parse text-based tables (ASCII, markdown, etc.)
-    3. Extract tables from PDF content
-    4. Convert tables to structured JSON
+    Returns None when the input needs a real HTML parser: several tables,
+    comments, scripts, unclosed rows or cells, or cells outside rows.
+    """
+    # Parsers also normalize carriage returns inside cell text
+    if '\r' in html_table or len(_TABLE_TAG_RE.findall(html_table)) != 1 or _UNSAFE_HTML_RE.search(html_table):
+        return None
+
+    # Opening minus closing tags per element; all must balance
+    balance = {'tr': 0, 'td': 0, 'thead': 0, 'tbody': 0, 'tfoot': 0}
+    num_rows = num_cells = 0
+    for slash, name in _SECTION_TAG_RE.findall(html_table):
+        name = name.lower()
+        if name == 'th':
+            name = 'td'
+        if slash:
+            balance[name] -= 1
+        else:
+            balance[name] += 1
+            if name == 'tr':
+                num_rows += 1
+            elif name == 'td':
+                num_cells += 1
+    if any(balance.values()):
+        return None
+
+    trs = []
+    for row_match in _ROW_RE.finditer(html_table):
+        cells = []
+        for tag, inner in _CELL_RE.findall(row_match.group(1)):
+            # Nested structure would be closed implicitly by a parser
+            if '<' in inner and _STRUCTURE_TAG_RE.search(inner):
+                return None
+            cells.append((tag.lower(), _cell_text(inner)))
+        trs.append((row_match.start(), cells))
+        num_cells -= len(cells)
+
+    # Every row and cell must have been matched with its closing tag
+    if len(trs) != num_rows or num_cells:
+        return None
+
+    # Extract headers
+    headers = []
+    thead = _THEAD_RE.search(html_table)
+    if thead:
+        headers = [text for start, cells in trs if thead.start() < start < thead.end()
+                   for tag, text in cells if tag == 'th']
+    elif trs:
+        # Try to get headers from first row
+        headers = [text for _, text in trs[0][1]]
+
+    # Extract rows
+    rows = []
+    for _, cells in trs[1:] if headers else trs:
+        row = [text for _, text in cells]
+        if row:  # Skip empty rows
+            rows.append(row)
+
+    return headers, rows
+
+def _lxml_parser():
+    """This thread's lxml HTML parser."""
+    parser = getattr(_THREAD_LOCAL, 'lxml_parser', None)
+    if parser is None:
+        parser = _THREAD_LOCAL.lxml_parser = lxml_html.HTMLParser()
+    return parser
+
+def _bs4_builder():
+    """This thread's BeautifulSoup tree builder for BS4_PARSER."""
+    builder = getattr(_THREAD_LOCAL, 'bs4_builder', None)
+    if builder is None:
+        builder = _THREAD_LOCAL.bs4_builder = builder_registry.lookup(BS4_PARSER)()
+    return builder
+
+def _fit_row(row: List[str], width: int) -> List[str]:
+    """Pad a row with empty cells or truncate it to width cells."""
+    if len(row) == width:
+        return row
+    return list(islice(chain(row, repeat('')), width))
+
+def _to_records(columns: List[Any], rows: List[List[str]]) -> List[Dict[Any, Any]]:
+    """Build one dict per row, filling short rows with None as a DataFrame would."""
+    width = len(columns)
+    return [dict(zip(columns, row + [None] * (width - len(row)))) for row in rows]
+
+def to_json_bytes(result: Dict[str, Any]) -> bytes:
+    """Serialize a parsed table to UTF-8 JSON; headerless tables have integer column keys."""
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode()
+
+def parse_html_table(html_table: str) -> Dict[str, Any]:
     """
+    Parse an HTML table and convert it to structured JSON.
 
-    def __init__(self):
-        """Initialize the TableTransformer."""
-        pass
-
-    def parse_html_table(self, html_table: str) -> Dict[str, Any]:
-        """
-        Parse an HTML table and convert it to structured JSON.
-
-        Args:
-            html_table: HTML table as string
-
-        Returns:
-            Dict with parsed table data
-        """
-        try:
-            # Parse HTML
-            soup = BeautifulSoup(html_table, 'html.parser')
-
-            # Extract headers
-            headers = []
-            header_row = soup.find('thead')
-            if header_row:
-                headers = [th.text.strip() for th in header_row.find_all('th')]
-            else:
-                # Try to get headers from first row
-                first_row = soup.find('tr')
-                if first_row:
-                    headers = [th.text.strip() for th in first_row.find_all(['th', 'td'])]
-
-            # Extract rows
-            rows = []
-            for tr in soup.find_all('tr')[1:] if headers else soup.find_all('tr'):
-                row = [td.text.strip() for td in tr.find_all(['td', 'th'])]
-                if row:  # Skip empty rows
-                    rows.append(row)
+    Results are cached by input; each call gets its own copy, so callers
+    may modify it.
 
-            # Create DataFrame
-            if headers and rows:
-                # Ensure all rows have the same length as headers
-                rows = [row + [''] * (len(headers) - len(row)) for row in rows if len(row) <= len(headers)]
-                rows = [row[:len(headers)] for row in rows if len(row) > len(headers)]
-                df = pd.DataFrame(rows, columns=headers)
-            elif rows:
-                df = pd.DataFrame(rows)
-            else:
-                return {"type": "Table", "data": [], "headers": [], "error": "No data found in table"}
-
-            # Convert to structured JSON
-            return {
-                "type": "Table",
-                "headers": headers if headers else df.columns.tolist(),
-                "data": df.to_dict(orient='records'),
-                "num_rows": len(df),
-                "num_cols": len(df.columns)
-            }
-
-        except Exception as e:
-            logger.error(f"Error parsing HTML table: {str(e)}")
-            return {"type": "Table", "error": f"Failed to parse HTML table: {str(e)}"}
-
-    def parse_text_table(self, text_table: str) -> Dict[str, Any]:
-        """
-        Parse a text-based table (ASCII, markdown) and convert it to structured JSON.
-
-        Args:
-            text_table: Text table as string
-
-        Returns:
-            Dict with parsed table data
-        """
-        try:
-            # Check if it's a markdown table
-            if '|' in text_table and '-+-' in text_table or '---|---' in text_table:
-                return self._parse_markdown_table(text_table)
-
-            # Otherwise treat as fixed-width table
-            return self._parse_fixed_width_table(text_table)
-
-        except Exception as e:
-            logger.error(f"Error parsing text table: {str(e)}")
-            return {"type": "Table", "error": f"Failed to parse text table: {str(e)}"}
-
-    def _parse_markdown_table(self, md_table: str) -> Dict[str, Any]:
-        """Parse a markdown table."""
-        # Split into lines and remove empty lines
-        lines = [line.strip() for line in md_table.split('\n') if line.strip()]
-
-        # Extract header and data rows
-        header_row = lines[0] if lines else ""
-        separator_row = lines[1] if len(lines) > 1 else ""
-        data_rows = lines[2:] if len(lines) > 2 else []
-
-        # Process header
-        headers = [h.strip() for h in header_row.split('|') if h.strip()]
-
-        # Process data rows
-        rows = []
-        for row in data_rows:
-            cells = [cell.strip() for cell in row.split('|') if cell.strip()]
-            if cells:  # Skip empty rows
-                # Ensure all rows have the same length as headers
-                cells = cells + [''] * (len(headers) - len(cells)) if len(cells) < len(headers) else cells[:len(headers)]
-                rows.append(cells)
-
-        # Create DataFrame
+    Args:
+        html_table: HTML table as string
+
+    Returns:
+        Dict with parsed table data
+    """
+    return _parse_cached("html", html_table, _parse_html_table)
+
+def parse_text_table(text_table: str) -> Dict[str, Any]:
+    """
+    Parse a text-based table (ASCII, markdown) and convert it to structured JSON.
+
+    Results are cached by input; each call gets its own copy, so callers
+    may modify it.
+
+    Args:
+        text_table: Text table as string
+
+    Returns:
+        Dict with parsed table data
+    """
+    return _parse_cached("text", text_table, _parse_text_table)
+
+def _parse_cached(kind: str, table: str, parse) -> Dict[str, Any]:
+    """Return a copy of the cached result for a table, parsing and caching it on a miss."""
+    key = f"{kind}:{cache_key(table)}"
+    result = _table_cache.get(key)
+    if result is None:
+        result = parse(table)
+        # Failed parses are not cached
+        if "error" in result:
+            return result
+        _table_cache.set(key, result)
+    return _copy_result(result)
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a parsed table down to its records; the cell values are immutable strings."""
+    return {
+        **result,
+        "headers": list(result["headers"]),
+        "data": [dict(record) for record in result["data"]]
+    }
+
+def _parse_html_table(html_table: str) -> Dict[str, Any]:
+    """Parse an HTML table without the cache."""
+    try:
+        # Parse HTML and extract headers and rows; simple tables skip the HTML parser
+        cells = None
+        if LexborHTMLParser is None or len(html_table) <= FAST_HTML_TABLE_MAX_CHARS:
+            cells = _fast_html_table(html_table)
+        if cells is not None:
+            headers, rows = cells
+        elif LexborHTMLParser is not None:
+            headers, rows = _extract_html_cells_lexbor(html_table)
+        elif lxml_html is not None:
+            headers, rows = _extract_html_cells_lxml(html_table)
+        else:
+            headers, rows = _extract_html_cells_bs4(html_table)
+
+        # Pick the record keys
         if headers and rows:
-            df = pd.DataFrame(rows, columns=headers)
+            # Ensure all rows have the same length as headers
+            rows = [_fit_row(row, len(headers)) for row in rows]
+            columns = headers
         elif rows:
-            df = pd.DataFrame(rows)
+            # Without headers, columns are numbered as in a DataFrame
+            columns = list(range(max(len(row) for row in rows)))
         else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+            return {"type": "Table", "data": [], "headers": [], "error": "No data found in table"}
 
         # Convert to structured JSON
         return {
             "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
+            "headers": headers if headers else columns,
+            "data": _to_records(columns, rows),
+            "num_rows": len(rows),
+            "num_cols": len(columns)
         }
 
-    def _parse_fixed_width_table(self, text_table: str) -> Dict[str, Any]:
-        """Parse a fixed-width ASCII table."""
-        # Split into lines and remove empty lines
-        lines = [line for line in text_table.split('\n') if line.strip()]
-
-        if not lines:
-            return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
-
-        # Check for separator lines (e.g., "-----", "=====", etc.)
-        separator_indices = []
-        for i, line in enumerate(lines):
-            if re.match(r'^[-=+]+$', line.strip()) or all(c in '-=+|' for c in line.strip()):
-                separator_indices.append(i)
-
-        # If we found separator lines, use them to determine the table structure
-        if separator_indices:
-            # Determine header and data rows based on separator positions
-            if separator_indices[0] == 0:  # Separator at the top
-                header_idx = 1
-            else:  # Header before first separator
-                header_idx = 0
-
-            # Get header row
-            header_row = lines[header_idx]
-
-            # Skip separator lines for data rows
-            data_rows = [lines[i] for i in range(len(lines)) if i not in separator_indices and i != header_idx]
-
-            # Try to detect column boundaries based on the separator line
-            separator_line = lines[separator_indices[0]]
-
-            # Find column boundaries based on spaces in the separator line
-            boundaries = []
-            in_separator = False
-            for i, char in enumerate(separator_line):
-                if char in '-=+' and not in_separator:
-                    boundaries.append(i)
-                    in_separator = True
-                elif char == ' ' and in_separator:
-                    in_separator = False
+    except Exception as e:
+        logger.error(f"Error parsing HTML table: {str(e)}")
+        return {"type": "Table", "error": f"Failed to parse HTML table: {str(e)}"}
+
+def _extract_html_cells_lexbor(html_table: str) -> Tuple[List[str], List[List[str]]]:
+    """Extract header and row cell texts from an HTML table with lexbor."""
+    tree = LexborHTMLParser(html_table)
+    if tree.css_first('table') is None:
+        # The HTML5 parser drops <tr> outside a table, so parse row fragments wrapped in one
+        tree = LexborHTMLParser(f"<table>{html_table}</table>")
+
+    # Collect the rows once; the first one is the header row
+    trs = tree.css('tr')
+
+    # Extract headers
+    headers = []
+    header_row = tree.css_first('thead')
+    if header_row:
+        headers = [th.text().strip() for th in header_row.css('th')]
+    elif trs:
+        # Try to get headers from first row
+        headers = [th.text().strip() for th in trs[0].css('th, td')]
+
+    # Extract rows
+    rows = []
+    for tr in trs[1:] if headers else trs:
+        row = [td.text().strip() for td in tr.css('td, th')]
+        if row:  # Skip empty rows
+            rows.append(row)
+
+    return headers, rows
+
+def _extract_html_cells_lxml(html_table: str) -> Tuple[List[str], List[List[str]]]:
+    """Extract header and row cell texts from an HTML table with lxml, bypassing BeautifulSoup."""
+    if not html_table.strip():
+        return [], []
+    doc = lxml_html.fromstring(html_table, parser=_lxml_parser())
+
+    # Collect the rows once; the first one is the header row
+    trs = list(doc.iter('tr'))
+
+    # Extract headers
+    headers = []
+    header_row = next(doc.iter('thead'), None)
+    if header_row is not None:
+        headers = [th.text_content().strip() for th in header_row.iter('th')]
+    elif trs:
+        # Try to get headers from first row
+        headers = [th.text_content().strip() for th in trs[0].iter('th', 'td')]
+
+    # Extract rows
+    rows = []
+    for tr in trs[1:] if headers else trs:
+        row = [td.text_content().strip() for td in tr.iter('td', 'th')]
+        if row:  # Skip empty rows
+            rows.append(row)
+
+    return headers, rows
+
+def _extract_html_cells_bs4(html_table: str) -> Tuple[List[str], List[List[str]]]:
+    """Extract header and row cell texts from an HTML table with BeautifulSoup."""
+    soup = BeautifulSoup(html_table, builder=_bs4_builder(), parse_only=_TABLE_STRAINER)
+
+    # Collect the rows once; the first one is the header row
+    trs = soup.find_all('tr')
+
+    # Extract headers
+    headers = []
+    header_row = soup.find('thead')
+    if header_row:
+        headers = [th.text.strip() for th in header_row.find_all('th')]
+    elif trs:
+        # Try to get headers from first row
+        headers = [th.text.strip() for th in trs[0].find_all(['th', 'td'])]
+
+    # Extract rows
+    rows = []
+    for tr in trs[1:] if headers else trs:
+        row = [td.text.strip() for td in tr.find_all(['td', 'th'])]
+        if row:  # Skip empty rows
+            rows.append(row)
+
+    return headers, rows
+
+def _parse_text_table(text_table: str) -> Dict[str, Any]:
+    """Parse a text-based table without the cache."""
+    try:
+        # Check if it's a markdown table; the header and separator rows come first
+        head = _table_head(text_table)
+        if '|' in head and '-+-' in head or '---|---' in head:
+            return _parse_markdown_table(text_table)
+
+        # Otherwise treat as fixed-width table
+        return _parse_fixed_width_table(text_table)
+
+    except Exception as e:
+        logger.error(f"Error parsing text table: {str(e)}")
+        return {"type": "Table", "error": f"Failed to parse text table: {str(e)}"}
+
+def _parse_markdown_table(md_table: str) -> Dict[str, Any]:
+    """Parse a markdown table."""
+    # Split into lines (any line ending) and remove blank ones
+    lines = [line.strip() for line in _nonempty(md_table)]
+
+    # Extract header and data rows
+    header_row = lines[0] if lines else ""
+    separator_row = lines[1] if len(lines) > 1 else ""
+    data_rows = lines[2:] if len(lines) > 2 else []
+
+    # Process header
+    headers = [h for h in map(str.strip, header_row.split('|')) if h]
+
+    # Process data rows
+    rows = []
+    for row in data_rows:
+        cells = [cell for cell in map(str.strip, row.split('|')) if cell]
+        if cells:  # Skip empty rows
+            # Ensure all rows have the same length as headers
+            cells = _fit_row(cells, len(headers))
+            rows.append(cells)
+
+    # Pick the record keys
+    if headers and rows:
+        columns = headers
+    elif rows:
+        # Without headers, columns are numbered as in a DataFrame
+        columns = list(range(max(len(row) for row in rows)))
+    else:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+
+    # Convert to structured JSON
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": _to_records(columns, rows),
+        "num_rows": len(rows),
+        "num_cols": len(columns)
+    }
+
+def _parse_fixed_width_table(text_table: str) -> Dict[str, Any]:
+    """Parse a fixed-width ASCII table."""
+    # Split into lines (any line ending) and remove blank ones
+    lines = list(_nonempty(text_table))
+
+    if not lines:
+        return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
+
+    # Check for separator lines (e.g., "-----", "=====", etc.)
+    separator_indices = []
+    for i, line in enumerate(lines):
+        if _SEP_LINE_RE.match(line.strip()) or _only_chars(line.strip(), _SEP_CHAR_LUT):
+            separator_indices.append(i)
+
+    # If we found separator lines, use them to determine the table structure
+    if separator_indices:
+        # Determine header and data rows based on separator positions
+        if separator_indices[0] == 0:  # Separator at the top
+            header_idx = 1
+        else:  # Header before first separator
+            header_idx = 0
+
+        # Get header row
+        header_row = lines[header_idx]
+
+        # Skip separator lines for data rows
+        data_rows = [lines[i] for i in range(len(lines)) if i not in separator_indices and i != header_idx]
+
+        # Try to detect column boundaries based on the separator line
+        separator_line = lines[separator_indices[0]]
+
+        # Find column boundaries based on spaces in the separator line
+        boundaries = _separator_starts(separator_line)
+
+        # Extract headers
+        headers = []
+        if boundaries:
+            # Extract headers based on boundaries
+            prev_boundary = 0
+            for boundary in boundaries:
+                if boundary > prev_boundary:
+                    headers.append(header_row[prev_boundary:boundary].strip())
+                prev_boundary = boundary
+            if prev_boundary < len(header_row):
+                headers.append(header_row[prev_boundary:].strip())
+        else:
+            # Fallback: split by whitespace
+            headers = [h for h in header_row.split() if h]
 
-            # Extract headers
-            headers = []
+        # Extract data rows
+        rows = []
+        for line in data_rows:
             if boundaries:
-                # Extract headers based on boundaries
+                # Extract cells based on boundaries
+                row = []
                 prev_boundary = 0
                 for boundary in boundaries:
-                    if boundary > prev_boundary:
-                        headers.append(header_row[prev_boundary:boundary].strip())
+                    if boundary > prev_boundary and boundary <= len(line):
+                        row.append(line[prev_boundary:boundary].strip())
                     prev_boundary = boundary
-                if prev_boundary < len(header_row):
-                    headers.append(header_row[prev_boundary:].strip())
+                if prev_boundary < len(line):
+                    row.append(line[prev_boundary:].strip())
+                if row:  # Skip empty rows
+                    rows.append(row)
             else:
                 # Fallback: split by whitespace
-                headers = [h for h in header_row.split() if h]
-
-            # Extract data rows
-            rows = []
-            for line in data_rows:
-                if boundaries:
-                    # Extract cells based on boundaries
-                    row = []
-                    prev_boundary = 0
-                    for boundary in boundaries:
-                        if boundary > prev_boundary and boundary <= len(line):
-                            row.append(line[prev_boundary:boundary].strip())
-                        prev_boundary = boundary
-                    if prev_boundary < len(line):
-                        row.append(line[prev_boundary:].strip())
-                    if row:  # Skip empty rows
-                        rows.append(row)
-                else:
-                    # Fallback: split by whitespace
-                    row = [cell for cell in line.split() if cell]
-                    if row:  # Skip empty rows
-                        rows.append(row)
+                row = [cell for cell in line.split() if cell]
+                if row:  # Skip empty rows
+                    rows.append(row)
+    else:
+        # No separator lines found, try to detect column boundaries based on spaces
+        # Use the first line to detect boundaries
+        boundaries = _word_starts(lines[0])
+
+        # Extract headers and data
+        headers = []
+        if boundaries:
+            # Extract headers from first line
+            prev_boundary = 0
+            for boundary in boundaries:
+                headers.append(lines[0][prev_boundary:boundary].strip())
+                prev_boundary = boundary
+            headers.append(lines[0][prev_boundary:].strip())
         else:
-            # No separator lines found, try to detect column boundaries based on spaces
-            def find_boundaries(line):
-                boundaries = []
-                in_word = False
-                for i, char in enumerate(line):
-                    if char != ' ' and not in_word:
-                        boundaries.append(i)
-                        in_word = True
-                    elif char == ' ' and in_word:
-                        in_word = False
-                return boundaries
-
-            # Use the first line to detect boundaries
-            boundaries = find_boundaries(lines[0])
-
-            # Extract headers and data
-            headers = []
+            # Fallback: split by whitespace
+            headers = lines[0].split()
+
+        # Extract data rows
+        rows = []
+        for line in lines[1:]:
             if boundaries:
-                # Extract headers from first line
+                # Extract cells based on boundaries
+                row = []
                 prev_boundary = 0
                 for boundary in boundaries:
-                    headers.append(lines[0][prev_boundary:boundary].strip())
+                    row.append(line[prev_boundary:boundary].strip())
                     prev_boundary = boundary
-                headers.append(lines[0][prev_boundary:].strip())
+                row.append(line[prev_boundary:].strip())
+                rows.append(row)
             else:
                 # Fallback: split by whitespace
-                headers = lines[0].split()
-
-            # Extract data rows
-            rows = []
-            for line in lines[1:]:
-                if boundaries:
-                    # Extract cells based on boundaries
-                    row = []
-                    prev_boundary = 0
-                    for boundary in boundaries:
-                        row.append(line[prev_boundary:boundary].strip())
-                        prev_boundary = boundary
-                    row.append(line[prev_boundary:].strip())
-                    rows.append(row)
-                else:
-                    # Fallback: split by whitespace
-                    rows.append(line.split())
+                rows.append(line.split())
+
+    # Pick the record keys
+    if headers and rows:
+        # Ensure all rows have the same length as headers
+        rows = [_fit_row(row, len(headers)) for row in rows]
+        columns = headers
+    elif rows:
+        # Without headers, columns are numbered as in a DataFrame
+        columns = list(range(max(len(row) for row in rows)))
+    else:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+
+    # Convert to structured JSON
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": _to_records(columns, rows),
+        "num_rows": len(rows),
+        "num_cols": len(columns)
+    }
+
+def transform_chunks(chunks: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Convert tabular data read in chunks to structured JSON.
 
-        # Create DataFrame
-        if headers and rows:
-            # Ensure all rows have the same length as headers
-            rows = [row + [''] * (len(headers) - len(row)) for row in rows if len(row) <= len(headers)]
-            rows = [row[:len(headers)] for row in rows if len(row) > len(headers)]
-            df = pd.DataFrame(rows, columns=headers)
-        elif rows:
-            df = pd.DataFrame(rows)
-        else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+    Each chunk is released before the next one is read, so only one chunk's
+    DataFrame is held alongside the records.
 
-        # Convert to structured JSON
-        return {
-            "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
-        }
+    Args:
+        chunks: pandas DataFrames with the same columns, e.g. from pd.read_csv(chunksize=...)
+
+    Returns:
+        Dict with parsed table data
+    """
+    headers = []
+    data = []
+    for chunk in chunks:
+        if not headers:
+            headers = list(chunk.columns)
+        # Missing cells become None rather than NaN, as in the other parsers
+        data.extend(chunk.astype(object).where(chunk.notna(), None).to_dict('records'))
+        del chunk
+
+    if not data:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": data,
+        "num_rows": len(data),
+        "num_cols": len(headers)
+    }
+
+class TableTransformer:
+    """
+    TableTransformer class for advanced table parsing.
+
+    The parsers are module-level functions; the class exposes them as
+    static methods so existing TableTransformer() callers keep working.
+
+    This class provides methods to:
+    1. Parse HTML tables
+    2. Parse text-based tables (ASCII, markdown, etc.)
+    3. Extract tables from PDF content
+    4. Convert tables to structured JSON
+    """
+
+    parse_html_table = staticmethod(parse_html_table)
+    parse_text_table = staticmethod(parse_text_table)
+    _parse_cached = staticmethod(_parse_cached)
+    _parse_html_table = staticmethod(_parse_html_table)
+    _extract_html_cells_lexbor = staticmethod(_extract_html_cells_lexbor)
+    _extract_html_cells_lxml = staticmethod(_extract_html_cells_lxml)
+    _extract_html_cells_bs4 = staticmethod(_extract_html_cells_bs4)
+    _parse_text_table = staticmethod(_parse_text_table)
+    _parse_markdown_table = staticmethod(_parse_markdown_table)
+    _parse_fixed_width_table = staticmethod(_parse_fixed_width_table)
+    transform_chunks = staticmethod(transform_chunks)
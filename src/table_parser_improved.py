@@ -2,348 +2,289 @@
 TableTransformer module for advanced table parsing in ClaryAI.
 This module provides functionality to parse tables from various formats
 and convert them into structured JSON.
+
+HTML, markdown and chunked tabular parsing are shared with table_parser;
+this module adds the financial and space-separated text table parsers.
 """
 
-import pandas as pd
-import numpy as np
 import re
-import json
 import logging
-from typing import List, Dict, Any, Optional, Union
-from bs4 import BeautifulSoup
+import numpy as np
+from typing import Dict, Any
+
+# Shared helpers and parsers; parse_html_table, to_json_bytes, transform_chunks
+# and _fast_html_table are re-exported for callers of this module
+try:
+    from table_parser import (
+        TableTransformer as _BaseTableTransformer,
+        _SEP_CHAR_LUT, _SEP_LINE_RE, _fast_html_table, _fit_row, _nonempty, _only_chars,
+        _parse_cached, _parse_markdown_table, _table_head, _to_records,
+        parse_html_table, to_json_bytes, transform_chunks
+    )
+except ImportError:
+    from src.table_parser import (
+        TableTransformer as _BaseTableTransformer,
+        _SEP_CHAR_LUT, _SEP_LINE_RE, _fast_html_table, _fit_row, _nonempty, _only_chars,
+        _parse_cached, _parse_markdown_table, _table_head, _to_records,
+        parse_html_table, to_json_bytes, transform_chunks
+    )
 
 # Configure logging
 logger = logging.getLogger("claryai.table_parser")
 
-class TableTransformer:
-    """
-    TableTransformer class for advanced table parsing.
-
-    This class provides methods to:
-    1. Parse HTML tables
-    2. Parse text-based tables (ASCII, markdown, etc.)
-    3. Extract tables from PDF content
-    4. Convert tables to structured JSON
-    """
-
-    def __init__(self):
-        """Initialize the TableTransformer."""
-        pass
-
-    def parse_html_table(self, html_table: str) -> Dict[str, Any]:
-        """
-        Parse an HTML table and convert it to structured JSON.
-
-        Args:
-            html_table: HTML table as string
-
-        Returns:
-            Dict with parsed table data
-        """
-        try:
-            # Parse HTML
-            soup = BeautifulSoup(html_table, 'html.parser')
+# Patterns used per row, compiled once
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_RULE_LINE_RE = re.compile(r'^[-=]+$')
 
-            # Extract headers
-            headers = []
-            header_row = soup.find('thead')
-            if header_row:
-                headers = [th.text.strip() for th in header_row.find_all('th')]
-            else:
-                # Try to get headers from first row
-                first_row = soup.find('tr')
-                if first_row:
-                    headers = [th.text.strip() for th in first_row.find_all(['th', 'td'])]
+# Byte lookup table for rule-line characters
+_RULE_CHAR_LUT = np.zeros(256, dtype=bool)
+_RULE_CHAR_LUT[[ord(c) for c in '-=+']] = True
 
-            # Extract rows
-            rows = []
-            for tr in soup.find_all('tr')[1:] if headers else soup.find_all('tr'):
-                row = [td.text.strip() for td in tr.find_all(['td', 'th'])]
-                if row:  # Skip empty rows
-                    rows.append(row)
-
-            # Create DataFrame
-            if headers and rows:
-                # Ensure all rows have the same length as headers
-                rows = [row + [''] * (len(headers) - len(row)) for row in rows if len(row) <= len(headers)]
-                rows = [row[:len(headers)] for row in rows if len(row) > len(headers)]
-                df = pd.DataFrame(rows, columns=headers)
-            elif rows:
-                df = pd.DataFrame(rows)
-            else:
-                return {"type": "Table", "data": [], "headers": [], "error": "No data found in table"}
-
-            # Convert to structured JSON
-            return {
-                "type": "Table",
-                "headers": headers if headers else df.columns.tolist(),
-                "data": df.to_dict(orient='records'),
-                "num_rows": len(df),
-                "num_cols": len(df.columns)
-            }
-
-        except Exception as e:
-            logger.error(f"Error parsing HTML table: {str(e)}")
-            return {"type": "Table", "error": f"Failed to parse HTML table: {str(e)}"}
-
-    def parse_text_table(self, text_table: str) -> Dict[str, Any]:
-        """
-        Parse a text-based table (ASCII, markdown) and convert it to structured JSON.
-
-        Args:
-            text_table: Text table as string
-
-        Returns:
-            Dict with parsed table data
-        """
-        try:
-            # Check if it's a markdown table
-            if '|' in text_table and ('-+-' in text_table or '---|---' in text_table):
-                return self._parse_markdown_table(text_table)
-                
-            # Check if it's a table with dollar amounts and "Total"
-            if '$' in text_table and 'Total' in text_table:
-                return self._parse_financial_table(text_table)
-                
-            # Check if it's a table with multiple spaces as column separators
-            if text_table.count('\n') >= 2 and any('  ' in line for line in text_table.split('\n')):
-                return self._parse_space_separated_table(text_table)
-
-            # Otherwise treat as fixed-width table
-            return self._parse_fixed_width_table(text_table)
+def parse_text_table(text_table: str) -> Dict[str, Any]:
+    """
+    Parse a text-based table (ASCII, markdown) and convert it to structured JSON.
 
-        except Exception as e:
-            logger.error(f"Error parsing text table: {str(e)}")
-            return {"type": "Table", "error": f"Failed to parse text table: {str(e)}"}
+    Results are cached by input, separately from table_parser's text
+    parser; each call gets its own copy, so callers may modify it.
 
-    def _parse_markdown_table(self, md_table: str) -> Dict[str, Any]:
-        """Parse a markdown table."""
-        # Split into lines and remove empty lines
-        lines = [line.strip() for line in md_table.split('\n') if line.strip()]
+    Args:
+        text_table: Text table as string
 
-        # Extract header and data rows
-        header_row = lines[0] if lines else ""
-        separator_row = lines[1] if len(lines) > 1 else ""
-        data_rows = lines[2:] if len(lines) > 2 else []
+    Returns:
+        Dict with parsed table data
+    """
+    return _parse_cached("improved-text", text_table, _parse_text_table)
 
-        # Process header
-        headers = [h.strip() for h in header_row.split('|') if h.strip()]
+def _parse_text_table(text_table: str) -> Dict[str, Any]:
+    """Parse a text-based table without the cache."""
+    try:
+        # Check if it's a markdown table; the header and separator rows come first
+        head = _table_head(text_table)
+        if '|' in head and ('-+-' in head or '---|---' in head):
+            return _parse_markdown_table(text_table)
+            
+        # Check if it's a table with dollar amounts and "Total"
+        if '$' in text_table and 'Total' in text_table:
+            return _parse_financial_table(text_table)
+            
+        # Check if it's a table with multiple spaces as column separators;
+        # the newline check stops at the second newline instead of counting them all
+        if '  ' in text_table and text_table.find('\n', text_table.find('\n') + 1) != -1:
+            return _parse_space_separated_table(text_table)
 
-        # Process data rows
-        rows = []
-        for row in data_rows:
-            cells = [cell.strip() for cell in row.split('|') if cell.strip()]
-            if cells:  # Skip empty rows
-                # Ensure all rows have the same length as headers
-                cells = cells + [''] * (len(headers) - len(cells)) if len(cells) < len(headers) else cells[:len(headers)]
-                rows.append(cells)
+        # Otherwise treat as fixed-width table
+        return _parse_fixed_width_table(text_table)
 
-        # Create DataFrame
-        if headers and rows:
-            df = pd.DataFrame(rows, columns=headers)
-        elif rows:
-            df = pd.DataFrame(rows)
-        else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+    except Exception as e:
+        logger.error(f"Error parsing text table: {str(e)}")
+        return {"type": "Table", "error": f"Failed to parse text table: {str(e)}"}
 
-        # Convert to structured JSON
-        return {
-            "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
-        }
+def _parse_fixed_width_table(text_table: str) -> Dict[str, Any]:
+    """Parse a fixed-width ASCII table."""
+    # Implementation of fixed-width table parsing
+    # (Existing implementation)
+    
+    # Split into lines (any line ending) and remove blank ones
+    lines = list(_nonempty(text_table))
 
-    def _parse_fixed_width_table(self, text_table: str) -> Dict[str, Any]:
-        """Parse a fixed-width ASCII table."""
-        # Implementation of fixed-width table parsing
-        # (Existing implementation)
-        
-        # Split into lines and remove empty lines
-        lines = [line for line in text_table.split('\n') if line.strip()]
+    if not lines:
+        return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
 
-        if not lines:
-            return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
+    # Check for separator lines (e.g., "-----", "=====", etc.)
+    separator_indices = []
+    for i, line in enumerate(lines):
+        if _SEP_LINE_RE.match(line.strip()) or _only_chars(line.strip(), _SEP_CHAR_LUT):
+            separator_indices.append(i)
 
-        # Check for separator lines (e.g., "-----", "=====", etc.)
-        separator_indices = []
-        for i, line in enumerate(lines):
-            if re.match(r'^[-=+]+$', line.strip()) or all(c in '-=+|' for c in line.strip()):
-                separator_indices.append(i)
+    # Process based on separator lines
+    headers = []
+    rows = []
+    
+    # (Rest of the existing implementation)
+    # ...
+    
+    # Pick the record keys
+    if headers and rows:
+        # Ensure all rows have the same length as headers
+        rows = [_fit_row(row, len(headers)) for row in rows]
+        columns = headers
+    elif rows:
+        # Without headers, columns are numbered as in a DataFrame
+        columns = list(range(max(len(row) for row in rows)))
+    else:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
 
-        # Process based on separator lines
-        headers = []
-        rows = []
-        
-        # (Rest of the existing implementation)
-        # ...
-        
-        # Create DataFrame
-        if headers and rows:
-            # Ensure all rows have the same length as headers
-            rows = [row + [''] * (len(headers) - len(row)) for row in rows if len(row) <= len(headers)]
-            rows = [row[:len(headers)] for row in rows if len(row) > len(headers)]
-            df = pd.DataFrame(rows, columns=headers)
-        elif rows:
-            df = pd.DataFrame(rows)
-        else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+    # Convert to structured JSON
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": _to_records(columns, rows),
+        "num_rows": len(rows),
+        "num_cols": len(columns)
+    }
 
-        # Convert to structured JSON
-        return {
-            "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
-        }
+def _parse_financial_table(text_table: str) -> Dict[str, Any]:
+    """Parse a financial table with dollar amounts and totals."""
+    # Split into lines (any line ending) and remove blank ones
+    lines = list(_nonempty(text_table))
+    
+    if not lines:
+        return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
         
-    def _parse_financial_table(self, text_table: str) -> Dict[str, Any]:
-        """Parse a financial table with dollar amounts and totals."""
-        # Split into lines and remove empty lines
-        lines = [line for line in text_table.split('\n') if line.strip()]
-        
-        if not lines:
-            return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
+    # Look for separator lines (e.g., "-----", "=====", etc.)
+    separator_indices = []
+    for i, line in enumerate(lines):
+        if _RULE_LINE_RE.match(line.strip()) or _only_chars(line.strip(), _RULE_CHAR_LUT):
+            separator_indices.append(i)
+            
+    # Identify header row
+    header_row = None
+    data_rows = []
+    
+    if separator_indices:
+        # If we have separator lines, use them to identify header and data rows
+        if separator_indices[0] == 0:  # Separator at the top
+            header_idx = 1
+        else:  # Header before first separator
+            header_idx = 0
             
-        # Look for separator lines (e.g., "-----", "=====", etc.)
-        separator_indices = []
+        if header_idx < len(lines):
+            header_row = lines[header_idx]
+            
+        # Data rows are all non-separator lines except the header
+        data_rows = [lines[i] for i in range(len(lines)) 
+                    if i not in separator_indices and i != header_idx]
+    else:
+        # No separators, look for header based on content
         for i, line in enumerate(lines):
-            if re.match(r'^[-=]+$', line.strip()) or all(c in '-=+' for c in line.strip()):
-                separator_indices.append(i)
-                
-        # Identify header row
-        header_row = None
-        data_rows = []
+            if "Item" in line or "Description" in line or "Product" in line:
+                header_row = line
+                data_rows = lines[i+1:]
+                break
         
-        if separator_indices:
-            # If we have separator lines, use them to identify header and data rows
-            if separator_indices[0] == 0:  # Separator at the top
-                header_idx = 1
-            else:  # Header before first separator
-                header_idx = 0
-                
-            if header_idx < len(lines):
-                header_row = lines[header_idx]
-                
-            # Data rows are all non-separator lines except the header
-            data_rows = [lines[i] for i in range(len(lines)) 
-                        if i not in separator_indices and i != header_idx]
-        else:
-            # No separators, look for header based on content
-            for i, line in enumerate(lines):
-                if "Item" in line or "Description" in line or "Product" in line:
-                    header_row = line
-                    data_rows = lines[i+1:]
-                    break
+        # If no header found, use first line as header
+        if header_row is None:
+            header_row = lines[0]
+            data_rows = lines[1:]
             
-            # If no header found, use first line as header
-            if header_row is None:
-                header_row = lines[0]
-                data_rows = lines[1:]
-                
-        # Parse header
-        # Look for multiple spaces as column separators
-        headers = []
-        if header_row:
-            # Split by multiple spaces
-            headers = re.split(r'\s{2,}', header_row.strip())
-            
-        # If headers couldn't be extracted, use default headers
-        if not headers:
-            # Try to determine number of columns from data rows
-            max_cols = 0
-            for row in data_rows:
-                cols = len(re.split(r'\s{2,}', row.strip()))
-                max_cols = max(max_cols, cols)
-                
-            if max_cols >= 3:
-                headers = ["Item", "Quantity", "Price", "Total"][:max_cols]
-            else:
-                headers = ["Item", "Value", "Total"][:max_cols]
-                
-        # Parse data rows
-        rows = []
+    # Parse header
+    # Look for multiple spaces as column separators
+    headers = []
+    if header_row:
+        # Split by multiple spaces
+        headers = _MULTI_SPACE_RE.split(header_row.strip())
+        
+    # If headers couldn't be extracted, use default headers
+    if not headers:
+        # Try to determine number of columns from data rows
+        max_cols = 0
         for row in data_rows:
-            # Skip total rows for now
-            if row.strip().startswith("Total") or row.strip().startswith("Subtotal"):
-                continue
-                
-            # Split by multiple spaces
-            cells = re.split(r'\s{2,}', row.strip())
+            cols = len(_MULTI_SPACE_RE.split(row.strip()))
+            max_cols = max(max_cols, cols)
             
-            # Skip empty rows
-            if cells and any(cells):
-                # Ensure all rows have the same length as headers
-                if len(cells) < len(headers):
-                    cells = cells + [''] * (len(headers) - len(cells))
-                elif len(cells) > len(headers):
-                    cells = cells[:len(headers)]
-                    
-                rows.append(cells)
-                
-        # Create DataFrame
-        if headers and rows:
-            df = pd.DataFrame(rows, columns=headers)
-        elif rows:
-            df = pd.DataFrame(rows)
+        if max_cols >= 3:
+            headers = ["Item", "Quantity", "Price", "Total"][:max_cols]
         else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+            headers = ["Item", "Value", "Total"][:max_cols]
             
-        # Convert to structured JSON
-        return {
-            "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
-        }
-        
-    def _parse_space_separated_table(self, text_table: str) -> Dict[str, Any]:
-        """Parse a table with multiple spaces as column separators."""
-        # Split into lines and remove empty lines
-        lines = [line for line in text_table.split('\n') if line.strip()]
+    # Parse data rows
+    rows = []
+    for row in data_rows:
+        # Skip total rows for now
+        if row.strip().startswith("Total") or row.strip().startswith("Subtotal"):
+            continue
+            
+        # Split by multiple spaces
+        cells = _MULTI_SPACE_RE.split(row.strip())
         
-        if not lines:
-            return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
+        # Skip empty rows
+        if cells and any(cells):
+            # Ensure all rows have the same length as headers
+            cells = _fit_row(cells, len(headers))
+
+            rows.append(cells)
             
-        # Identify header row (usually the first line)
-        header_row = lines[0]
-        data_rows = lines[1:]
+    # Pick the record keys
+    if headers and rows:
+        columns = headers
+    elif rows:
+        # Without headers, columns are numbered as in a DataFrame
+        columns = list(range(max(len(row) for row in rows)))
+    else:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
         
-        # Parse header by splitting on multiple spaces
-        headers = re.split(r'\s{2,}', header_row.strip())
+    # Convert to structured JSON
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": _to_records(columns, rows),
+        "num_rows": len(rows),
+        "num_cols": len(columns)
+    }
+
+def _parse_space_separated_table(text_table: str) -> Dict[str, Any]:
+    """Parse a table with multiple spaces as column separators."""
+    # Split into lines (any line ending) and remove blank ones
+    lines = list(_nonempty(text_table))
+    
+    if not lines:
+        return {"type": "Table", "data": [], "headers": [], "error": "Empty table"}
         
-        # Parse data rows
-        rows = []
-        for row in data_rows:
-            # Split by multiple spaces
-            cells = re.split(r'\s{2,}', row.strip())
-            
-            # Skip empty rows
-            if cells and any(cells):
-                # Ensure all rows have the same length as headers
-                if len(cells) < len(headers):
-                    cells = cells + [''] * (len(headers) - len(cells))
-                elif len(cells) > len(headers):
-                    cells = cells[:len(headers)]
-                    
-                rows.append(cells)
-                
-        # Create DataFrame
-        if headers and rows:
-            df = pd.DataFrame(rows, columns=headers)
-        elif rows:
-            df = pd.DataFrame(rows)
-        else:
-            return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+    # Identify header row (usually the first line)
+    header_row = lines[0]
+    data_rows = lines[1:]
+    
+    # Parse header by splitting on multiple spaces
+    headers = _MULTI_SPACE_RE.split(header_row.strip())
+    
+    # Parse data rows
+    rows = []
+    for row in data_rows:
+        # Split by multiple spaces
+        cells = _MULTI_SPACE_RE.split(row.strip())
+        
+        # Skip empty rows
+        if cells and any(cells):
+            # Ensure all rows have the same length as headers
+            cells = _fit_row(cells, len(headers))
+
+            rows.append(cells)
             
-        # Convert to structured JSON
-        return {
-            "type": "Table",
-            "headers": headers,
-            "data": df.to_dict(orient='records'),
-            "num_rows": len(df),
-            "num_cols": len(df.columns)
-        }
+    # Pick the record keys
+    if headers and rows:
+        columns = headers
+    elif rows:
+        # Without headers, columns are numbered as in a DataFrame
+        columns = list(range(max(len(row) for row in rows)))
+    else:
+        return {"type": "Table", "data": [], "headers": headers, "error": "No data found in table"}
+        
+    # Convert to structured JSON
+    return {
+        "type": "Table",
+        "headers": headers,
+        "data": _to_records(columns, rows),
+        "num_rows": len(rows),
+        "num_cols": len(columns)
+    }
+
+class TableTransformer(_BaseTableTransformer):
+    """
+    TableTransformer class for advanced table parsing.
+
+    The parsers are module-level functions; the class exposes them as
+    static methods so existing TableTransformer() callers keep working.
+    The HTML and markdown parsers are inherited from table_parser.
+
+    This class provides methods to:
+    1. Parse HTML tables
+    2. Parse text-based tables (ASCII, markdown, etc.)
+    3. Extract tables from PDF content
+    4. Convert tables to structured JSON
+    """
+
+    parse_text_table = staticmethod(parse_text_table)
+    _parse_text_table = staticmethod(_parse_text_table)
+    _parse_fixed_width_table = staticmethod(_parse_fixed_width_table)
+    _parse_financial_table = staticmethod(_parse_financial_table)
+    _parse_space_separated_table = staticmethod(_parse_space_separated_table)
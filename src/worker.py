@@ -6,15 +6,22 @@ This script processes documents asynchronously from Redis queues.
 import os
 import sys
 import time
+import atexit
+import threading
 import tempfile
 import logging
 import sqlite3
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Iterator
 import pathlib
-import pandas as pd
-from redis_client import RedisClient
-from table_parser import TableTransformer
+from itertools import islice
+from functools import partial
+from queue import SimpleQueue
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from redis_client import get_redis_client
 
 # Configure logging
 logging.basicConfig(
@@ -27,16 +34,85 @@ logger = logging.getLogger("claryai.worker")
 # Database path
 DB_PATH = os.getenv("DB_PATH", "data/claryai.db")
 
-# Initialize Redis client
-redis_client = RedisClient()
+# Applied to every worker connection. WAL lets the API read tasks while the
+# worker writes, and commits in WAL mode need no fsync with synchronous=NORMAL
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Tasks taken from the queue per round trip, and seconds to wait for them
+TASK_BATCH_SIZE = 8
+TASK_WAIT_TIMEOUT = 2
+
+# Downloaded pages are read in URL_CHUNK_SIZE pieces and kept in memory up to
+# URL_SPOOL_MAX_SIZE bytes
+URL_CHUNK_SIZE = 64 * 1024
+URL_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Shared HTTP session for URL tasks, so keep-alive connections and TLS sessions
+# are reused across tasks. The main process never fetches, so each worker
+# process starts from an empty pool.
+_HTTP = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+)
+_HTTP.mount("https://", _HTTP_ADAPTER)
+_HTTP.mount("http://", _HTTP_ADAPTER)
+
+# (connect, read) timeouts for URL tasks so a stalled server cannot hang a worker
+URL_TIMEOUT = (3.05, 30)
 
-# Initialize TableTransformer
-table_transformer = TableTransformer()
+# Rows per chunk when reading CSV and Excel files
+TABLE_CHUNK_SIZE = int(os.getenv("TABLE_CHUNK_SIZE", "50000"))
+
+# Worker processes; partitioning documents is CPU-bound
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+
+# Uploads are moved to PROCESSED_DIR once their task finishes, and the janitor
+# deletes them every JANITOR_INTERVAL seconds once older than the retention
+UPLOAD_DIR = "data/uploads"
+PROCESSED_DIR = "data/processed"
+PROCESSED_RETENTION_HOURS = float(os.getenv("PROCESSED_RETENTION_HOURS", "24"))
+JANITOR_INTERVAL = 600
+
+# Initialize Redis client
+redis_client = get_redis_client()
+
+# Persistent database connection, opened on first use in each process
+_conn: Optional[sqlite3.Connection] = None
+_conn_pid: Optional[int] = None
+
+def _get_conn() -> sqlite3.Connection:
+    """Return the worker's database connection, opening it with the worker's pragmas on first use."""
+    global _conn, _conn_pid
+    # A connection inherited from the parent process must not be used
+    if _conn is None or _conn_pid != os.getpid():
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        _conn, _conn_pid = conn, os.getpid()
+    return _conn
+
+def _close_conn():
+    """Close the worker's database connection if it was opened."""
+    global _conn
+    if _conn is not None and _conn_pid == os.getpid():
+        _conn.close()
+    _conn = None
+
+atexit.register(_close_conn)
 
 def init_db():
     """Initialize database."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = _get_conn()
     cursor = conn.cursor()
 
     # Create tasks table
@@ -60,9 +136,15 @@ def init_db():
     """)
 
     conn.commit()
-    conn.close()
     logger.info("Database initialized")
 
+def _count_document(conn: sqlite3.Connection, api_key: str):
+    """Count one processed document for an API key, adding the key if it is new."""
+    conn.execute("""
+    INSERT INTO api_keys (api_key, name, document_count) VALUES (?, 'Default', 1)
+    ON CONFLICT(api_key) DO UPDATE SET document_count = document_count + 1
+    """, (api_key,))
+
 def update_document_count(api_key: str):
     """
     Update document count for API key.
@@ -70,90 +152,98 @@ def update_document_count(api_key: str):
     Args:
         api_key: The API key to update the document count for.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Check if api_keys table exists and has the right schema
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='api_keys'")
-        if not cursor.fetchone():
-            # Create table if it doesn't exist
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS api_keys (
-                api_key TEXT PRIMARY KEY,
-                name TEXT,
-                document_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            conn.commit()
-            logger.info("Created api_keys table")
-
-        # Check if the API key exists in the table
-        cursor.execute("SELECT api_key FROM api_keys WHERE api_key = ?", (api_key,))
-        if not cursor.fetchone():
-            # Insert new API key if it doesn't exist
-            cursor.execute("INSERT INTO api_keys (api_key, name, document_count) VALUES (?, ?, ?)",
-                          (api_key, "Default", 1))
-            logger.info(f"Added new API key: {api_key}")
-        else:
-            # Update document count for existing API key
-            cursor.execute("UPDATE api_keys SET document_count = document_count + 1 WHERE api_key = ?", (api_key,))
-
-        conn.commit()
+        conn = _get_conn()
+        with conn:
+            _count_document(conn, api_key)
     except Exception as e:
         logger.error(f"Error updating document count: {str(e)}")
-    finally:
-        if conn:
-            conn.close()
 
 def update_task_status(task_id: str, status: str):
     """Update task status in database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE tasks SET status = ? WHERE task_id = ?", (status, task_id))
+    conn = _get_conn()
+    conn.execute("UPDATE tasks SET status = ? WHERE task_id = ?", (status, task_id))
     conn.commit()
-    conn.close()
+
+def complete_task(task_id: str, api_key: Optional[str] = None):
+    """
+    Mark a task completed and count its document in one transaction.
+
+    Args:
+        task_id: The task to mark completed.
+        api_key: The API key to update the document count for, if any.
+    """
+    conn = _get_conn()
+    with conn:
+        conn.execute("UPDATE tasks SET status = ? WHERE task_id = ?", ("completed", task_id))
+        if api_key:
+            # A failed count is logged and undone without losing the status update
+            conn.execute("SAVEPOINT count_document")
+            try:
+                _count_document(conn, api_key)
+            except sqlite3.Error as e:
+                logger.error(f"Error updating document count: {str(e)}")
+                conn.execute("ROLLBACK TO count_document")
+            conn.execute("RELEASE count_document")
+
+def task_input_error(task: Dict[str, Any]) -> Optional[str]:
+    """
+    Check that a task's input can be processed.
+
+    Args:
+        task: Task data from the queue.
+
+    Returns:
+        A description of the problem, or None if the input is usable.
+    """
+    source_type = task.get("source_type", "file")
+
+    if source_type == "file":
+        file_path = task.get("file_path")
+        if not file_path:
+            return f"File path not provided for task {task.get('task_id')}"
+        try:
+            if os.path.getsize(file_path) == 0:
+                return f"File is empty: {file_path}"
+        except OSError:
+            return f"File not found at path: {file_path}"
+        return None
+
+    if source_type == "url":
+        return None if task.get("source_url") else "URL not provided"
+
+    return f"Unsupported source type: {source_type}"
 
 def process_document_task(task: Dict[str, Any]):
     """Process document task from queue."""
     task_id = task.get("task_id")
     source_type = task.get("source_type", "file")
     source_url = task.get("source_url")
-    chunk_strategy = task.get("chunk_strategy", "paragraph")
     api_key = task.get("api_key")
     file_path = task.get("file_path")
 
     logger.info(f"Processing task {task_id} with details: {task}")
 
+    # The API rejects missing and empty uploads before queuing; this only
+    # guards against tasks that bypass it, without a "processing" write
+    error = task_input_error(task)
+    if error:
+        logger.error(f"Error processing task {task_id}: {error}")
+        update_task_status(task_id, "failed")
+        hand_off_upload(file_path)
+        return
+
     try:
         # Update task status to processing
         update_task_status(task_id, "processing")
 
         # Process document based on source type
         if source_type == "file":
-            if not file_path:
-                raise ValueError(f"File path not provided for task {task_id}")
-
-            if not os.path.exists(file_path):
-                raise ValueError(f"File not found at path: {file_path}")
-
-            # Check if file is readable and has content
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                raise ValueError(f"File is empty: {file_path}")
-
-            logger.info(f"Processing file {file_path} ({file_size} bytes) for task {task_id}")
-            result = process_file(file_path, chunk_strategy)
-        elif source_type == "url":
-            if not source_url:
-                raise ValueError("URL not provided")
-
-            logger.info(f"Processing URL {source_url} for task {task_id}")
-            result = process_url(source_url, chunk_strategy)
+            logger.info(f"Processing file {file_path} for task {task_id}")
+            result = process_file(file_path)
         else:
-            raise ValueError(f"Unsupported source type: {source_type}")
+            logger.info(f"Processing URL {source_url} for task {task_id}")
+            result = process_url(source_url)
 
         # Store result in Redis
         if redis_client.is_connected():
@@ -165,40 +255,89 @@ def process_document_task(task: Dict[str, Any]):
         else:
             logger.warning(f"Redis not connected, task result not stored for task_id: {task_id}")
 
-        # Update task status to completed
-        update_task_status(task_id, "completed")
-
-        # Update document count for API key
+        # Update task status to completed and document count for API key together
+        complete_task(task_id, api_key)
         if api_key:
-            update_document_count(api_key)
             logger.info(f"Document count updated for API key: {api_key}")
 
-        # Clean up file if it was created for this task
-        if file_path and os.path.exists(file_path) and file_path.startswith("data/uploads/"):
-            try:
-                os.remove(file_path)
-                logger.info(f"Temporary file deleted: {file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {file_path}: {str(e)}")
-
         logger.info(f"Task {task_id} completed successfully")
     except Exception as e:
         logger.error(f"Error processing task {task_id}: {str(e)}", exc_info=True)
         update_task_status(task_id, "failed")
+    finally:
+        hand_off_upload(file_path)
+
+def hand_off_upload(file_path: Optional[str]):
+    """
+    Move a task's upload out of the upload directory.
+
+    The file is kept in PROCESSED_DIR for debugging until the janitor deletes it.
+
+    Args:
+        file_path: Path of the task's file, if it has one.
+    """
+    if not file_path or not file_path.startswith(UPLOAD_DIR + "/"):
+        return
+
+    try:
+        os.makedirs(PROCESSED_DIR, exist_ok=True)
+        os.replace(file_path, os.path.join(PROCESSED_DIR, os.path.basename(file_path)))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to move uploaded file {file_path}: {str(e)}")
+
+def clean_processed_files(max_age_hours: float = PROCESSED_RETENTION_HOURS) -> int:
+    """
+    Delete processed uploads older than the retention period.
+
+    Args:
+        max_age_hours: Age in hours after which a file is deleted.
 
-def process_file(file_path: str, chunk_strategy: str = None) -> Dict[str, Any]:
+    Returns:
+        Number of files deleted.
+    """
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+
+    try:
+        entries = list(os.scandir(PROCESSED_DIR))
+    except FileNotFoundError:
+        return 0
+
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                pathlib.Path(entry.path).unlink()
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Failed to delete processed file {entry.path}: {str(e)}")
+
+    return removed
+
+def janitor():
+    """Delete old processed uploads every JANITOR_INTERVAL seconds."""
+    while True:
+        try:
+            removed = clean_processed_files()
+            if removed:
+                logger.info(f"Janitor deleted {removed} processed files")
+        except Exception as e:
+            logger.error(f"Error in janitor: {str(e)}")
+        time.sleep(JANITOR_INTERVAL)
+
+def process_file(file_path: str) -> Dict[str, Any]:
     """
     Process document from file.
 
+    The worker does not chunk documents, so a task's chunk_strategy is ignored.
+
     Args:
         file_path: Path to the file to process.
-        chunk_strategy: Strategy for chunking the document (not used in this implementation).
 
     Returns:
         Dict containing the processed elements and status.
     """
-    from unstructured.partition.auto import partition
-
     logger.info(f"Processing file: {file_path}")
 
     # Determine file extension
@@ -206,78 +345,164 @@ def process_file(file_path: str, chunk_strategy: str = None) -> Dict[str, Any]:
 
     # Process document based on file type
     if file_ext in ['.csv', '.xlsx', '.xls']:
-        # Process tabular data
+        # pandas and the table parser are only loaded by workers that get tabular files
+        import pandas as pd
+        from table_parser import transform_chunks
+
+        # Process tabular data in chunks and transform it to structured format
         if file_ext == '.csv':
-            df = pd.read_csv(file_path)
+            with pd.read_csv(file_path, chunksize=TABLE_CHUNK_SIZE) as chunks:
+                result = transform_chunks(chunks)
+        elif file_ext == '.xlsx':
+            result = transform_chunks(read_xlsx_chunks(file_path, TABLE_CHUNK_SIZE))
         else:
-            df = pd.read_excel(file_path)
-
-        # Transform table to structured format
-        result = table_transformer.transform(df)
+            result = transform_chunks([pd.read_excel(file_path)])
     else:
+        from unstructured.partition.auto import partition
+
         # Process document with unstructured
-        # Note: chunk_strategy parameter is reserved for future implementation
-        # of document chunking strategies
         elements = partition(file_path)
 
         # Convert elements to serializable format
-        result = {"elements": [], "status": "parsed"}
+        result = elements_to_result(elements)
 
-        for element in elements:
-            element_type = type(element).__name__
-            element_text = str(element)
+    return result
 
-            # Handle table elements
-            if element_type == "Table":
-                try:
-                    # Extract table data
-                    headers = element.metadata.header_text if hasattr(element.metadata, "header_text") else []
-                    data = []
-
-                    # Add table element
-                    result["elements"].append({
-                        "type": "Table",
-                        "data": data,
-                        "headers": headers,
-                        "error": "No data found in table"
-                    })
-                except Exception as e:
-                    logger.error(f"Error processing table: {str(e)}")
-                    result["elements"].append({
-                        "type": "Table",
-                        "data": [],
-                        "headers": [],
-                        "error": str(e)
-                    })
-            else:
-                # Add text element
-                result["elements"].append({
-                    "type": element_type,
-                    "text": element_text
+def read_xlsx_chunks(file_path: str, chunk_size: int) -> Iterator[Any]:
+    """
+    Read the first worksheet of an .xlsx file as DataFrames of up to chunk_size rows.
+
+    Args:
+        file_path: Path to the workbook.
+        chunk_size: Maximum number of rows per DataFrame.
+
+    Returns:
+        Iterator of DataFrames with the first row as column names.
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = next(rows, None)
+        if headers is None:
+            return
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            yield pd.DataFrame(batch, columns=headers)
+    finally:
+        workbook.close()
+
+def elements_to_result(elements) -> Dict[str, Any]:
+    """
+    Convert partitioned elements to the serializable task result.
+
+    Args:
+        elements: Elements returned by unstructured's partition.
+
+    Returns:
+        Dict containing the processed elements and status.
+    """
+    from unstructured.documents.elements import Table
+
+    # Elements are appended in a tight loop, so the list method is looked up once
+    output = []
+    append = output.append
+
+    for element in elements:
+        # Handle table elements; an identity check on the class, unlike
+        # isinstance, leaves Table subclasses such as TableChunk as text
+        if type(element) is Table:
+            try:
+                # Extract table data
+                headers = element.metadata.header_text if hasattr(element.metadata, "header_text") else []
+                data = []
+
+                # Add table element
+                append({
+                    "type": "Table",
+                    "data": data,
+                    "headers": headers,
+                    "error": "No data found in table"
                 })
+            except Exception as e:
+                logger.error(f"Error processing table: {str(e)}")
+                append({
+                    "type": "Table",
+                    "data": [],
+                    "headers": [],
+                    "error": str(e)
+                })
+        else:
+            # Add text element; only text elements need their text rendered
+            append({"type": type(element).__name__, "text": str(element)})
 
-    return result
+    return {"elements": output, "status": "parsed"}
 
-def process_url(url: str, chunk_strategy: str = "paragraph") -> Dict[str, Any]:
+def process_url(url: str) -> Dict[str, Any]:
     """Process document from URL."""
+    from unstructured.partition.auto import partition
+
     logger.info(f"Processing URL: {url}")
 
-    # Fetch URL content
-    response = requests.get(url)
-    response.raise_for_status()
+    # Stream the page into memory, spilling to disk only for very large pages
+    with _HTTP.get(url, stream=True, timeout=URL_TIMEOUT) as response:
+        response.raise_for_status()
+        with tempfile.SpooledTemporaryFile(max_size=URL_SPOOL_MAX_SIZE) as page:
+            for chunk in response.iter_content(chunk_size=URL_CHUNK_SIZE):
+                page.write(chunk)
+            page.seek(0)
+
+            # Process HTML content
+            elements = partition(file=page, content_type="text/html")
+
+    return elements_to_result(elements)
 
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as temp_file:
-        temp_file.write(response.content)
-        temp_file_path = temp_file.name
+def init_worker_process():
+    """Set up a worker process before it runs tasks."""
+    # Open new Redis connections instead of the parent's
+    redis_client.reset_pool()
 
+def fail_tasks_in_main(task_ids: List[Optional[str]]):
+    """
+    Mark tasks failed from the main process.
+
+    No connection may be open while worker processes are forked, so this
+    opens its own and closes it again rather than using the shared one.
+
+    Args:
+        task_ids: The tasks to mark failed.
+    """
     try:
-        # Process HTML file
-        result = process_file(temp_file_path, chunk_strategy)
-        return result
-    finally:
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        try:
+            with conn:
+                conn.executemany(
+                    "UPDATE tasks SET status = ? WHERE task_id = ?",
+                    [("failed", task_id) for task_id in task_ids]
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error marking tasks failed: {str(e)}")
+
+def requeue_tasks(tasks: List[Dict[str, Any]]):
+    """
+    Put tasks that were taken from the queue but never run back at its head,
+    so they keep their place ahead of the tasks queued since.
+
+    If the tasks cannot be queued again they are marked failed.
+
+    Args:
+        tasks: Task data from the queue, in the order it was taken.
+    """
+    # Already counted as processing when first taken from the queue
+    requeued = [{**task, "_processing": True} for task in tasks]
+    if not redis_client.return_to_queue("document_processing", requeued):
+        fail_tasks_in_main([task.get("task_id") for task in tasks])
 
 def main():
     """Main worker function."""
@@ -291,19 +516,58 @@ def main():
         logger.error("Failed to connect to Redis. Worker cannot start.")
         return
 
-    logger.info("Worker started. Waiting for tasks...")
+    # Old processed uploads are deleted in the background
+    threading.Thread(target=janitor, name="janitor", daemon=True).start()
+
+    logger.info(f"Worker started with {WORKER_PROCESSES} processes. Waiting for tasks...")
+
+    # Tasks run in child processes. Each opens its own database connection, so
+    # the parent's is closed before forking, and resets its Redis connection
+    # pool. At most two tasks per process are in flight at once.
+    _close_conn()
+    pool = ProcessPoolExecutor(max_workers=WORKER_PROCESSES, initializer=init_worker_process)
+    in_flight = threading.BoundedSemaphore(2 * WORKER_PROCESSES)
+    failed_tasks: SimpleQueue = SimpleQueue()
+
+    def task_done(task_id: Optional[str], future: Future):
+        in_flight.release()
+        if future.exception() is not None:
+            logger.error(f"Worker process failed on task {task_id}: {str(future.exception())}")
+            failed_tasks.put(task_id)
 
     # Process tasks from queue
     while True:
         try:
-            # Get task from queue
-            task = redis_client.get_from_queue("document_processing")
-
-            if task:
+            # Tasks whose process died are marked failed here rather than in
+            # the callback, since this thread forks the worker processes
+            if not failed_tasks.empty():
+                task_ids = []
+                while not failed_tasks.empty():
+                    task_ids.append(failed_tasks.get())
+                fail_tasks_in_main(task_ids)
+
+            # Wait for tasks and take a batch of them in one round trip
+            started = time.monotonic()
+            tasks = redis_client.get_batch_from_queue("document_processing", TASK_BATCH_SIZE, TASK_WAIT_TIMEOUT)
+
+            for index, task in enumerate(tasks):
                 logger.info(f"Got task from queue: {task.get('task_id')}")
-                process_document_task(task)
-            else:
-                # Sleep if no tasks
+                in_flight.acquire()
+                try:
+                    future = pool.submit(process_document_task, task)
+                except BrokenProcessPool as e:
+                    # A child process died, so the pool takes no more tasks.
+                    # Hand the rest of the batch back and start a new pool.
+                    in_flight.release()
+                    logger.error(f"Worker pool is broken, restarting it: {str(e)}")
+                    requeue_tasks(tasks[index:])
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=WORKER_PROCESSES, initializer=init_worker_process)
+                    break
+                future.add_done_callback(partial(task_done, task.get("task_id")))
+
+            if not tasks and time.monotonic() - started < TASK_WAIT_TIMEOUT / 2:
+                # Came back empty without waiting, so Redis is failing
                 time.sleep(1)
         except Exception as e:
             logger.error(f"Error in worker main loop: {str(e)}")
@@ -7,6 +7,7 @@ This script starts both servers in separate processes.
 
 import os
 import sys
+import socket
 import subprocess
 import time
 import signal
@@ -16,27 +17,76 @@ import atexit
 main_server_process = None
 batch_server_process = None
 
+# Ports the servers listen on, and seconds they get to start accepting connections
+MAIN_SERVER_PORT = 8000
+BATCH_SERVER_PORT = 8086
+STARTUP_TIMEOUT = 15
+
+# Server output goes to log files; a pipe that nobody reads blocks the server
+# once the pipe buffer fills
+LOG_DIR = "logs"
+MAIN_SERVER_LOG = os.path.join(LOG_DIR, "main_server.log")
+BATCH_SERVER_LOG = os.path.join(LOG_DIR, "batch_server.log")
+
+def open_log(path):
+    """Open a server log for appending."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, "ab", buffering=0)
+
+def print_log_tail(path, num_lines=20):
+    """Print the last lines of a server log."""
+    with open(path, "rb") as log:
+        log.seek(0, os.SEEK_END)
+        log.seek(max(0, log.tell() - 8192))
+        lines = log.read().decode(errors="replace").splitlines()[-num_lines:]
+    print(f"Last lines of {path}:")
+    for line in lines:
+        print(f"  {line}")
+
+def wait_ready(process, port, timeout=STARTUP_TIMEOUT):
+    """
+    Wait until a server accepts connections on its port.
+
+    Returns True as soon as it does, or False if the process exits or the
+    timeout passes first.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.25):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def stop_process(process):
+    """Stop a server process that is still running."""
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
 def start_main_server():
     """Start the main ClaryAI server."""
     print("Starting main ClaryAI server...")
     
     # Start the main server
-    main_server_process = subprocess.Popen(
-        ["python", "src/main.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    
-    # Wait for the server to start
-    time.sleep(2)
+    with open_log(MAIN_SERVER_LOG) as log:
+        main_server_process = subprocess.Popen(
+            ["python", "src/main.py"],
+            stdout=log,
+            stderr=subprocess.STDOUT
+        )
     
-    # Check if the server started successfully
-    if main_server_process.poll() is not None:
+    # Wait for the server to start accepting connections
+    if not wait_ready(main_server_process, MAIN_SERVER_PORT):
         print("Error: Main server failed to start")
-        stdout, stderr = main_server_process.communicate()
-        print(f"Stdout: {stdout}")
-        print(f"Stderr: {stderr}")
+        stop_process(main_server_process)
+        print_log_tail(MAIN_SERVER_LOG)
         return None
     
     print("Main server started successfully")
@@ -47,22 +97,18 @@ def start_batch_server():
     print("Starting batch server...")
     
     # Start the batch server
-    batch_server_process = subprocess.Popen(
-        ["python", "batch_server.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    
-    # Wait for the server to start
-    time.sleep(2)
+    with open_log(BATCH_SERVER_LOG) as log:
+        batch_server_process = subprocess.Popen(
+            ["python", "batch_server.py"],
+            stdout=log,
+            stderr=subprocess.STDOUT
+        )
     
-    # Check if the server started successfully
-    if batch_server_process.poll() is not None:
+    # Wait for the server to start accepting connections
+    if not wait_ready(batch_server_process, BATCH_SERVER_PORT):
         print("Error: Batch server failed to start")
-        stdout, stderr = batch_server_process.communicate()
-        print(f"Stdout: {stdout}")
-        print(f"Stderr: {stderr}")
+        stop_process(batch_server_process)
+        print_log_tail(BATCH_SERVER_LOG)
         return None
     
     print("Batch server started successfully")
@@ -116,6 +162,7 @@ if __name__ == "__main__":
     print("Both servers are running")
     print("Main server: http://localhost:8000")
     print("Batch server: http://localhost:8086")
+    print(f"Server logs: {MAIN_SERVER_LOG}, {BATCH_SERVER_LOG}")
     print("Press Ctrl+C to stop servers")
     
     # Keep the script running
@@ -124,16 +171,12 @@ if __name__ == "__main__":
             # Check if servers are still running
             if main_server_process.poll() is not None:
                 print("Main server stopped unexpectedly")
-                stdout, stderr = main_server_process.communicate()
-                print(f"Stdout: {stdout}")
-                print(f"Stderr: {stderr}")
+                print_log_tail(MAIN_SERVER_LOG)
                 break
             
             if batch_server_process.poll() is not None:
                 print("Batch server stopped unexpectedly")
-                stdout, stderr = batch_server_process.communicate()
-                print(f"Stdout: {stdout}")
-                print(f"Stderr: {stderr}")
+                print_log_tail(BATCH_SERVER_LOG)
                 break
             
             time.sleep(1)
@@ -8,11 +8,31 @@ import sys
 import time
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
 
 # API key for testing
 API_KEY = "123e4567-e89b-12d3-a456-426614174000"
 
+# Shared HTTP session, so the many status polls reuse one keep-alive connection.
+# Retries on 502/503/504 apply to GETs only; POSTs are retried only when the
+# connection could not be made.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+))
+
+# (connect, read) timeouts for health checks, task submission and status polls
+TIMEOUT = (3.0, 30.0)
+# Synchronous processing runs OCR and LLM work, so its response has no read timeout
+PROCESSING_TIMEOUT = (3.0, None)
+
+# Seconds between task status polls, growing from the minimum to the maximum
+POLL_MIN_DELAY = 0.05
+POLL_MAX_DELAY = 1.0
+
 def parse_document(file_path, async_processing=False):
     """Parse document using ClaryAI API."""
     url = "http://localhost:8080/parse"
@@ -28,7 +48,8 @@ def parse_document(file_path, async_processing=False):
         }
         
         # Send request
-        response = requests.post(url, files=files, params=params)
+        response = SESSION.post(url, files=files, params=params,
+                                timeout=TIMEOUT if async_processing else PROCESSING_TIMEOUT)
         
         # Check response
         if response.status_code == 200:
@@ -48,7 +69,7 @@ def check_status(task_id):
     }
     
     # Send request
-    response = requests.get(url, params=params)
+    response = SESSION.get(url, params=params, timeout=TIMEOUT)
     
     # Check response
     if response.status_code == 200:
@@ -91,9 +112,11 @@ def main():
     print(f"Task ID: {task_id}")
     print("Checking status...")
     
-    # Poll for status
-    max_attempts = 30
-    for i in range(max_attempts):
+    # Poll for status, quickly at first so short tasks return at once, then back off
+    max_wait_seconds = 30
+    delay = POLL_MIN_DELAY
+    start_time = time.time()
+    while time.time() - start_time < max_wait_seconds:
         status_result = check_status(task_id)
         if not status_result:
             return 1
@@ -114,9 +137,10 @@ def main():
             return 1
         
         # Wait before checking again
-        time.sleep(1)
+        time.sleep(delay)
+        delay = min(delay * 1.5, POLL_MAX_DELAY)
     
-    print(f"Timeout after {max_attempts} attempts")
+    print(f"Timeout after {max_wait_seconds} seconds")
     return 1
 
 if __name__ == "__main__":
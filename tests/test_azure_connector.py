@@ -0,0 +1,63 @@
+"""
+Tests for streaming downloads with the Azure connector.
+"""
+
+import io
+import os
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Add the parent directory to the path so we can import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the src directory to the path so modules can import each other
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src.more_connectors import AZURE_MAX_CONCURRENCY, AzureConnector
+
+
+class PipeWriter(io.RawIOBase):
+    """Writable stream that cannot seek, like a pipe."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+class TestAzureDownloadToStream(unittest.TestCase):
+    """Tests for AzureConnector.download_to_stream."""
+
+    def setUp(self):
+        """Set up a mock Azure SDK."""
+        self.azure = MagicMock()
+        self.blob = (self.azure.BlobServiceClient.from_connection_string.return_value
+                     .get_container_client.return_value.get_blob_client.return_value)
+        patcher = patch('src.more_connectors.import_optional', return_value=self.azure)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.credentials = {"connection_string": "UseDevelopmentStorage=true"}
+
+    def test_non_seekable_stream(self):
+        """Test that a non-seekable target is downloaded without parallel range GETs."""
+        out = PipeWriter()
+
+        self.assertTrue(AzureConnector().download_to_stream("container/blob.pdf", self.credentials, out))
+        self.blob.download_blob.assert_called_once_with(max_concurrency=1)
+        self.blob.download_blob.return_value.readinto.assert_called_once_with(out)
+
+    def test_seekable_stream(self):
+        """Test that a seekable target is downloaded with parallel range GETs."""
+        out = io.BytesIO()
+
+        self.assertTrue(AzureConnector().download_to_stream("container/blob.pdf", self.credentials, out))
+        self.blob.download_blob.assert_called_once_with(max_concurrency=AZURE_MAX_CONCURRENCY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+Tests for the performance module.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+# Add the parent directory to the path so we can import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the src directory to the path so modules can import each other
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src import performance
+from src.performance import (MemoryCache, adaptive_chunk_size, cached, chunked_read, mapped_chunks,
+                             optimize_llm_processing, parallel_map)
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Tests for the MemoryCache class."""
+
+    def test_get_set(self):
+        """Test storing and retrieving a value."""
+        cache = MemoryCache(max_size=4, ttl=60)
+        cache.set("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("missing"))
+
+    def test_expiry(self):
+        """Test that expired items are not returned."""
+        cache = MemoryCache(max_size=4, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache.cache)
+
+    def test_expired_items_are_purged(self):
+        """Test that expired items are removed without being accessed."""
+        cache = MemoryCache(max_size=4, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        cache.set("b", 2)
+        time.sleep(0.02)
+        cache.set("c", 3)
+
+        self.assertNotIn("a", cache.cache)
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_purge_expired_skips_overwritten_entries(self):
+        """Test that an overwritten key is kept until its new expiry."""
+        cache = MemoryCache(max_size=4, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        cache.set("a", 2)
+        time.sleep(0.02)
+        cache.purge_expired()
+
+        self.assertEqual(cache.get("a"), 2)
+
+    def test_evicts_least_recently_used(self):
+        """Test that a full cache evicts the least recently used item."""
+        cache = MemoryCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_overwrite_does_not_evict(self):
+        """Test that updating an existing key keeps the other items."""
+        cache = MemoryCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 10)
+
+        self.assertEqual(cache.get("a"), 10)
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_delete_and_clear(self):
+        """Test deleting single items and clearing the cache."""
+        cache = MemoryCache(max_size=4, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        cache.delete("missing")
+
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertIsNone(cache.get("b"))
+
+
+class TestCached(unittest.TestCase):
+    """Tests for the cached decorator."""
+
+    def test_hashable_and_unhashable_arguments(self):
+        """Test that repeated calls hit the cache for both key paths."""
+        calls = []
+
+        @cached(ttl=60)
+        def lookup(*args, **kwargs):
+            calls.append((args, kwargs))
+            return len(calls)
+
+        self.assertEqual(lookup("doc", page=1), 1)
+        self.assertEqual(lookup("doc", page=1), 1)
+        self.assertEqual(lookup(["doc"], options={"page": 1}), 2)
+        self.assertEqual(lookup(["doc"], options={"page": 1}), 2)
+        self.assertEqual(lookup("doc", page=2), 3)
+
+    def test_equal_arguments_of_different_types(self):
+        """Test that 1, 1.0 and True do not share a cache entry."""
+        @cached(ttl=60)
+        def kind(value, flag=None):
+            return (type(value).__name__, type(flag).__name__)
+
+        self.assertEqual(kind(1), ("int", "NoneType"))
+        self.assertEqual(kind(1.0), ("float", "NoneType"))
+        self.assertEqual(kind(True), ("bool", "NoneType"))
+        self.assertEqual(kind(1, flag=1), ("int", "int"))
+        self.assertEqual(kind(1, flag=True), ("int", "bool"))
+
+    def test_unknown_tier(self):
+        """Test that an unknown cache tier is rejected."""
+        with self.assertRaises(ValueError):
+            cached(tier="remote")
+
+
+class TestParallelMap(unittest.TestCase):
+    """Tests for parallel_map."""
+
+    def test_broken_pool_is_replaced(self):
+        """Test that a broken shared pool is dropped and the call retried on a new one."""
+        broken = mock.Mock()
+        broken.map.side_effect = BrokenProcessPool("child died")
+        healthy = mock.Mock()
+        healthy.map.return_value = iter([2, 4])
+
+        with mock.patch.object(performance, "ProcessPoolExecutor", return_value=healthy) as pool_class, \
+                mock.patch.dict(performance._EXECUTORS, clear=True):
+            performance._EXECUTORS[(pool_class, 2)] = broken
+
+            self.assertEqual(parallel_map(abs, [2, 4], max_workers=2), [2, 4])
+            self.assertIs(performance._EXECUTORS[(pool_class, 2)], healthy)
+        broken.shutdown.assert_called_once()
+
+
+class TestChunkedRead(unittest.TestCase):
+    """Tests for chunked_read and mapped_chunks."""
+
+    def setUp(self):
+        """Write a small test file."""
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"abcdefghij")
+        self.path = f.name
+        self.addCleanup(os.remove, self.path)
+
+    def test_chunks_are_bytes(self):
+        """Test that a file is returned as bytes chunks of the requested size."""
+        chunks = chunked_read(self.path, chunk_size=4)
+
+        self.assertEqual(chunks, [b"abcd", b"efgh", b"ij"])
+        self.assertTrue(all(isinstance(chunk, bytes) for chunk in chunks))
+
+    def test_mapped_chunks_are_released(self):
+        """Test that mapped chunks are views that are released when the block exits."""
+        with mapped_chunks(self.path, chunk_size=4) as chunks:
+            self.assertEqual([bytes(chunk) for chunk in chunks], [b"abcd", b"efgh", b"ij"])
+
+        with self.assertRaises(ValueError):
+            bytes(chunks[0])
+
+    def test_empty_file(self):
+        """Test that an empty file has no chunks."""
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            pass
+        self.addCleanup(os.remove, f.name)
+
+        self.assertEqual(chunked_read(f.name), [])
+        with mapped_chunks(f.name) as chunks:
+            self.assertEqual(chunks, [])
+
+
+class TestOptimizeLlmProcessing(unittest.TestCase):
+    """Tests for optimize_llm_processing."""
+
+    def test_semantic_cache_failures_do_not_fail_the_call(self):
+        """Test that errors from the semantic cache fall through to the LLM."""
+        semantic_cache = mock.Mock()
+        semantic_cache.get.side_effect = RuntimeError("embedding request failed")
+        semantic_cache.set.side_effect = RuntimeError("embedding request failed")
+
+        def generate(prompt, temperature=0.7):
+            return f"answer to {prompt}"
+
+        with mock.patch.object(performance, "get_disk_cache", return_value=None):
+            processor = optimize_llm_processing(generate, semantic_cache=semantic_cache)
+            self.assertEqual(processor("unique semantic prompt", temperature=0), "answer to unique semantic prompt")
+        semantic_cache.set.assert_called_once()
+
+
+class TestAdaptiveChunkSize(unittest.TestCase):
+    """Tests for adaptive_chunk_size."""
+
+    def test_thresholds(self):
+        """Test the chunk size on both sides of each threshold."""
+        mb = 1024 * 1024
+        self.assertEqual(adaptive_chunk_size(0), 64 * 1024)
+        self.assertEqual(adaptive_chunk_size(mb - 1), 64 * 1024)
+        self.assertEqual(adaptive_chunk_size(mb), 256 * 1024)
+        self.assertEqual(adaptive_chunk_size(10 * mb - 1), 256 * 1024)
+        self.assertEqual(adaptive_chunk_size(10 * mb), mb)
+        self.assertEqual(adaptive_chunk_size(100 * mb - 1), mb)
+        self.assertEqual(adaptive_chunk_size(100 * mb), 4 * mb)
+
+
+if __name__ == '__main__':
+    unittest.main()
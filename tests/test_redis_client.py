@@ -0,0 +1,50 @@
+"""
+Tests for the Redis client module.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path so we can import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the src directory to the path so modules can import each other
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src import redis_client
+from src.redis_client import RedisClient
+
+
+class TestRedisClient(unittest.TestCase):
+    """Tests for the RedisClient class."""
+
+    def setUp(self):
+        """Set up a client backed by a mock Redis connection."""
+        with patch.object(redis_client.redis, "Redis", return_value=MagicMock()):
+            self.client = RedisClient()
+
+    def test_store_headerless_table_result(self):
+        """Test that a table with integer column keys is stored with string keys."""
+        result = {
+            "status": "completed",
+            "elements": [{"type": "Table", "headers": [0, 1], "data": [{0: "a", 1: "b"}]}]
+        }
+
+        with patch.object(redis_client, "RESULT_SERIALIZER", "json"):
+            self.assertTrue(self.client.store_task_result("task-1", result))
+
+        stored = self.client.redis.set.call_args[0][1]
+        self.assertEqual(
+            redis_client._unpack_result(stored)["elements"][0]["data"],
+            [{"0": "a", "1": "b"}]
+        )
+
+    def test_queue_item_with_integer_keys(self):
+        """Test that queue payloads with integer keys are serialized."""
+        self.assertTrue(self.client.add_to_queue("document_processing", {"task_id": "t", "columns": {0: "a"}}))
+        self.client.redis.lpush.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
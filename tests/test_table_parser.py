@@ -0,0 +1,103 @@
+"""
+Tests for the table parser module.
+"""
+
+import io
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+# Add the parent directory to the path so we can import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the src directory to the path so modules can import each other
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from src.table_parser_improved import TableTransformer, _fast_html_table, parse_text_table, transform_chunks
+
+
+class TestTableTransformer(unittest.TestCase):
+    """Tests for the TableTransformer class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.transformer = TableTransformer()
+
+    def test_parse_html_table(self):
+        """Test that HTML rows are padded or truncated to the header width."""
+        result = self.transformer._parse_html_table(
+            "<table><tr><th>A</th><th>B</th></tr>"
+            "<tr><td>1</td></tr><tr><td>2</td><td>3</td><td>4</td></tr></table>"
+        )
+
+        self.assertEqual(result["headers"], ["A", "B"])
+        self.assertEqual(result["data"], [{"A": "1", "B": ""}, {"A": "2", "B": "3"}])
+        self.assertEqual(result["num_cols"], 2)
+
+    def test_fast_html_table_matches_parser(self):
+        """Test that the tokenizer fast path agrees with the HTML parser."""
+        html_table = (
+            '<table><thead><tr><th class="a>b">Name</th><th>Note</th></tr></thead>'
+            '<tbody><tr><td> Bolt </td><td><b>M6</b> &amp; washer</td></tr></tbody></table>'
+        )
+
+        self.assertEqual(
+            _fast_html_table(html_table),
+            (["Name", "Note"], [["Bolt", "M6 & washer"]])
+        )
+        self.assertEqual(_fast_html_table(html_table), self.transformer._extract_html_cells_bs4(html_table))
+
+    def test_fast_html_table_rejects_complex_input(self):
+        """Test that input needing a real parser is left to it."""
+        self.assertIsNone(_fast_html_table("<table><tr><td>1<td>2</tr></table>"))
+        self.assertIsNone(_fast_html_table("<table><tr><td>1</td></tr></table><table></table>"))
+        self.assertIsNone(_fast_html_table("<table><!-- x --><tr><td>1</td></tr></table>"))
+
+    def test_parse_markdown_table(self):
+        """Test parsing a markdown table."""
+        result = self.transformer.parse_text_table("| A | B |\n|---|---|\n| 1 | 2 |\n| 3 |\n")
+
+        self.assertEqual(result["headers"], ["A", "B"])
+        self.assertEqual(result["data"], [{"A": "1", "B": "2"}, {"A": "3", "B": ""}])
+        self.assertEqual(result["num_rows"], 2)
+
+    def test_parse_space_separated_table(self):
+        """Test parsing a table with multiple spaces between columns."""
+        result = self.transformer.parse_text_table("Name  Age\nBob  30\nAl  4\n")
+
+        self.assertEqual(result["headers"], ["Name", "Age"])
+        self.assertEqual(result["data"], [{"Name": "Bob", "Age": "30"}, {"Name": "Al", "Age": "4"}])
+
+    def test_repeated_table_is_cached(self):
+        """Test that parsing the same table twice returns equal, independent results."""
+        table = "Item  Qty\nBolt  12\nNut  40\n"
+        first = self.transformer.parse_text_table(table)
+        expected = {**first, "headers": list(first["headers"]), "data": [dict(r) for r in first["data"]]}
+        first["headers"].append("Extra")
+        first["data"][0]["Qty"] = "0"
+        first["data"].clear()
+        second = self.transformer.parse_text_table(table)
+
+        self.assertEqual(second, expected)
+        self.assertIsNot(second, first)
+
+    def test_module_functions_back_the_class(self):
+        """Test that the class exposes the module-level parsers unchanged."""
+        table = "Part  Count\nGear  3\nShaft  1\n"
+
+        self.assertIs(TableTransformer.parse_text_table, parse_text_table)
+        self.assertEqual(self.transformer.parse_text_table(table), parse_text_table(table))
+
+    def test_transform_chunks(self):
+        """Test that chunked tabular data is combined into one table."""
+        chunks = pd.read_csv(io.StringIO("a,b\n1,x\n2,\n3,z\n"), chunksize=2)
+        result = transform_chunks(chunks)
+
+        self.assertEqual(result["headers"], ["a", "b"])
+        self.assertEqual(result["data"], [{"a": 1, "b": "x"}, {"a": 2, "b": None}, {"a": 3, "b": "z"}])
+        self.assertEqual(result["num_rows"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()